@@ -0,0 +1,289 @@
+# This program benchmarks the PostgreSQL migration and extract scripts against a local,
+# disposable PostgreSQL instance. It creates a cluster with initdb in a temporary
+# directory, generates a synthetic human_resources style schema at the requested
+# scale, times psgres_to_psgres, create_csv_files and the students JSON export end to
+# end, and appends the results to a JSON-lines file so versions can be compared.
+
+import sys
+import os
+import io
+import json
+import socket
+import shutil
+import argparse
+import datetime
+import tempfile
+import importlib
+import contextlib
+import subprocess
+import psycopg2
+from timeit import default_timer as timer
+
+SCHEMA = 'human_resources'
+STUDENTS_SCHEMA = 'casewesternreserve'
+RESULTS_FILE = 'benchmark_results.jsonl'
+TYPE_MIXES = ['basic','wide','rich']
+BENCHMARKS = ['migrate','csv','json']
+WIDE_TEXT_COLUMNS = 8
+
+# Main function for benchmarking the migration and extract scripts.
+def run_benchmarks(args):
+    sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+    pg_to_pg = importlib.import_module('pg_to_pg_automate')
+    extract_json = importlib.import_module('extract_data_from_postgresql')
+    work_dir = tempfile.mkdtemp(prefix='pgbench_')
+    pg_bin = args.pg_bin
+    port = get_free_port()
+    results = []
+    try:
+        start_local_cluster(pg_bin,work_dir,port)
+        db_info = {'user':'postgres','pwd':'postgres','host':work_dir,'port':str(port),'database':'postgres','schema':SCHEMA}
+        src_db_info = dict(db_info,database='bench_src')
+        dst_db_info = dict(db_info,database='bench_dst')
+        create_databases(db_info,[src_db_info['database'],dst_db_info['database']])
+        print(f"Generating '{SCHEMA}' schema: {args.tables} tables x {args.rows} rows, '{args.type_mix}' columns...")
+        rowcnt = generate_schema(src_db_info,args)
+        server_version = get_server_version(src_db_info)
+        for run in range(1,args.runs + 1):
+            if 'migrate' in args.benchmarks:
+                for load_engine in args.load_engines:
+                    reset_schema(dst_db_info)
+                    migration_info = {'extract_csv_dir':'','create_tables_only':'N','create_tables_insert_data':'Y',
+                                      'load_engine':load_engine,'max_workers':str(args.max_workers)}
+                    secs = time_call(args,pg_to_pg.psgres_to_psgres,migration_info,dict(src_db_info),dict(dst_db_info))
+                    loaded_rowcnt = count_schema_rows(dst_db_info)
+                    if loaded_rowcnt != rowcnt:
+                        print(f"Benchmark 'migrate ({load_engine})' loaded {loaded_rowcnt} of {rowcnt} rows; run with --verbose for details.")
+                        secs = None
+                    results.append(get_result(args,server_version,run,'migrate',load_engine,rowcnt,secs))
+            if 'csv' in args.benchmarks:
+                csv_dir = os.path.join(work_dir,f'csv_{run}')
+                os.mkdir(csv_dir)
+                migration_info = {'extract_csv_dir':csv_dir,'max_workers':str(args.max_workers)}
+                pg_to_pg.clear_schema_metadata(src_db_info)
+                secs = time_call(args,pg_to_pg.create_csv_files,migration_info,dict(src_db_info))
+                pg_to_pg.close_db_pools()
+                results.append(get_result(args,server_version,run,'csv','',rowcnt,secs))
+                shutil.rmtree(csv_dir)
+            if 'json' in args.benchmarks:
+                json_file = os.path.join(work_dir,f'students_{run}.json')
+                secs = time_call(args,extract_json.extract_students_to_json,dict(src_db_info,schema=STUDENTS_SCHEMA),json_file)
+                results.append(get_result(args,server_version,run,'json','',args.rows,secs))
+                os.remove(json_file)
+    finally:
+        stop_local_cluster(pg_bin,work_dir)
+        shutil.rmtree(work_dir,ignore_errors=True)
+    with open(args.results_file,'a',encoding='utf-8') as results_file:
+        for result in results:
+            results_file.write(json.dumps(result) + "\n")
+    print_results(args,results)
+
+# Get an unused local TCP port for the benchmark cluster.
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1',0))
+        return sock.getsockname()[1]
+
+# Create a cluster in work_dir and start it listening on a Unix socket in the same
+# directory only, with settings that keep the benchmark from being disk bound and any
+# other server_settings, such as {'wal_level':'logical'}.
+def start_local_cluster(pg_bin,work_dir,port,server_settings=None):
+    data_dir = os.path.join(work_dir,'data')
+    subprocess.run([os.path.join(pg_bin,'initdb'),'-D',data_dir,'-U','postgres','-A','trust','-E','UTF8'],
+                   check=True,stdout=subprocess.DEVNULL)
+    server_options = f"-p {port} -k {work_dir} -c listen_addresses='' -c fsync=off -c full_page_writes=off" + \
+                     "".join(f" -c {setting}={value}" for setting,value in (server_settings or {}).items())
+    subprocess.run([os.path.join(pg_bin,'pg_ctl'),'-D',data_dir,'-o',server_options,'-l',os.path.join(work_dir,'postgres.log'),
+                    '-w','start'],check=True,stdout=subprocess.DEVNULL)
+
+# Stop the benchmark cluster if it's running.
+def stop_local_cluster(pg_bin,work_dir):
+    data_dir = os.path.join(work_dir,'data')
+    if os.path.isdir(data_dir):
+        subprocess.run([os.path.join(pg_bin,'pg_ctl'),'-D',data_dir,'-m','fast','-w','stop'],
+                       stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
+
+# Connect to a benchmark database.
+def connect(db_info):
+    return psycopg2.connect(user=db_info['user'],
+                            host=db_info['host'],
+                            port=db_info['port'],
+                            database=db_info['database'])
+
+# Create the source and destination databases, each with an empty benchmark schema.
+def create_databases(db_info,databases):
+    db_conn = connect(db_info)
+    db_conn.autocommit = True
+    db_cursor = db_conn.cursor()
+    for database in databases:
+        db_cursor.execute(f"CREATE DATABASE {database}")
+    db_cursor.close()
+    db_conn.close()
+    for database in databases:
+        reset_schema(dict(db_info,database=database))
+
+# Drop and recreate the benchmark schema of a database.
+def reset_schema(db_info):
+    db_conn = connect(db_info)
+    db_cursor = db_conn.cursor()
+    db_cursor.execute(f"DROP SCHEMA IF EXISTS {db_info['schema']} CASCADE")
+    db_cursor.execute(f"CREATE SCHEMA {db_info['schema']}")
+    db_conn.commit()
+    db_cursor.close()
+    db_conn.close()
+
+# Get the column definitions and generating expressions of a synthetic table. 'basic'
+# tables have integer, numeric, text and date columns; 'wide' tables add text columns;
+# 'rich' tables add timestamptz, boolean, uuid, jsonb, bytea and inet columns.
+def get_synthetic_columns(type_mix,width):
+    columns = [('amount','numeric(12,2)',"round((random() * 100000)::numeric,2)"),
+               ('quantity','integer',"(random() * 1000)::int"),
+               ('note','varchar(' + str(max(width,1)) + ')',f"left(repeat(md5(g::text),{width // 32 + 1}),{width})"),
+               ('created_on','date',"date '2000-01-01' + (g % 9000)")]
+    if type_mix in ['wide','rich']:
+        columns += [(f'text_{idx}','text',f"left(repeat(md5((g + {idx})::text),{width // 32 + 1}),{width})")
+                    for idx in range(1,WIDE_TEXT_COLUMNS + 1)]
+    if type_mix == 'rich':
+        columns += [('updated_at','timestamptz',"timestamptz '2020-01-01' + g * interval '1 second'"),
+                    ('active','boolean',"g % 2 = 0"),
+                    ('uid','uuid',"md5(g::text)::uuid"),
+                    ('attrs','jsonb',"jsonb_build_object('id',g,'tag',md5(g::text))"),
+                    ('payload','bytea',"decode(md5(g::text),'hex')"),
+                    ('address','inet',"('10.0.' || (g % 256) || '.' || (g % 250 + 1))::inet")]
+    return columns
+
+# Generate the synthetic source schema: a chain of 'tables' tables, each row referencing
+# a row of the previous table, so the FK graph is 'tables' levels deep, plus an index per
+# FK and the students table read by the JSON export. Returns the total number of rows.
+def generate_schema(db_info,args):
+    columns = get_synthetic_columns(args.type_mix,args.width)
+    db_conn = connect(db_info)
+    db_cursor = db_conn.cursor()
+    for idx in range(1,args.tables + 1):
+        table = f"{db_info['schema']}.bench_level_{idx}"
+        parent_column = 'parent_id bigint, ' if idx > 1 else ''
+        parent_value = f"(g % {args.rows}) + 1, " if idx > 1 else ''
+        db_cursor.execute(f"CREATE TABLE {table} (id bigint PRIMARY KEY, {parent_column}" +
+                          ", ".join(f"{name} {datatype}" for name,datatype,expression in columns) + ")")
+        db_cursor.execute(f"INSERT INTO {table} SELECT g, {parent_value}" +
+                          ", ".join(expression for name,datatype,expression in columns) +
+                          f" FROM generate_series(1,{args.rows}) AS g")
+        if idx > 1:
+            db_cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT bench_level_{idx}_parent_fk FOREIGN KEY (parent_id) "
+                              f"REFERENCES {db_info['schema']}.bench_level_{idx - 1} (id)")
+            db_cursor.execute(f"CREATE INDEX bench_level_{idx}_parent_ix ON {table} (parent_id)")
+    db_cursor.execute(f"CREATE SCHEMA {STUDENTS_SCHEMA}")
+    db_cursor.execute(f"CREATE TABLE {STUDENTS_SCHEMA}.students (student_id integer PRIMARY KEY, first_name varchar(50), "
+                       "last_name varchar(50), date_of_birth date, email varchar(100))")
+    db_cursor.execute(f"INSERT INTO {STUDENTS_SCHEMA}.students SELECT g, 'first' || g, 'last' || g, "
+                      f"date '2005-01-01' + (g % 5000), 'student' || g || '@example.com' FROM generate_series(1,{args.rows}) AS g")
+    db_conn.commit()
+    db_conn.autocommit = True
+    db_cursor.execute("VACUUM ANALYZE")
+    db_cursor.close()
+    db_conn.close()
+    return args.rows * args.tables
+
+# Count the rows of all tables in the benchmark schema of a database.
+def count_schema_rows(db_info):
+    db_conn = connect(db_info)
+    db_cursor = db_conn.cursor()
+    db_cursor.execute(f"SELECT tablename FROM pg_catalog.pg_tables WHERE schemaname = '{db_info['schema']}' AND tablename LIKE 'bench_level_%'")
+    tables = [table[0] for table in db_cursor.fetchall()]
+    rowcnt = 0
+    for table in tables:
+        db_cursor.execute(f"SELECT count(*) FROM {db_info['schema']}.{table}")
+        rowcnt = rowcnt + db_cursor.fetchone()[0]
+    db_cursor.close()
+    db_conn.close()
+    return rowcnt
+
+# Get the server version of the benchmark cluster.
+def get_server_version(db_info):
+    db_conn = connect(db_info)
+    server_version = db_conn.server_version
+    db_conn.close()
+    return server_version
+
+# Time a benchmarked call. Its output is hidden unless 'verbose' is set; a call that
+# exits or fails is reported and timed as None.
+def time_call(args,function,*function_args):
+    output = io.StringIO()
+    start_time = timer()
+    try:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            function(*function_args)
+    except (Exception,SystemExit) as errmsg:
+        print(f"Benchmark call '{function.__name__}' failed. ERRMSG: {errmsg}\n{output.getvalue()}".strip())
+        return None
+    return timer() - start_time
+
+# Build the result record of one benchmark run.
+def get_result(args,server_version,run,benchmark,load_engine,rowcnt,secs):
+    return {'time':datetime.datetime.now().isoformat(timespec='seconds'),
+            'label':args.label,'benchmark':benchmark,'load_engine':load_engine,'run':run,
+            'tables':args.tables,'rows':args.rows,'width':args.width,'type_mix':args.type_mix,
+            'max_workers':args.max_workers,'total_rows':rowcnt,'secs':None if secs is None else round(secs,3),
+            'rows_per_sec':round(rowcnt / secs,1) if secs else None,
+            'server_version':server_version,'python':sys.version.split()[0]}
+
+# Print the results of this run, with the change against the best time stored for the
+# 'compare' label at the same scale.
+def print_results(args,results):
+    baseline = {}
+    if args.compare and os.path.isfile(args.results_file):
+        with open(args.results_file,encoding='utf-8') as results_file:
+            for line in results_file:
+                result = json.loads(line)
+                if result['label'] == args.compare and result['secs'] is not None:
+                    key = get_result_key(result)
+                    baseline[key] = min(baseline.get(key,result['secs']),result['secs'])
+    print("\n*** Benchmark Results ***")
+    for result in results:
+        benchmark = result['benchmark'] + (f" ({result['load_engine']})" if result['load_engine'] else '')
+        if result['secs'] is None:
+            print(f"Benchmark '{benchmark}' run {result['run']} >>> Failed")
+            continue
+        line = f"Benchmark '{benchmark}' run {result['run']} >>> Rows: {result['total_rows']} | " \
+               f"Time: {result['secs']}s | Rows/s: {result['rows_per_sec']}"
+        if get_result_key(result) in baseline:
+            line += f" | vs '{args.compare}': {baseline[get_result_key(result)] / result['secs']:.2f}x"
+        print(line)
+
+# Get the key that matches results of the same benchmark at the same scale.
+def get_result_key(result):
+    return (result['benchmark'],result['load_engine'],result['tables'],result['rows'],result['width'],
+            result['type_mix'],result['max_workers'])
+
+# Get the git revision of the scripts as the default results label.
+def get_git_label():
+    try:
+        return subprocess.run(['git','describe','--always','--dirty'],cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True,capture_output=True,text=True).stdout.strip()
+    except (OSError,subprocess.CalledProcessError):
+        return 'unversioned'
+
+# Parse the benchmark command line.
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Benchmark the PostgreSQL migration and extract scripts on a local, disposable cluster.')
+    parser.add_argument('--pg-bin',default=os.path.dirname(shutil.which('initdb') or ''),
+                        help='directory with the initdb and pg_ctl binaries (default: found on PATH)')
+    parser.add_argument('--rows',type=int,default=100000,help='rows per table (default: 100000)')
+    parser.add_argument('--tables',type=int,default=3,help='tables in the FK chain, i.e. the FK depth (default: 3)')
+    parser.add_argument('--width',type=int,default=64,help='width of the text columns (default: 64)')
+    parser.add_argument('--type-mix',choices=TYPE_MIXES,default='basic',help='column types of the tables (default: basic)')
+    parser.add_argument('--benchmarks',nargs='+',choices=BENCHMARKS,default=BENCHMARKS,help='benchmarks to run (default: all)')
+    parser.add_argument('--load-engines',nargs='+',default=['COPY'],help='load engines to migrate with (default: COPY)')
+    parser.add_argument('--max-workers',type=int,default=4,help="'max_workers' migration setting (default: 4)")
+    parser.add_argument('--runs',type=int,default=1,help='times to run each benchmark (default: 1)')
+    parser.add_argument('--label',default=get_git_label(),help='label stored with the results (default: git revision)')
+    parser.add_argument('--compare',default='',help='label of stored results to compare with')
+    parser.add_argument('--results-file',default=RESULTS_FILE,help=f'JSON-lines results file (default: {RESULTS_FILE})')
+    parser.add_argument('--verbose',action='store_true',help='show the output of the benchmarked calls')
+    args = parser.parse_args(argv)
+    if not args.pg_bin or not os.path.isfile(os.path.join(args.pg_bin,'initdb')):
+        parser.error("initdb wasn't found; set --pg-bin to the PostgreSQL binaries directory.")
+    return args
+
+if __name__ == '__main__':
+    run_benchmarks(parse_args(sys.argv[1:]))
@@ -1,84 +1,209 @@
-""" This script connects to a PostgreSQL server and queries the data in the students table,
-""" which is located in the colleges database's casewesternreserve schema. It then writes
-""" the student data out to a file in JSON format.
+# This script connects to a PostgreSQL server and exports the data of a table to a file
+# in newline-delimited JSON (NDJSON) format, one record per line. By default it exports
+# the students table, which is located in the colleges database's casewesternreserve
+# schema, with the students' first and last names titled.
 
+import io
+import os
+import sys
+import gzip
 import json
+import argparse
+import importlib.util
 import psycopg2
 
-try:
-    connection = psycopg2.connect(user="postgres",
-    	                          password="********************",
-                                  host="localhost",
-                                  port="5432",
-                                  database="colleges")
-    cursor = connection.cursor()
-    postgreSQL_select_Query = "select * from casewesternreserve.students"
+GZIP_COMPRESSION = 'GZIP'
+ZSTD_COMPRESSION = 'ZSTD'
+FETCH_BATCH_AMT = 10000
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Export a table to an NDJSON file through a buffered, optionally compressed writer, so
+# memory use stays flat whatever the size of the table. Without transforms the JSON is
+# built by the server with row_to_json and streamed to the file with COPY. Transforms map
+# column names to functions applied to that column's non-null values; with transforms the
+# rows are fetched in batches through a server-side cursor, the other columns still
+# arrive as JSON built by the server and each transform runs over a whole batch of its
+# column. Returns the number of records written. Errors are raised to the caller once
+# the partly written file has been removed.
+def export_table_to_ndjson(db_info, table, filename, transforms=None, compression='', batch_size=FETCH_BATCH_AMT):
+    connection = None
+    rowcnt = 0
+    try:
+        connection = psycopg2.connect(user=db_info['user'],
+                                      password=db_info['pwd'],
+                                      host=db_info['host'],
+                                      port=db_info['port'],
+                                      database=db_info['database'],
+                                      client_encoding='UTF8')
+        print(f"Creating {filename} file.")
+        with open_ndjson_writer(filename, compression) as file_object:
+            if transforms:
+                print(f"Selecting rows from {db_info['schema']} {table} table using a server-side cursor.")
+                rowcnt = write_transformed_rows(connection, db_info, table, file_object, transforms, batch_size)
+            else:
+                print(f"Copying rows from {db_info['schema']} {table} table as JSON built by the server.")
+                rowcnt = write_server_json_rows(connection, db_info, table, file_object)
+        connection.commit()
+
+    except BaseException:
+        if os.path.exists(filename):
+            os.remove(filename)
+            print(f"Removed partly written {filename} file.")
+        raise
+
+    finally:
+        # closing database connection.
+        if connection:
+            connection.close()
+            print("PostgreSQL connection is closed")
+    return rowcnt
 
-    cursor.execute(postgreSQL_select_Query)
-    print("Selecting rows from casewesternreserve student table using cursor.fetchall.")
-    student_records = cursor.fetchall()
+# Open a binary file writer for an NDJSON file with a WRITE_BUFFER_SIZE buffer. The data
+# is compressed with gzip or Zstandard when compression is 'GZIP' or 'ZSTD'.
+def open_ndjson_writer(filename, compression=''):
+    compression = compression.upper()
+    if compression == GZIP_COMPRESSION:
+        return io.BufferedWriter(gzip.GzipFile(filename, 'wb', compresslevel=6), WRITE_BUFFER_SIZE)
+    if compression == ZSTD_COMPRESSION:
+        if importlib.util.find_spec('zstandard') is None:
+            raise ValueError("Zstandard compression requires the 'zstandard' package.")
+        import zstandard
+        return io.BufferedWriter(zstandard.ZstdCompressor().stream_writer(open(filename, 'wb')), WRITE_BUFFER_SIZE)
+    if compression:
+        raise ValueError(f"Unknown compression '{compression}'; use '', '{GZIP_COMPRESSION}' or '{ZSTD_COMPRESSION}'.")
+    return open(filename, 'wb', buffering=WRITE_BUFFER_SIZE)
 
-    print("Creating students.json file.")
-    filename = 'students.json'
-    with open(filename, 'w') as file_object:
-        for idx, row in enumerate(student_records):
-            # Title first and last names.
-            data = {'student_id': f"{row[0]}", 'first_name': f"{row[1].title()}", 'last_name': f"{row[2].title()}", 'date_of_birth': f"{row[3]}", 'email': f"{row[4]}"}
-            file_object.write(json.dumps(data))
-            # Don't create newline after last record.
-            if idx != len(student_records) - 1:
-                file_object.write('\n')
+# Stream the rows of a table to the file as JSON built by the server. COPY's CSV format
+# is used with quote and delimiter characters that row_to_json always escapes, so each
+# line is written exactly as the server built it.
+def write_server_json_rows(connection, db_info, table, file_object):
+    cursor = connection.cursor()
+    sqlqry = f"COPY (SELECT row_to_json(tbl) FROM {db_info['schema']}.{table} tbl) " \
+             "TO STDOUT WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')"
+    cursor.copy_expert(sqlqry, file_object)
+    rowcnt = cursor.rowcount
+    cursor.close()
+    return rowcnt
+
+# Stream the rows of a table to the file in batches through a named (server-side)
+# cursor. Transformed columns are fetched as text; all other columns are fetched as
+# JSON values built by the server with to_json, so only the transformed columns are
+# encoded by the client.
+def write_transformed_rows(connection, db_info, table, file_object, transforms, batch_size):
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT * FROM {db_info['schema']}.{table} LIMIT 0")
+    columns = [column.name for column in cursor.description]
+    cursor.close()
+    unknown_columns = set(transforms) - set(columns)
+    if unknown_columns:
+        raise ValueError(f"Table '{table}' has no column(s) {', '.join(sorted(unknown_columns))} to transform.")
+    select_list = ", ".join(f"{column}::text" if column in transforms else f"to_json({column})::text" for column in columns)
+    keys = [json.dumps(column) + ':' for column in columns]
+    cursor = connection.cursor(name=f"ndjson_{table}_cursor")
+    cursor.itersize = batch_size
+    cursor.execute(f"SELECT {select_list} FROM {db_info['schema']}.{table}")
+    rowcnt = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        values = [list(column_values) for column_values in zip(*rows)]
+        for idx, column in enumerate(columns):
+            if column in transforms:
+                transform = transforms[column]
+                values[idx] = ['null' if value is None else json.dumps(transform(value), ensure_ascii=False) for value in values[idx]]
+            else:
+                values[idx] = ['null' if value is None else value for value in values[idx]]
+        file_object.write(''.join('{' + ','.join(map(str.__add__, keys, row)) + '}\n' for row in zip(*values)).encode('utf-8'))
+        rowcnt += len(rows)
+    cursor.close()
+    return rowcnt
 
-except (Exception, psycopg2.Error) as error:
-    print("Error while fetching data from PostgreSQL", error)
+# Export the students table to an NDJSON file with the first and last names titled.
+# Returns the number of records written.
+def extract_students_to_json(db_info, filename, compression=''):
+    return export_table_to_ndjson(db_info, 'students', filename,
+                                  transforms={'first_name': str.title, 'last_name': str.title}, compression=compression)
 
-finally:
-    # closing database connection.
-    if connection:
-        cursor.close()
-        connection.close()
-        print("PostgreSQL connection is closed")
+# Parse the command line arguments; the database settings default to db_settings.
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Export a PostgreSQL table to a newline-delimited JSON file.')
+    parser.add_argument('table', nargs='?', default='',
+                        help='table to export (default: the students table with titled names)')
+    parser.add_argument('--output', default='', help='NDJSON file to write (default: <table>.json)')
+    parser.add_argument('--title', action='append', default=[], metavar='COLUMN',
+                        help='title the values of this column; may be repeated')
+    parser.add_argument('--compression', default='', type=str.upper, choices=['', GZIP_COMPRESSION, ZSTD_COMPRESSION],
+                        help='compress the file with GZIP or ZSTD (default: no compression)')
+    parser.add_argument('--batch-size', type=int, default=FETCH_BATCH_AMT,
+                        help=f'rows fetched per batch when transforming columns (default: {FETCH_BATCH_AMT})')
+    for key in ['user', 'host', 'port', 'database', 'schema']:
+        parser.add_argument(f'--{key}', default=db_settings[key], help=f"database {key} (default: {db_settings[key]})")
+    parser.add_argument('--pwd', default=db_settings['pwd'], help='database password')
+    return parser.parse_args(argv)
 
--- EXECUTION RESULTS --
+# Database settings dictionary.
+db_settings = {'user': 'postgres',
+               'pwd': '********************',
+               'host': 'localhost',
+               'port': '5432',
+               'database': 'colleges',
+               'schema': 'casewesternreserve'}
 
-Selecting rows from casewesternreserve student table using cursor.fetchall.
-Creating students.json file.
-PostgreSQL connection is closed
-[Finished in 558ms]
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    db_info = {key: getattr(args, key) for key in db_settings}
+    try:
+        if args.table:
+            export_table_to_ndjson(db_info, args.table, args.output or f"{args.table}.json",
+                                   transforms={column: str.title for column in args.title},
+                                   compression=args.compression, batch_size=args.batch_size)
+        else:
+            extract_students_to_json(db_info, args.output or 'students.json', args.compression)
+    except (Exception, psycopg2.Error) as error:
+        print("Error while exporting data from PostgreSQL", error)
+        sys.exit(1)
 
-students.json contents
-{"student_id": "4", "first_name": "Suzanne", "last_name": "Farmer", "date_of_birth": "2014-09-18", "email": "suzannefarmer@gmail.com"}
-{"student_id": "5", "first_name": "Leonard", "last_name": "Grant", "date_of_birth": "2009-12-05", "email": "leonardgrant@gmail.com"}
-{"student_id": "20", "first_name": "Elaine", "last_name": "Jefferson", "date_of_birth": "2020-03-02", "email": "elainejefferson@gmail.com"}
-{"student_id": "27", "first_name": "Raquel", "last_name": "Booth", "date_of_birth": "2010-10-24", "email": "raquelbooth@gmail.com"}
-{"student_id": "28", "first_name": "Eric", "last_name": "Jackson", "date_of_birth": "2020-06-30", "email": "ericjackson@gmail.com"}
-{"student_id": "36", "first_name": "Chris", "last_name": "Preston", "date_of_birth": "2020-03-27", "email": "chrispreston@gmail.com"}
-{"student_id": "44", "first_name": "Diane", "last_name": "Andrews", "date_of_birth": "2017-06-07", "email": "dianeandrews@gmail.com"}
-{"student_id": "58", "first_name": "Jessica", "last_name": "Chapman", "date_of_birth": "2020-04-10", "email": "jessicachapman@gmail.com"}
-{"student_id": "59", "first_name": "Michael", "last_name": "Bowman", "date_of_birth": "2018-09-03", "email": "michaelbowman@gmail.com"}
-{"student_id": "61", "first_name": "Mark", "last_name": "Moses", "date_of_birth": "2017-10-13", "email": "markmoses@gmail.com"}
-{"student_id": "67", "first_name": "Leslie", "last_name": "Doyle", "date_of_birth": "2014-12-24", "email": "lesliedoyle@gmail.com"}
-{"student_id": "77", "first_name": "Allan", "last_name": "Carter", "date_of_birth": "2010-12-18", "email": "allancarter@gmail.com"}
-{"student_id": "84", "first_name": "Michael", "last_name": "Kirby", "date_of_birth": "2018-11-19", "email": "michaelkirby@gmail.com"}
-{"student_id": "96", "first_name": "Christopher", "last_name": "Soto", "date_of_birth": "2019-09-24", "email": "christophersoto@gmail.com"}
-{"student_id": "103", "first_name": "Deborah", "last_name": "Lindsey", "date_of_birth": "2013-05-25", "email": "deborahlindsey@gmail.com"}
-{"student_id": "111", "first_name": "Teason", "last_name": "Anderson", "date_of_birth": "2018-01-30", "email": "teasonanderson@gmail.com"}
-{"student_id": "112", "first_name": "Douglas", "last_name": "Howell", "date_of_birth": "2009-08-06", "email": "douglashowell@gmail.com"}
-{"student_id": "114", "first_name": "Bryant", "last_name": "Vargas", "date_of_birth": "2019-08-21", "email": "bryantvargas@gmail.com"}
-{"student_id": "139", "first_name": "Edward", "last_name": "Hayes", "date_of_birth": "2020-03-11", "email": "edwardhayes@gmail.com"}
-{"student_id": "157", "first_name": "Al", "last_name": "Serrano", "date_of_birth": "2019-11-01", "email": "alserrano@gmail.com"}
-{"student_id": "168", "first_name": "John", "last_name": "Cameron", "date_of_birth": "2017-08-28", "email": "johncameron@gmail.com"}
-{"student_id": "190", "first_name": "Jessica", "last_name": "Wilson", "date_of_birth": "2019-01-21", "email": "jessicawilson@gmail.com"}
-{"student_id": "198", "first_name": "Hunyen", "last_name": "Curry", "date_of_birth": "2009-10-30", "email": "hunyencurry@gmail.com"}
-{"student_id": "205", "first_name": "Michael", "last_name": "Vasquez", "date_of_birth": "2018-06-06", "email": "michaelvasquez@gmail.com"}
-{"student_id": "213", "first_name": "Brian", "last_name": "Morton", "date_of_birth": "2019-06-18", "email": "brianmorton@gmail.com"}
-{"student_id": "214", "first_name": "Gary", "last_name": "Jennings", "date_of_birth": "2020-04-07", "email": "garyjennings@gmail.com"}
-{"student_id": "222", "first_name": "Danielle", "last_name": "Atkinson", "date_of_birth": "2018-07-27", "email": "danielleatkinson@gmail.com"}
-{"student_id": "234", "first_name": "Gary", "last_name": "Long", "date_of_birth": "2019-01-12", "email": "garylong@gmail.com"}
-{"student_id": "251", "first_name": "Michael", "last_name": "Schmidt", "date_of_birth": "2010-07-28", "email": "michaelschmidt@gmail.com"}
-{"student_id": "259", "first_name": "George", "last_name": "Horn", "date_of_birth": "2020-02-06", "email": "georgehorn@gmail.com"}
-{"student_id": "275", "first_name": "Shannon", "last_name": "Gilbert", "date_of_birth": "2011-07-03", "email": "shannongilbert@gmail.com"}
-{"student_id": "287", "first_name": "Dennis", "last_name": "Freeman", "date_of_birth": "2019-08-20", "email": "dennisfreeman@gmail.com"}
-{"student_id": "290", "first_name": "Robert", "last_name": "French", "date_of_birth": "2013-02-06", "email": "robertfrench@gmail.com"}
-{"student_id": "303", "first_name": "Cynthia", "last_name": "Harper", "date_of_birth": "2019-09-20", "email": "cynthiaharper@gmail.com"}
-{"student_id": "313", "first_name": "Ellen", "last_name": "Fox", "date_of_birth": "2010-01-20", "email": "ellenfox@gmail.com"}
+# -- EXECUTION RESULTS --
+#
+# Selecting rows from casewesternreserve student table using cursor.fetchall.
+# Creating students.json file.
+# PostgreSQL connection is closed
+# [Finished in 558ms]
+#
+# students.json contents
+# {"student_id": "4", "first_name": "Suzanne", "last_name": "Farmer", "date_of_birth": "2014-09-18", "email": "suzannefarmer@gmail.com"}
+# {"student_id": "5", "first_name": "Leonard", "last_name": "Grant", "date_of_birth": "2009-12-05", "email": "leonardgrant@gmail.com"}
+# {"student_id": "20", "first_name": "Elaine", "last_name": "Jefferson", "date_of_birth": "2020-03-02", "email": "elainejefferson@gmail.com"}
+# {"student_id": "27", "first_name": "Raquel", "last_name": "Booth", "date_of_birth": "2010-10-24", "email": "raquelbooth@gmail.com"}
+# {"student_id": "28", "first_name": "Eric", "last_name": "Jackson", "date_of_birth": "2020-06-30", "email": "ericjackson@gmail.com"}
+# {"student_id": "36", "first_name": "Chris", "last_name": "Preston", "date_of_birth": "2020-03-27", "email": "chrispreston@gmail.com"}
+# {"student_id": "44", "first_name": "Diane", "last_name": "Andrews", "date_of_birth": "2017-06-07", "email": "dianeandrews@gmail.com"}
+# {"student_id": "58", "first_name": "Jessica", "last_name": "Chapman", "date_of_birth": "2020-04-10", "email": "jessicachapman@gmail.com"}
+# {"student_id": "59", "first_name": "Michael", "last_name": "Bowman", "date_of_birth": "2018-09-03", "email": "michaelbowman@gmail.com"}
+# {"student_id": "61", "first_name": "Mark", "last_name": "Moses", "date_of_birth": "2017-10-13", "email": "markmoses@gmail.com"}
+# {"student_id": "67", "first_name": "Leslie", "last_name": "Doyle", "date_of_birth": "2014-12-24", "email": "lesliedoyle@gmail.com"}
+# {"student_id": "77", "first_name": "Allan", "last_name": "Carter", "date_of_birth": "2010-12-18", "email": "allancarter@gmail.com"}
+# {"student_id": "84", "first_name": "Michael", "last_name": "Kirby", "date_of_birth": "2018-11-19", "email": "michaelkirby@gmail.com"}
+# {"student_id": "96", "first_name": "Christopher", "last_name": "Soto", "date_of_birth": "2019-09-24", "email": "christophersoto@gmail.com"}
+# {"student_id": "103", "first_name": "Deborah", "last_name": "Lindsey", "date_of_birth": "2013-05-25", "email": "deborahlindsey@gmail.com"}
+# {"student_id": "111", "first_name": "Teason", "last_name": "Anderson", "date_of_birth": "2018-01-30", "email": "teasonanderson@gmail.com"}
+# {"student_id": "112", "first_name": "Douglas", "last_name": "Howell", "date_of_birth": "2009-08-06", "email": "douglashowell@gmail.com"}
+# {"student_id": "114", "first_name": "Bryant", "last_name": "Vargas", "date_of_birth": "2019-08-21", "email": "bryantvargas@gmail.com"}
+# {"student_id": "139", "first_name": "Edward", "last_name": "Hayes", "date_of_birth": "2020-03-11", "email": "edwardhayes@gmail.com"}
+# {"student_id": "157", "first_name": "Al", "last_name": "Serrano", "date_of_birth": "2019-11-01", "email": "alserrano@gmail.com"}
+# {"student_id": "168", "first_name": "John", "last_name": "Cameron", "date_of_birth": "2017-08-28", "email": "johncameron@gmail.com"}
+# {"student_id": "190", "first_name": "Jessica", "last_name": "Wilson", "date_of_birth": "2019-01-21", "email": "jessicawilson@gmail.com"}
+# {"student_id": "198", "first_name": "Hunyen", "last_name": "Curry", "date_of_birth": "2009-10-30", "email": "hunyencurry@gmail.com"}
+# {"student_id": "205", "first_name": "Michael", "last_name": "Vasquez", "date_of_birth": "2018-06-06", "email": "michaelvasquez@gmail.com"}
+# {"student_id": "213", "first_name": "Brian", "last_name": "Morton", "date_of_birth": "2019-06-18", "email": "brianmorton@gmail.com"}
+# {"student_id": "214", "first_name": "Gary", "last_name": "Jennings", "date_of_birth": "2020-04-07", "email": "garyjennings@gmail.com"}
+# {"student_id": "222", "first_name": "Danielle", "last_name": "Atkinson", "date_of_birth": "2018-07-27", "email": "danielleatkinson@gmail.com"}
+# {"student_id": "234", "first_name": "Gary", "last_name": "Long", "date_of_birth": "2019-01-12", "email": "garylong@gmail.com"}
+# {"student_id": "251", "first_name": "Michael", "last_name": "Schmidt", "date_of_birth": "2010-07-28", "email": "michaelschmidt@gmail.com"}
+# {"student_id": "259", "first_name": "George", "last_name": "Horn", "date_of_birth": "2020-02-06", "email": "georgehorn@gmail.com"}
+# {"student_id": "275", "first_name": "Shannon", "last_name": "Gilbert", "date_of_birth": "2011-07-03", "email": "shannongilbert@gmail.com"}
+# {"student_id": "287", "first_name": "Dennis", "last_name": "Freeman", "date_of_birth": "2019-08-20", "email": "dennisfreeman@gmail.com"}
+# {"student_id": "290", "first_name": "Robert", "last_name": "French", "date_of_birth": "2013-02-06", "email": "robertfrench@gmail.com"}
+# {"student_id": "303", "first_name": "Cynthia", "last_name": "Harper", "date_of_birth": "2019-09-20", "email": "cynthiaharper@gmail.com"}
+# {"student_id": "313", "first_name": "Ellen", "last_name": "Fox", "date_of_birth": "2010-01-20", "email": "ellenfox@gmail.com"}
@@ -1,41 +1,252 @@
 # This program, via the use of dictionaries, automates migrating tables, along with
 # their constraints and data, between schemas in the same PostgreSQL database or
 # between schemas in different PostgreSQL databases including AWS PostgreSQL databases.
+# Run it as a script with the settings dictionaries at the end of this file, overridden
+# by a JSON config file, environment variables and command line arguments (see
+# 'python pg_to_pg_automate.py --help'), or import it and call psgres_to_psgres.
+# Importing it has no side effects and doesn't need psycopg2; pandas, asyncio and
+# http.server are only imported by the modes that use them.
 
 import sys
 import os
-import pandas as pd
+import json
+import gzip
+import fnmatch
+import struct
+import argparse
+import importlib.util
 import datetime
 import time
-import psycopg2
-import psycopg2.extras
-from sqlalchemy import create_engine
+import queue
+import threading
+try:
+    import psycopg2
+    import psycopg2.extras
+except ImportError:
+    psycopg2 = None
 from timeit import default_timer as timer
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
 YES = 'Y'
 NO = 'N'
 CREATE_TABLE = 'CREATE_TABLE'
 DROP_TABLE = 'DROP_TABLE'
+RESUME_TABLE = 'RESUME_TABLE'
+FULL_RUN = 'FULL'
+RESUME_RUN = 'RESUME'
+SYNC_RUN = 'SYNC'
+PLAN_RUN = 'PLAN'
+CUTOVER_RUN = 'CUTOVER'
+LOAD_PENDING = 'PENDING'
+LOAD_RUNNING = 'LOADING'
+LOAD_COMPLETE = 'COMPLETE'
+LOAD_FAILED = 'FAILED'
 BULK_INSERT_AMT = 200000
+COPY_ENGINE = 'COPY'
+INSERT_ENGINE = 'INSERT'
+ASYNC_ENGINE = 'ASYNC'
+COPY_FORMAT_BINARY = 'BINARY'
+COPY_FORMAT_TEXT = 'TEXT'
+FIRST_NORMAL_OID = 16384
+COPY_BUFFER_CHUNKS = 64
+COPY_CHUNK_SIZE = 65536
+STREAM_BATCH_AMT = 10000
+CHUNK_THRESHOLD_MB = 1024
+CHUNKS_PER_WORKER = 4
+CHECKPOINT_MB = 256
+MAINTENANCE_WORK_MEM = '1GB'
+LOAD_WORK_MEM = '256MB'
+CSV_FORMAT = 'CSV'
+PARQUET_FORMAT = 'PARQUET'
+ARROW_FORMAT = 'ARROW'
+ROW_GROUP_SIZE = 1000000
+PANDAS_ENGINE = 'PANDAS'
+GZIP_COMPRESSION = 'GZIP'
+ZSTD_COMPRESSION = 'ZSTD'
+POOL_HEALTH_CHECK_SECS = 30
+POOL_KEEPALIVES_IDLE = 30
+POOL_KEEPALIVES_INTERVAL = 10
+POOL_KEEPALIVES_COUNT = 5
+STATEMENT_TIMEOUT = '0'
+METRICS_HOST = '127.0.0.1'
+VERIFY_SESSION_SETTINGS = {'TimeZone':'UTC','DateStyle':'ISO, YMD','IntervalStyle':'postgres','extra_float_digits':'3',
+                           'bytea_output':'hex','lc_monetary':'C'}
+REPLICATION_SLOT = 'psgres_cutover'
+CUTOVER_IDLE_SECS = 10
+APPLY_STATEMENT_BATCH = 1000
+UNCHANGED_TOAST = object()
+SCHEMA_METADATA_CACHE = {}
+SCHEMA_METADATA_LOCK = threading.Lock()
+DB_POOL_CACHE = {}
+DB_POOL_LOCK = threading.Lock()
 
 # Main function for migrating data between PostgreSQL databases.
 def psgres_to_psgres(migration_info,src_db_info,dst_db_info):
+    if psycopg2 is None:
+        print("Migrating requires the psycopg2 package.")
+        sys.exit(1)
     if confirm_migration_params_set(migration_info) == NO:
-        sys.exit()
+        sys.exit(1)
     if confirm_src_db_params_set(src_db_info) == NO:
-        sys.exit()
+        sys.exit(1)
     if confirm_dst_db_params_set(migration_info,dst_db_info) == NO:
-        sys.exit()
-    if confirm_src_db_params_valid(src_db_info) == NO:
-        sys.exit()
-    if confirm_dst_db_params_valid(dst_db_info) == NO:
-        sys.exit()
-    if migration_info['extract_csv_dir']:
-        create_csv_files(migration_info,src_db_info)
+        sys.exit(1)
+    try:
+        MIGRATION_METRICS.start(migration_info)
+        open_db_pools(migration_info,src_db_info,dst_db_info)
+        run_migration(migration_info,src_db_info,dst_db_info)
+    finally:
+        close_db_pools()
+        MIGRATION_METRICS.stop()
+
+# Command line entry point: run psgres_to_psgres with the settings of load_migration_config.
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        migration_info,src_db_info,dst_db_info = load_migration_config(args,os.environ)
+    except (OSError,ValueError) as errmsg:
+        print(f"Migration settings failed to load. ERRMSG: {errmsg}".strip())
+        sys.exit(1)
+    psgres_to_psgres(migration_info,src_db_info,dst_db_info)
+
+# Parse the command line arguments.
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Migrate tables, along with their constraints and data, between PostgreSQL schemas.')
+    parser.add_argument('--config',default=os.environ.get('PSGRES_CONFIG',''),
+                        help="JSON file with 'migration_settings', 'src_db_settings' and 'dst_db_settings' objects (default: $PSGRES_CONFIG)")
+    parser.add_argument('--set',action='append',default=[],metavar='KEY=VALUE',
+                        help="set a migration setting, for example --set max_workers=8; may be repeated")
+    parser.add_argument('--run-mode',choices=[FULL_RUN,RESUME_RUN,SYNC_RUN,PLAN_RUN,CUTOVER_RUN],help="'run_mode' migration setting")
+    args = parser.parse_args(argv)
+    if any('=' not in setting for setting in args.set):
+        parser.error("--set takes KEY=VALUE arguments.")
+    return args
+
+# Get the migration, source and destination database settings of a run. The settings
+# dictionaries at the end of this file are overridden, in order, by the objects of the
+# JSON config file, by environment variables and by the command line arguments. The
+# environment variables are PSGRES_<SETTING> for migration settings and
+# PSGRES_SRC_<KEY> and PSGRES_DST_<KEY> for database settings (for example
+# PSGRES_MAX_WORKERS or PSGRES_DST_PWD), so passwords can be kept out of config files.
+def load_migration_config(args,environ):
+    migration_info = dict(migration_settings)
+    src_db_info = dict(src_db_settings)
+    dst_db_info = dict(dst_db_settings)
+    if args.config:
+        with open(args.config,encoding='utf-8') as file_object:
+            config = json.load(file_object)
+        migration_info.update(get_config_settings(config,'migration_settings',migration_info))
+        src_db_info.update(get_config_settings(config,'src_db_settings',src_db_info))
+        dst_db_info.update(get_config_settings(config,'dst_db_settings',dst_db_info))
+    for key in migration_info:
+        if f"PSGRES_{key.upper()}" in environ:
+            migration_info[key] = parse_setting_value(migration_info[key],environ[f"PSGRES_{key.upper()}"])
+    for prefix,db_info in [('PSGRES_SRC_',src_db_info),('PSGRES_DST_',dst_db_info)]:
+        for key in db_info:
+            db_info[key] = environ.get(prefix + key.upper(),db_info[key])
+    for setting in args.set:
+        key,value = setting.split('=',1)
+        migration_info[key] = parse_setting_value(migration_info.get(key,''),value)
+    if args.run_mode:
+        migration_info['run_mode'] = args.run_mode
+    return migration_info,src_db_info,dst_db_info
+
+# Get the settings of an object of the JSON config file, typed as the settings
+# dictionaries hold them: numbers, such as a port, are kept as text like every other
+# setting, and lists or dictionaries are only taken by the settings whose value is one.
+def get_config_settings(config,section,settings):
+    config_settings = config.get(section,{})
+    if not isinstance(config_settings,dict):
+        raise ValueError(f"'{section}' in the config file must be an object.")
+    for key,value in config_settings.items():
+        if isinstance(settings.get(key),(list,dict)):
+            if not isinstance(value,type(settings[key])):
+                json_type = 'array' if isinstance(settings[key],list) else 'object'
+                raise ValueError(f"Setting '{key}' of '{section}' in the config file must be a JSON {json_type}.")
+        elif isinstance(value,(int,float)) and not isinstance(value,bool):
+            config_settings[key] = str(value)
+        elif not isinstance(value,str):
+            raise ValueError(f"Setting '{key}' of '{section}' in the config file must be text or a number.")
+    return config_settings
+
+# Parse a migration setting given as text. Settings whose value is a list or dictionary,
+# such as 'schema_mappings', take JSON; all other settings are kept as text.
+def parse_setting_value(current_value,value):
+    if isinstance(current_value,(list,dict)):
+        return json.loads(value)
+    return value
+
+# Run the stages of a migration over the shared connection pools, for every schema job.
+def run_migration(migration_info,src_db_info,dst_db_info):
+    start_time = timer()
+    schema_jobs = get_schema_jobs(migration_info,src_db_info,dst_db_info)
+    for job_migration_info,job_src_db_info,job_dst_db_info in schema_jobs:
+        if confirm_src_db_params_valid(job_src_db_info) == NO:
+            sys.exit(1)
+        if confirm_dst_db_params_valid(job_dst_db_info) == NO:
+            sys.exit(1)
+    MIGRATION_METRICS.record('validation',secs=timer() - start_time)
+    for job_migration_info,job_src_db_info,job_dst_db_info in schema_jobs:
+        clear_schema_metadata(job_src_db_info)
+    if migration_info.get('run_mode',FULL_RUN) == PLAN_RUN:
+        for job_migration_info,job_src_db_info,job_dst_db_info in schema_jobs:
+            plan_migration(job_migration_info,job_src_db_info,job_dst_db_info)
+        return
+    for job_migration_info,job_src_db_info,job_dst_db_info in schema_jobs:
+        if job_migration_info['extract_csv_dir']:
+            os.makedirs(job_migration_info['extract_csv_dir'],exist_ok=True)
+        if job_migration_info['extract_csv_dir'] and \
+           job_migration_info.get('extract_format',CSV_FORMAT) in [PARQUET_FORMAT,ARROW_FORMAT]:
+            create_columnar_files(job_migration_info,job_src_db_info)
+        elif job_migration_info['extract_csv_dir']:
+            create_csv_files(job_migration_info,job_src_db_info)
     if migration_info['create_tables_only'] == YES or \
        migration_info['create_tables_insert_data'] == YES:
-        perform_migration(migration_info,src_db_info,dst_db_info) 
+        if migration_info.get('run_mode',FULL_RUN) == CUTOVER_RUN:
+            perform_cutover(schema_jobs)
+        else:
+            perform_migration(schema_jobs)
+    if migration_info.get('verify_data',NO) == YES:
+        verify_table_data(schema_jobs)
+
+# Get the schema jobs of a run, each a (migration_info,src_db_info,dst_db_info) tuple.
+# Without 'schema_mappings' the run has one job for the schemas of the database
+# settings. Otherwise there's one job per mapping, with the mapping's 'src_schema' and
+# 'dst_schema' (default: the source schema name) and its own 'include_tables',
+# 'exclude_tables' and 'row_filters' when set; its extract files are written to a
+# subdirectory of 'extract_csv_dir' named after the source schema.
+def get_schema_jobs(migration_info,src_db_info,dst_db_info):
+    if not migration_info.get('schema_mappings'):
+        return [(migration_info,src_db_info,dst_db_info)]
+    schema_jobs = []
+    for mapping in migration_info['schema_mappings']:
+        job_migration_info = dict(migration_info,**{key:mapping[key] for key in ['include_tables','exclude_tables','row_filters'] if key in mapping})
+        if migration_info['extract_csv_dir']:
+            job_migration_info['extract_csv_dir'] = os.path.join(migration_info['extract_csv_dir'],mapping['src_schema'])
+        job_dst_db_info = dst_db_info
+        if all(val.strip() for val in dst_db_info.values()):
+            job_dst_db_info = dict(dst_db_info,schema=mapping.get('dst_schema',mapping['src_schema']))
+        schema_jobs.append((job_migration_info,dict(src_db_info,schema=mapping['src_schema']),job_dst_db_info))
+    return schema_jobs
+
+# Get the tables selected by the 'include_tables' and 'exclude_tables' fnmatch patterns
+# (for example 'sales_*'), in their original order. All tables are included by default.
+def get_migration_tables(migration_info,tables):
+    include_patterns = migration_info.get('include_tables',[]) or ['*']
+    exclude_patterns = migration_info.get('exclude_tables',[])
+    return [table for table in tables
+            if any(fnmatch.fnmatchcase(table,pattern) for pattern in include_patterns) and
+               not any(fnmatch.fnmatchcase(table,pattern) for pattern in exclude_patterns)]
+
+# Get the WHERE predicate that selects the rows of a table to migrate: the table's
+# predicate in 'row_filters', if any, combined with extra_filter, such as the key range
+# of a chunk.
+def get_row_filter(migration_info,table,extra_filter=''):
+    row_filter = migration_info.get('row_filters',{}).get(table,'')
+    if row_filter and extra_filter:
+        return f"({row_filter}) AND {extra_filter}"
+    return f"({row_filter})" if row_filter else extra_filter
 
 # Confirm migration parameters are set.
 def confirm_migration_params_set(migration_info):
@@ -54,9 +265,121 @@ def confirm_migration_params_set(migration_info):
        migration_info['create_tables_insert_data'] == YES:
         print("For the 'create_tables_only' and 'create_tables_insert_data' parameters set one to 'Y' and the other to 'N'.")
         return NO
+    if migration_info.get('extract_format',CSV_FORMAT) not in [CSV_FORMAT,PARQUET_FORMAT,ARROW_FORMAT]:
+        print(f"Set 'extract_format' parameter to '{CSV_FORMAT}', '{PARQUET_FORMAT}' or '{ARROW_FORMAT}'.")
+        return NO
+    if migration_info.get('extract_format',CSV_FORMAT) in [PARQUET_FORMAT,ARROW_FORMAT] and \
+       importlib.util.find_spec('pyarrow') is None:
+        print(f"The '{PARQUET_FORMAT}' and '{ARROW_FORMAT}' extract formats require the pyarrow package.")
+        return NO
+    if migration_info.get('csv_engine',COPY_ENGINE) not in [COPY_ENGINE,PANDAS_ENGINE]:
+        print(f"Set 'csv_engine' parameter to '{COPY_ENGINE}' or '{PANDAS_ENGINE}'.")
+        return NO
+    if migration_info['extract_csv_dir'] and migration_info.get('csv_engine',COPY_ENGINE) == PANDAS_ENGINE and \
+       importlib.util.find_spec('pandas') is None:
+        print(f"The '{PANDAS_ENGINE}' CSV engine requires the pandas package.")
+        return NO
+    if migration_info.get('csv_compression','') not in ['',GZIP_COMPRESSION,ZSTD_COMPRESSION]:
+        print(f"Set 'csv_compression' parameter to '', '{GZIP_COMPRESSION}' or '{ZSTD_COMPRESSION}'.")
+        return NO
+    if migration_info.get('csv_compression','') == ZSTD_COMPRESSION and \
+       importlib.util.find_spec('zstandard') is None:
+        print(f"The '{ZSTD_COMPRESSION}' CSV compression requires the zstandard package.")
+        return NO
+    if not str(migration_info.get('csv_split_rows',0)).isdigit() or \
+       not str(migration_info.get('csv_split_bytes',0)).isdigit():
+        print("Set 'csv_split_rows' and 'csv_split_bytes' parameters to whole numbers.")
+        return NO
+    if not str(migration_info.get('row_group_size',ROW_GROUP_SIZE)).isdigit() or \
+       int(migration_info.get('row_group_size',ROW_GROUP_SIZE)) == 0:
+        print("Set 'row_group_size' parameter to a positive whole number.")
+        return NO
+    if migration_info.get('run_mode',FULL_RUN) not in [FULL_RUN,RESUME_RUN,SYNC_RUN,PLAN_RUN,CUTOVER_RUN]:
+        print(f"Set 'run_mode' parameter to '{FULL_RUN}', '{RESUME_RUN}', '{SYNC_RUN}', '{PLAN_RUN}' or '{CUTOVER_RUN}'.")
+        return NO
+    if migration_info.get('run_mode',FULL_RUN) == SYNC_RUN and \
+       migration_info['create_tables_insert_data'] == NO:
+        print(f"Setting 'run_mode' to '{SYNC_RUN}' requires the 'create_tables_insert_data' parameter to be set to 'Y'.")
+        return NO
+    if migration_info.get('run_mode',FULL_RUN) == CUTOVER_RUN and \
+       migration_info['create_tables_insert_data'] == NO:
+        print(f"Setting 'run_mode' to '{CUTOVER_RUN}' requires the 'create_tables_insert_data' parameter to be set to 'Y'.")
+        return NO
+    slot_name = migration_info.get('replication_slot',REPLICATION_SLOT)
+    if not slot_name or not all(char in 'abcdefghijklmnopqrstuvwxyz0123456789_' for char in slot_name):
+        print("Set 'replication_slot' parameter to a name of lower case letters, digits and underscores.")
+        return NO
+    if not str(migration_info.get('cutover_idle_secs',CUTOVER_IDLE_SECS)).isdigit():
+        print("Set 'cutover_idle_secs' parameter to a whole number.")
+        return NO
+    if migration_info.get('load_engine',COPY_ENGINE) not in [COPY_ENGINE,INSERT_ENGINE,ASYNC_ENGINE]:
+        print(f"Set 'load_engine' parameter to '{COPY_ENGINE}', '{INSERT_ENGINE}' or '{ASYNC_ENGINE}'.")
+        return NO
+    if migration_info.get('load_engine',COPY_ENGINE) == ASYNC_ENGINE and importlib.util.find_spec('asyncpg') is None:
+        print(f"The '{ASYNC_ENGINE}' load engine requires the asyncpg package.")
+        return NO
+    if not isinstance(migration_info.get('schema_mappings',[]),list) or \
+       not all(isinstance(mapping,dict) and mapping.get('src_schema') and
+               not set(mapping) - {'src_schema','dst_schema','include_tables','exclude_tables','row_filters'} and
+               isinstance(mapping.get('include_tables',[]),list) and isinstance(mapping.get('exclude_tables',[]),list) and
+               isinstance(mapping.get('row_filters',{}),dict) for mapping in migration_info.get('schema_mappings',[])):
+        print("Set 'schema_mappings' parameter to a list of dictionaries with a 'src_schema' key and optional 'dst_schema', "
+              "'include_tables', 'exclude_tables' and 'row_filters' keys.")
+        return NO
+    if not isinstance(migration_info.get('include_tables',[]),list) or \
+       not isinstance(migration_info.get('exclude_tables',[]),list) or \
+       not isinstance(migration_info.get('row_filters',{}),dict):
+        print("Set 'include_tables' and 'exclude_tables' parameters to lists of table name patterns and 'row_filters' to a dictionary.")
+        return NO
+    if migration_info.get('verify_data',NO) not in [YES,NO]:
+        print("Set 'verify_data' parameter to 'Y' or 'N'.")
+        return NO
+    if migration_info.get('fast_load',NO) not in [YES,NO]:
+        print("Set 'fast_load' parameter to 'Y' or 'N'.")
+        return NO
+    if migration_info.get('copy_format',COPY_FORMAT_BINARY) not in [COPY_FORMAT_BINARY,COPY_FORMAT_TEXT]:
+        print(f"Set 'copy_format' parameter to '{COPY_FORMAT_BINARY}' or '{COPY_FORMAT_TEXT}'.")
+        return NO
+    if migration_info.get('metrics_file','') and \
+       not os.path.isdir(os.path.dirname(os.path.abspath(migration_info['metrics_file']))):
+        print(f"The directory of the '{migration_info['metrics_file']}' metrics file doesn't exist.")
+        return NO
+    if not str(migration_info.get('metrics_port',0)).isdigit() or int(migration_info.get('metrics_port',0)) > 65535:
+        print("Set 'metrics_port' parameter to a port number or to 0.")
+        return NO
+    if not str(migration_info.get('pool_size',0)).isdigit():
+        print("Set 'pool_size' parameter to a whole number.")
+        return NO
+    if not str(migration_info.get('batch_size',STREAM_BATCH_AMT)).isdigit() or \
+       int(migration_info.get('batch_size',STREAM_BATCH_AMT)) == 0:
+        print("Set 'batch_size' parameter to a positive whole number.")
+        return NO
+    if not str(migration_info.get('max_workers',1)).isdigit() or \
+       int(migration_info.get('max_workers',1)) == 0:
+        print("Set 'max_workers' parameter to a positive whole number.")
+        return NO
+    if not str(migration_info.get('max_connections',0)).isdigit():
+        print("Set 'max_connections' parameter to a whole number.")
+        return NO
+    pool_workers = get_pool_workers(migration_info)
+    pool_size,max_connections = get_pool_limits(migration_info)
+    if pool_size < pool_workers:
+        print(f"Set 'pool_size' parameter to 0 or to at least {pool_workers} for {migration_info.get('max_workers',1)} 'max_workers'.")
+        return NO
+    if max_connections < pool_size + pool_workers:
+        print(f"Set 'max_connections' parameter to 0 or to at least {pool_size + pool_workers} for a 'pool_size' of {pool_size}.")
+        return NO
+    if not str(migration_info.get('chunk_threshold_mb',CHUNK_THRESHOLD_MB)).isdigit():
+        print("Set 'chunk_threshold_mb' parameter to a whole number.")
+        return NO
+    if not str(migration_info.get('checkpoint_mb',CHECKPOINT_MB)).isdigit():
+        print("Set 'checkpoint_mb' parameter to a whole number.")
+        return NO
     if len(migration_info['extract_csv_dir']) == 0 and \
        migration_info['create_tables_only'] == NO and \
-       migration_info['create_tables_insert_data'] == NO:
+       migration_info['create_tables_insert_data'] == NO and \
+       migration_info.get('verify_data',NO) == NO and \
+       migration_info.get('run_mode',FULL_RUN) != PLAN_RUN:
         print("The migration settings won't produce any results.")
         return NO
     else:
@@ -77,14 +400,16 @@ def confirm_dst_db_params_set(migration_info,dst_db_info):
     params_unset = {key for (key,val) in dst_db_info.items() if len(val.strip()) == 0}
     if params_unset and \
       (migration_info['create_tables_only'] == YES or \
-       migration_info['create_tables_insert_data'] == YES):
-        print("Setting 'create_tables_only' or 'create_tables_insert_data' parameters requires all destination database parameters to be set.")
+       migration_info['create_tables_insert_data'] == YES or \
+       migration_info.get('verify_data',NO) == YES):
+        print("Setting 'create_tables_only', 'create_tables_insert_data' or 'verify_data' parameters requires all destination database parameters to be set.")
         return NO
     params_set = {key for (key,val) in dst_db_info.items() if len(val.strip()) > 0}
     if params_set and \
        migration_info['extract_csv_dir'] and \
        migration_info['create_tables_only'] == NO and \
-       migration_info['create_tables_insert_data'] == NO:
+       migration_info['create_tables_insert_data'] == NO and \
+       migration_info.get('verify_data',NO) == NO:
         print("Set all destination database parameters to '' if you only want to extract table data to CSV files.")
         return NO
     else:
@@ -93,11 +418,7 @@ def confirm_dst_db_params_set(migration_info,dst_db_info):
 # Test source database parameters.
 def confirm_src_db_params_valid(src_db_info):
     try:
-        src_db_conn = psycopg2.connect(user=src_db_info['user'],
-                                       password=src_db_info['pwd'],
-                                       host=src_db_info['host'],
-                                       port=src_db_info['port'],
-                                       database=src_db_info['database'])
+        src_db_conn = get_db_pool(src_db_info).checkout()
     except:
         print('Connection to source database failed. Check parameter settings or database status.')
         return NO        
@@ -107,8 +428,8 @@ def confirm_src_db_params_valid(src_db_info):
         cursor.execute(sqlqry)
         schemaname = cursor.fetchone()
         cursor.close()
-        src_db_conn.close()
-        if schemaname[0] == src_db_info['schema']:
+        get_db_pool(src_db_info).checkin(src_db_conn)
+        if schemaname and schemaname[0] == src_db_info['schema']:
             return YES
         else:
             print(f"Schema '{src_db_info['schema']}' doesn't exist in the source database.")
@@ -118,11 +439,7 @@ def confirm_src_db_params_valid(src_db_info):
 def confirm_dst_db_params_valid(dst_db_info):
     if len({key for (key,val) in dst_db_info.items() if len(val.strip()) > 0}) == len(dst_db_info):
         try:
-            dst_db_conn = psycopg2.connect(user=dst_db_info['user'],
-                                           password=dst_db_info['pwd'],
-                                           host=dst_db_info['host'],
-                                           port=dst_db_info['port'],
-                                           database=dst_db_info['database'])
+            dst_db_conn = get_db_pool(dst_db_info).checkout()
         except:
             print('Connection to destination database failed. Check parameter settings or database status.')
             return NO        
@@ -132,8 +449,8 @@ def confirm_dst_db_params_valid(dst_db_info):
             cursor.execute(sqlqry)
             schemaname = cursor.fetchone()
             cursor.close()
-            dst_db_conn.close()
-            if schemaname[0] == dst_db_info['schema']:
+            get_db_pool(dst_db_info).checkin(dst_db_conn)
+            if schemaname and schemaname[0] == dst_db_info['schema']:
                 return YES
             else:
                 print(f"Schema '{dst_db_info['schema']}' doesn't exist in the destination database.")
@@ -141,47 +458,249 @@ def confirm_dst_db_params_valid(dst_db_info):
     else:
         return YES
 
-# Create CSV data extract files.
+# Create CSV data extract files. Each table is written by a COPY TO STDOUT in CSV format
+# that streams straight to disk, with up to 'max_workers' tables extracted at a time.
+# Set 'csv_engine' to 'PANDAS' to write the files through pandas DataFrames instead.
 def create_csv_files(migration_info,src_db_info):
-    src_db_conn = psycopg2.connect(user=src_db_info['user'],
-                                   password=src_db_info['pwd'],
-                                   host=src_db_info['host'],
-                                   port=src_db_info['port'],
-                                   database=src_db_info['database'])
-    cursor = src_db_conn.cursor()
-    sqlqry = f"SELECT tablename FROM pg_catalog.pg_tables WHERE schemaname = '{src_db_info['schema']}'"
-    cursor.execute(sqlqry)
-    tablenames = cursor.fetchall()
+    if migration_info.get('csv_engine',COPY_ENGINE) == PANDAS_ENGINE:
+        create_csv_files_with_pandas(migration_info,src_db_info)
+        return
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    tables = get_migration_tables(migration_info,get_schema_metadata(src_db_conn,src_db_info)['tables'])
+    get_db_pool(src_db_info).checkin(src_db_conn)
+    print("*** CSV Extract Processing ***")
+    with ThreadPoolExecutor(max_workers=int(migration_info.get('max_workers',1))) as executor:
+        list(executor.map(lambda table: extract_table_to_csv(migration_info,src_db_info,table),tables))
+
+# Extract the data of one table to one or more CSV files over its own connection.
+def extract_table_to_csv(migration_info,src_db_info,table):
+    print(f"Extracting CSV data for '{table}' data...")
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    src_db_cursor = src_db_conn.cursor()
+    datetimestamp = datetime.datetime.now().strftime("%m%d%Y_%H%M")
+    filename = migration_info['extract_csv_dir']+os.path.sep+"pgres_extract_"+table+f"_{datetimestamp}"
+    csv_writer = CsvExtractWriter(filename,migration_info.get('csv_compression',''),
+                                  int(migration_info.get('csv_split_rows',0)),int(migration_info.get('csv_split_bytes',0)))
+    start_time = timer()
+    try:
+        row_filter = get_row_filter(migration_info,table)
+        copyqry = f"COPY (SELECT * FROM {src_db_info['schema']}.{table}" + (f" WHERE {row_filter}" if row_filter else "") + \
+                   ") TO STDOUT WITH (FORMAT csv, HEADER)"
+        src_db_cursor.copy_expert(copyqry,csv_writer)
+    except psycopg2.Error as errmsg:
+        print(f"Table '{table}' failed to extract. ERRMSG: {errmsg}".strip())
+    else:
+        MIGRATION_METRICS.record('extract',table,rows=csv_writer.total_rows,bytes_copied=csv_writer.total_bytes,
+                                 secs=timer() - start_time)
+    finally:
+        csv_writer.close()
+        src_db_cursor.close()
+        get_db_pool(src_db_info).checkin(src_db_conn)
+
+# File-like target for a COPY TO STDOUT in CSV format. psycopg2 writes one CSV row per
+# write call, the first being the header. The rows are written to a '.csv' file that is
+# optionally gzip or zstd compressed, and a new numbered part file with its own header
+# is started after split_rows rows or split_bytes bytes when either is set.
+class CsvExtractWriter:
+    def __init__(self,filename,compression,split_rows,split_bytes):
+        self.filename = filename
+        self.compression = compression
+        self.split_rows = split_rows
+        self.split_bytes = split_bytes
+        self.header = None
+        self.part_file = None
+        self.part_number = 0
+        self.part_rows = 0
+        self.part_bytes = 0
+        self.total_rows = 0
+        self.total_bytes = 0
+
+    def write(self,data):
+        if self.header is None:
+            self.header = bytes(data)
+        else:
+            if self.part_file is None or (self.split_rows and self.part_rows >= self.split_rows) or \
+               (self.split_bytes and self.part_bytes >= self.split_bytes):
+                self.open_part_file()
+            self.part_file.write(data)
+            self.part_rows += 1
+            self.part_bytes += len(data)
+            self.total_rows += 1
+            self.total_bytes += len(data)
+        return len(data)
+
+    def open_part_file(self):
+        self.close_part_file()
+        self.part_number += 1
+        filename = self.filename
+        if self.split_rows or self.split_bytes:
+            filename += f"_part{self.part_number:03d}"
+        filename += ".csv"
+        if self.compression == GZIP_COMPRESSION:
+            self.part_file = gzip.open(filename + ".gz",'wb',compresslevel=6)
+        elif self.compression == ZSTD_COMPRESSION:
+            import zstandard
+            self.part_file = zstandard.ZstdCompressor().stream_writer(open(filename + ".zst",'wb'))
+        else:
+            self.part_file = open(filename,'wb',buffering=COPY_CHUNK_SIZE)
+        self.part_file.write(self.header or b'')
+        self.part_rows = 0
+        self.part_bytes = 0
+
+    def close_part_file(self):
+        if self.part_file is not None:
+            self.part_file.close()
+            self.part_file = None
+
+    # Close the last part file; a table with no rows still gets a header-only file.
+    def close(self):
+        if self.part_number == 0 and self.header is not None:
+            self.open_part_file()
+        self.close_part_file()
+
+# Create CSV data extract files through pandas DataFrames, one batch of rows at a time.
+def create_csv_files_with_pandas(migration_info,src_db_info):
+    import pandas as pd
+    batch_size = int(migration_info.get('batch_size',STREAM_BATCH_AMT))
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    schema_metadata = get_schema_metadata(src_db_conn,src_db_info)
     print("*** CSV Extract Processing ***")
-    for table in tablenames:
-        print(f"Extracting CSV data for '{table[0]}' data...")
-        columnssqlqry = f"SELECT column_name FROM information_schema.columns WHERE table_name = '{table[0]}' ORDER BY ordinal_position"
-        cursor.execute(columnssqlqry)
-        columndata = cursor.fetchall()
-        columnnames = list(column[0] for column in columndata)
-        datasqlqry = f"SELECT * FROM {src_db_info['schema']}.{table[0]}"
-        cursor.execute(datasqlqry)
-        tabledata = cursor.fetchall()
-        dataframe = pd.DataFrame(tabledata,columns=columnnames)
+    for table in get_migration_tables(migration_info,schema_metadata['tables']):
+        print(f"Extracting CSV data for '{table}' data...")
+        columnnames = [column['column_name'] for column in schema_metadata['columns'][table]]
         datetimestamp = datetime.datetime.now().strftime("%m%d%Y_%H%M")
-        filename = migration_info['extract_csv_dir']+os.path.sep+"pgres_extract_"+table[0]+f"_{datetimestamp}.csv"
-        dataframe.to_csv(filename,encoding='utf-8',index=False)
-    cursor.close()
-    src_db_conn.close()
-
-# Perform migration of tables, table data and table constraints.
-def perform_migration(migration_info,src_db_info,dst_db_info):
-    src_db_conn = psycopg2.connect(user=src_db_info['user'],
-                                   password=src_db_info['pwd'],
-                                   host=src_db_info['host'],
-                                   port=src_db_info['port'],
-                                   database=src_db_info['database'])
-    dst_db_conn = psycopg2.connect(user=dst_db_info['user'],
-                                   password=dst_db_info['pwd'],
-                                   host=dst_db_info['host'],
-                                   port=dst_db_info['port'],
-                                   database=dst_db_info['database'])
-    tables_in_src_db,tables_in_dst_db = get_list_of_tables_in_src_and_dst_db(src_db_info,src_db_conn,dst_db_info,dst_db_conn)
+        filename = migration_info['extract_csv_dir']+os.path.sep+"pgres_extract_"+table+f"_{datetimestamp}.csv"
+        start_time = timer()
+        rowcnt = 0
+        pd.DataFrame([],columns=columnnames).to_csv(filename,encoding='utf-8',index=False)
+        for tabledata in stream_table_rows(src_db_conn,src_db_info,table,batch_size,row_filter=get_row_filter(migration_info,table)):
+            dataframe = pd.DataFrame(tabledata,columns=columnnames)
+            dataframe.to_csv(filename,mode='a',header=False,encoding='utf-8',index=False)
+            rowcnt = rowcnt + len(tabledata)
+        MIGRATION_METRICS.record('extract',table,rows=rowcnt,bytes_copied=os.path.getsize(filename),secs=timer() - start_time)
+    get_db_pool(src_db_info).checkin(src_db_conn)
+
+# Create Parquet or Arrow IPC data extract files. Each table is streamed in batches into
+# Arrow record batches typed from the catalog metadata and written compressed with
+# 'extract_compression'. Parquet files get row groups of 'row_group_size' rows.
+def create_columnar_files(migration_info,src_db_info):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    batch_size = int(migration_info.get('batch_size',STREAM_BATCH_AMT))
+    row_group_size = int(migration_info.get('row_group_size',ROW_GROUP_SIZE))
+    extract_format = migration_info.get('extract_format',CSV_FORMAT)
+    compression = migration_info.get('extract_compression','zstd')
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    schema_metadata = get_schema_metadata(src_db_conn,src_db_info)
+    print(f"*** {extract_format.title()} Extract Processing ***")
+    for table in get_migration_tables(migration_info,schema_metadata['tables']):
+        print(f"Extracting {extract_format.title()} data for '{table}' data...")
+        columns = schema_metadata['columns'][table]
+        arrow_schema = pa.schema([(column['column_name'],get_arrow_type(pa,column)) for column in columns])
+        converters = [get_arrow_converter(column) for column in columns]
+        datetimestamp = datetime.datetime.now().strftime("%m%d%Y_%H%M")
+        filename = migration_info['extract_csv_dir']+os.path.sep+"pgres_extract_"+table+f"_{datetimestamp}.{extract_format.lower()}"
+        if extract_format == PARQUET_FORMAT:
+            writer = pq.ParquetWriter(filename,arrow_schema,compression=compression)
+        else:
+            writer = pa.ipc.new_file(filename,arrow_schema,options=pa.ipc.IpcWriteOptions(compression=compression))
+        start_time = timer()
+        rowcnt = 0
+        pending_batches = []
+        pending_rows = 0
+        for tabledata in stream_table_rows(src_db_conn,src_db_info,table,batch_size,row_filter=get_row_filter(migration_info,table)):
+            rowcnt = rowcnt + len(tabledata)
+            arrays = []
+            for idx,columndata in enumerate(zip(*tabledata)):
+                if converters[idx]:
+                    columndata = [None if value is None else converters[idx](value) for value in columndata]
+                arrays.append(pa.array(columndata,type=arrow_schema.field(idx).type))
+            record_batch = pa.RecordBatch.from_arrays(arrays,schema=arrow_schema)
+            if extract_format == PARQUET_FORMAT:
+                pending_batches.append(record_batch)
+                pending_rows += record_batch.num_rows
+                if pending_rows >= row_group_size:
+                    pending_table = pa.Table.from_batches(pending_batches)
+                    while pending_table.num_rows >= row_group_size:
+                        writer.write_table(pending_table.slice(0,row_group_size),row_group_size=row_group_size)
+                        pending_table = pending_table.slice(row_group_size)
+                    pending_batches = pending_table.to_batches()
+                    pending_rows = pending_table.num_rows
+            else:
+                writer.write_batch(record_batch)
+        if pending_batches:
+            writer.write_table(pa.Table.from_batches(pending_batches),row_group_size=row_group_size)
+        writer.close()
+        MIGRATION_METRICS.record('extract',table,rows=rowcnt,bytes_copied=os.path.getsize(filename),secs=timer() - start_time)
+    get_db_pool(src_db_info).checkin(src_db_conn)
+
+# Get the Arrow type of a column from its catalog metadata. Types with no exact Arrow
+# equivalent, such as unconstrained numeric, json and network types, are kept as strings.
+def get_arrow_type(pa,column):
+    if column['udt_name'].startswith('_'):
+        return pa.list_(get_arrow_type(pa,dict(column,udt_name=column['udt_name'][1:],numeric_precision=None)))
+    arrow_types = {'bool':pa.bool_(),'int2':pa.int16(),'int4':pa.int32(),'int8':pa.int64(),
+                   'float4':pa.float32(),'float8':pa.float64(),'date':pa.date32(),
+                   'time':pa.time64('us'),'timestamp':pa.timestamp('us'),'timestamptz':pa.timestamp('us',tz='UTC'),
+                   'interval':pa.duration('us'),'bytea':pa.binary()}
+    if column['udt_name'] == 'numeric' and column['numeric_precision'] and column['numeric_precision'] <= 38:
+        return pa.decimal128(column['numeric_precision'],column['numeric_scale'])
+    return arrow_types.get(column['udt_name'],pa.string())
+
+# Get the function that converts a column's non-null values for its Arrow type, or None
+# when psycopg2 already returns values that Arrow accepts.
+def get_arrow_converter(column):
+    udt_name = column['udt_name'].lstrip('_')
+    if udt_name in ['json','jsonb']:
+        value_converter = json.dumps
+    elif udt_name in ['bool','int2','int4','int8','float4','float8','date','time','timestamp','timestamptz','interval','bytea'] or \
+         (udt_name == 'numeric' and column['numeric_precision'] and column['numeric_precision'] <= 38 and \
+          not column['udt_name'].startswith('_')):
+        return None
+    else:
+        value_converter = str
+    if column['udt_name'].startswith('_'):
+        return lambda values: [None if value is None else value_converter(value) for value in values]
+    return value_converter
+
+# Stream the rows of a table in batches through a server-side (named) cursor, so only
+# one batch of rows is held in client memory whatever the size of the table. A
+# row_filter WHERE predicate limits the rows streamed.
+def stream_table_rows(src_db_conn,src_db_info,table,batch_size=STREAM_BATCH_AMT,select_list='*',row_filter=''):
+    src_db_cursor = src_db_conn.cursor(name=f"psgres_stream_{table}")
+    src_db_cursor.itersize = batch_size
+    try:
+        src_db_cursor.execute(f"SELECT {select_list} FROM {src_db_info['schema']}.{table}" + (f" WHERE {row_filter}" if row_filter else ""))
+        while True:
+            tabledata = src_db_cursor.fetchmany(batch_size)
+            if not tabledata:
+                break
+            yield tabledata
+    finally:
+        src_db_cursor.close()
+
+# Perform migration of tables, table data and table constraints. The tables of every
+# schema job are created first, then the data of all the jobs is loaded by one shared
+# set of workers, and then each job's constraints are created.
+def perform_migration(schema_jobs):
+    job_tables = []
+    for migration_info,src_db_info,dst_db_info in schema_jobs:
+        if len(schema_jobs) > 1:
+            print(f"\n*** Schema '{src_db_info['schema']}' to '{dst_db_info['schema']}' ***")
+        job_tables.append(create_schema_tables(migration_info,src_db_info,dst_db_info))
+    load_jobs = [schema_job for schema_job,(table_list,tables_in_dst_db) in zip(schema_jobs,job_tables)
+                 if schema_job[0]['create_tables_insert_data'] == YES and table_list]
+    if load_jobs:
+        migrate_table_data(schema_jobs[0][0],load_jobs)
+    for (migration_info,src_db_info,dst_db_info),(table_list,tables_in_dst_db) in zip(schema_jobs,job_tables):
+        finish_schema_migration(migration_info,src_db_info,dst_db_info,table_list,tables_in_dst_db)
+
+# Create the tables of a schema job in the destination database and set up their load
+# tracker. Returns the tables to load and the tables that already existed.
+def create_schema_tables(migration_info,src_db_info,dst_db_info):
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    dst_db_conn = get_db_pool(dst_db_info).checkout()
+    tables_in_src_db,tables_in_dst_db = get_list_of_tables_in_src_and_dst_db(migration_info,src_db_info,src_db_conn,dst_db_info,dst_db_conn)
     table_list = []
     dst_db_cursor = dst_db_conn.cursor()
     print("*** Table Creation Processing Begin ***")
@@ -190,33 +709,553 @@ def perform_migration(migration_info,src_db_info,dst_db_info):
             print(f"Table '{table}' already exists; table creation skipped.")
             continue
         ddlqry = generate_table_ddl(src_db_conn,src_db_info,dst_db_info,table)
+        if migration_info['create_tables_insert_data'] == YES and migration_info.get('fast_load',NO) == YES:
+            ddlqry = ddlqry.replace("CREATE TABLE","CREATE UNLOGGED TABLE",1)
+        start_time = timer()
         try:
             dst_db_cursor.execute(ddlqry)
             dst_db_conn.commit()
             table_list.append(table)
             print(f"\nTable '{table}' created.")
+            MIGRATION_METRICS.record('ddl',table,secs=timer() - start_time)
         except psycopg2.Error as errmsg:
             print(f"\nTable '{table}' failed to create. ERRMSG: {errmsg}".strip())
     print("\n*** Table Creation Processing End ***")
     if migration_info['create_tables_only'] == YES:
-        create_table_constraints(src_db_info,src_db_conn,dst_db_info,dst_db_conn,table_list)
-    if migration_info['create_tables_insert_data'] == YES and table_list:
+        create_table_constraints(migration_info,src_db_info,src_db_conn,dst_db_info,table_list)
+    if migration_info['create_tables_insert_data'] == YES and \
+       migration_info.get('run_mode',FULL_RUN) == RESUME_RUN:
+        manage_load_tracker_table_in_dst_db(dst_db_info,dst_db_conn,RESUME_TABLE,table_list)
+        table_list = get_load_tracker_tables(dst_db_info,dst_db_conn)
+        reset_truncated_unlogged_tables(dst_db_info,dst_db_conn,table_list)
+    elif migration_info['create_tables_insert_data'] == YES and table_list:
         manage_load_tracker_table_in_dst_db(dst_db_info,dst_db_conn,CREATE_TABLE,table_list)
-        migrate_table_data(src_db_info,dst_db_info)
-        create_table_constraints(src_db_info,src_db_conn,dst_db_info,dst_db_conn,table_list)
-        manage_load_tracker_table_in_dst_db(dst_db_info,dst_db_conn,DROP_TABLE,[])
-    src_db_conn.close()        
     dst_db_cursor.close()
-    dst_db_conn.close()
+    get_db_pool(src_db_info).checkin(src_db_conn)
+    get_db_pool(dst_db_info).checkin(dst_db_conn)
+    return table_list,tables_in_dst_db
+
+# Finish a schema job once its data is loaded: create the constraints of its tables,
+# or report an incomplete load, and sync the tables that already existed.
+def finish_schema_migration(migration_info,src_db_info,dst_db_info,table_list,tables_in_dst_db):
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    dst_db_conn = get_db_pool(dst_db_info).checkout()
+    if migration_info['create_tables_insert_data'] == YES and table_list:
+        if get_load_tracker_tables(dst_db_info,dst_db_conn,incomplete_only=True):
+            print("\nTable loading is incomplete; constraint creation skipped. Set 'run_mode' to 'RESUME' to continue the load.")
+        else:
+            if migration_info.get('fast_load',NO) == YES:
+                set_tables_logged(migration_info,dst_db_info,table_list)
+            create_table_constraints(migration_info,src_db_info,src_db_conn,dst_db_info,table_list)
+            manage_load_tracker_table_in_dst_db(dst_db_info,dst_db_conn,DROP_TABLE,[])
+    if migration_info.get('run_mode',FULL_RUN) == SYNC_RUN and tables_in_dst_db:
+        sync_table_data(migration_info,src_db_info,dst_db_info,tables_in_dst_db)
+    get_db_pool(src_db_info).checkin(src_db_conn)
+    get_db_pool(dst_db_info).checkin(dst_db_conn)
+
+# Migrate the schema jobs with a near-zero-downtime cutover ('run_mode' 'CUTOVER'). The
+# tables are bulk loaded from the snapshot of a new logical replication slot, and then
+# the changes made in the source database since that snapshot are streamed from the
+# slot and applied to the destination database until it has caught up. If the run
+# stops while the changes are being applied, running it again continues from the slot.
+def perform_cutover(schema_jobs):
+    migration_info,src_db_info,dst_db_info = schema_jobs[0]
+    slot_name = migration_info.get('replication_slot',REPLICATION_SLOT)
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    src_db_cursor = src_db_conn.cursor()
+    src_db_cursor.execute("SELECT COUNT(*) FROM pg_catalog.pg_replication_slots WHERE slot_name = %s",(slot_name,))
+    slot_exists = src_db_cursor.fetchone()[0] == 1
+    src_db_cursor.close()
+    get_db_pool(src_db_info).checkin(src_db_conn)
+    if slot_exists:
+        print(f"Replication slot '{slot_name}' already exists; table loading skipped and the slot's changes applied.")
+    elif start_cutover_load(schema_jobs,slot_name) == NO:
+        return
+    apply_replication_changes(schema_jobs,slot_name)
+
+# Start a cutover. A publication of the tables to migrate and a pgoutput logical
+# replication slot, both named 'replication_slot', are created in the source database,
+# and the tables are loaded by perform_migration from the snapshot exported by the
+# slot, so the load holds exactly the rows committed before the slot's first change.
+# The replication connection that exported the snapshot is kept open until the load is
+# done. The applied changes log, psgres_replication_state, is then created in the
+# destination database. If the load is incomplete the slot is dropped, as its changes
+# can't be applied to partly loaded tables.
+def start_cutover_load(schema_jobs,slot_name):
+    migration_info,src_db_info,dst_db_info = schema_jobs[0]
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    src_db_cursor = src_db_conn.cursor()
+    src_db_cursor.execute("SHOW wal_level")
+    publication_tables = []
+    cutover_valid = YES
+    if src_db_cursor.fetchone()[0] != 'logical':
+        print(f"Setting 'run_mode' to '{CUTOVER_RUN}' requires the source database to run with wal_level 'logical'.")
+        cutover_valid = NO
+    for job_migration_info,job_src_db_info,job_dst_db_info in schema_jobs:
+        dst_db_conn = get_db_pool(job_dst_db_info).checkout()
+        tables_in_src_db,tables_in_dst_db = get_list_of_tables_in_src_and_dst_db(job_migration_info,job_src_db_info,src_db_conn,job_dst_db_info,dst_db_conn)
+        get_db_pool(job_dst_db_info).checkin(dst_db_conn)
+        for table in tables_in_dst_db:
+            print(f"Table '{table}' already exists in the destination database; the '{CUTOVER_RUN}' run mode only migrates new tables.")
+            cutover_valid = NO
+        for table in get_tables_without_replica_identity(src_db_conn,job_src_db_info,tables_in_src_db):
+            print(f"Table '{table}' has no primary key or replica identity, so its updates and deletes can't be replicated. "
+                  "Set its REPLICA IDENTITY to FULL or exclude it.")
+            cutover_valid = NO
+        publication_tables += [f"{job_src_db_info['schema']}.{table}" for table in tables_in_src_db]
+    if not publication_tables:
+        print("There are no tables to migrate.")
+        cutover_valid = NO
+    if cutover_valid == YES:
+        src_db_cursor.execute(f"DROP PUBLICATION IF EXISTS {slot_name}")
+        src_db_cursor.execute(f"CREATE PUBLICATION {slot_name} FOR TABLE {', '.join(publication_tables)}")
+        src_db_conn.commit()
+    src_db_cursor.close()
+    get_db_pool(src_db_info).checkin(src_db_conn)
+    if cutover_valid == NO:
+        return NO
+    repl_db_conn = psycopg2.connect(user=src_db_info['user'],
+                                    password=src_db_info['pwd'],
+                                    host=src_db_info['host'],
+                                    port=src_db_info['port'],
+                                    database=src_db_info['database'],
+                                    connection_factory=psycopg2.extras.LogicalReplicationConnection)
+    load_complete = NO
+    try:
+        repl_db_cursor = repl_db_conn.cursor()
+        repl_db_cursor.execute(f"CREATE_REPLICATION_SLOT {slot_name} LOGICAL pgoutput EXPORT_SNAPSHOT")
+        start_lsn,snapshot_id = repl_db_cursor.fetchone()[1:3]
+        print(f"Replication slot '{slot_name}' created at LSN {start_lsn}; tables are loaded from snapshot '{snapshot_id}'.")
+        perform_migration([(dict(job_migration_info,snapshot_id=snapshot_id),job_src_db_info,job_dst_db_info)
+                           for job_migration_info,job_src_db_info,job_dst_db_info in schema_jobs])
+        load_complete = confirm_cutover_load_complete(schema_jobs)
+    finally:
+        repl_db_conn.close()
+        if load_complete == NO:
+            drop_replication_slot(src_db_info,slot_name)
+    if load_complete == NO:
+        print(f"\nTable loading is incomplete; replication slot '{slot_name}' dropped. "
+              "Drop the loaded tables in the destination database and run the cutover again.")
+        return NO
+    manage_replication_state_table_in_dst_db(dst_db_info,CREATE_TABLE,slot_name,start_lsn)
+    return YES
 
-# Get list of tables in source and destination databases.
-def get_list_of_tables_in_src_and_dst_db(src_db_info,src_db_conn,dst_db_info,dst_db_conn):
+# Get the tables that have no primary key and no replica identity index or FULL replica
+# identity. Updates and deletes of such tables in a publication fail in the source database.
+def get_tables_without_replica_identity(src_db_conn,src_db_info,tables):
     src_db_cursor = src_db_conn.cursor()
-    sqlqry = f"SELECT tablename FROM pg_catalog.pg_tables WHERE schemaname = '{src_db_info['schema']}'"
+    sqlqry = "SELECT rel.relname FROM pg_catalog.pg_class rel INNER JOIN pg_catalog.pg_namespace nsp ON nsp.oid = rel.relnamespace " \
+             "WHERE nsp.nspname = %s AND rel.relname = ANY (%s) AND (rel.relreplident = 'n' OR (rel.relreplident = 'd' AND " \
+             "NOT EXISTS (SELECT 1 FROM pg_catalog.pg_constraint con WHERE con.conrelid = rel.oid AND con.contype = 'p'))) " \
+             "ORDER BY rel.relname"
+    src_db_cursor.execute(sqlqry,(src_db_info['schema'],list(tables)))
+    tables = [table[0] for table in src_db_cursor.fetchall()]
+    src_db_cursor.close()
+    src_db_conn.commit()
+    return tables
+
+# Confirm the tables of every schema job were created and loaded.
+def confirm_cutover_load_complete(schema_jobs):
+    for migration_info,src_db_info,dst_db_info in schema_jobs:
+        src_db_conn = get_db_pool(src_db_info).checkout()
+        dst_db_conn = get_db_pool(dst_db_info).checkout()
+        tables_in_src_db,tables_in_dst_db = get_list_of_tables_in_src_and_dst_db(migration_info,src_db_info,src_db_conn,dst_db_info,dst_db_conn)
+        incomplete_tables = get_load_tracker_tables(dst_db_info,dst_db_conn,incomplete_only=True)
+        get_db_pool(src_db_info).checkin(src_db_conn)
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+        if incomplete_tables or set(tables_in_src_db) - set(tables_in_dst_db):
+            return NO
+    return YES
+
+# Drop the replication slot and the publication of a cutover.
+def drop_replication_slot(src_db_info,slot_name):
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    src_db_cursor = src_db_conn.cursor()
+    src_db_cursor.execute("SELECT pg_drop_replication_slot(slot_name) FROM pg_catalog.pg_replication_slots WHERE slot_name = %s",(slot_name,))
+    src_db_cursor.execute(f"DROP PUBLICATION IF EXISTS {slot_name}")
+    src_db_conn.commit()
+    src_db_cursor.close()
+    get_db_pool(src_db_info).checkin(src_db_conn)
+
+# Manage the table in the destination database that logs the changes applied by a
+# cutover; it has a row per replication slot with the LSN the applied changes end at.
+# CREATE_TABLE starts the log at the slot's start LSN and DROP_TABLE removes it.
+def manage_replication_state_table_in_dst_db(dst_db_info,action,slot_name,start_lsn=''):
+    dst_db_conn = get_db_pool(dst_db_info).checkout()
+    dst_db_cursor = dst_db_conn.cursor()
+    if action == CREATE_TABLE:
+        sqlqry = f"CREATE TABLE IF NOT EXISTS {dst_db_info['schema']}.psgres_replication_state (slotname VARCHAR (63) PRIMARY KEY, " \
+                  "appliedlsn PG_LSN, applytime TIMESTAMP)"
+        dst_db_cursor.execute(sqlqry)
+        sqlqry = f"INSERT INTO {dst_db_info['schema']}.psgres_replication_state (slotname,appliedlsn,applytime) VALUES (%s,%s,now()) " \
+                  "ON CONFLICT (slotname) DO UPDATE SET appliedlsn = EXCLUDED.appliedlsn, applytime = EXCLUDED.applytime"
+        dst_db_cursor.execute(sqlqry,(slot_name,start_lsn))
+    if action == DROP_TABLE:
+        dst_db_cursor.execute(f"DROP TABLE IF EXISTS {dst_db_info['schema']}.psgres_replication_state")
+    dst_db_conn.commit()
+    dst_db_cursor.close()
+    get_db_pool(dst_db_info).checkin(dst_db_conn)
+
+# Get the LSN that the changes applied from a replication slot end at, from the applied
+# changes log. Returns None when there's no log for the slot.
+def get_replication_state_lsn(dst_db_info,dst_db_conn,slot_name):
+    dst_db_cursor = dst_db_conn.cursor()
+    dst_db_cursor.execute("SELECT to_regclass(%s) IS NOT NULL",(f"{dst_db_info['schema']}.psgres_replication_state",))
+    applied_lsn = None
+    if dst_db_cursor.fetchone()[0]:
+        dst_db_cursor.execute(f"SELECT appliedlsn::text FROM {dst_db_info['schema']}.psgres_replication_state WHERE slotname = %s",(slot_name,))
+        state = dst_db_cursor.fetchone()
+        applied_lsn = get_lsn_value(state[0]) if state else None
+    dst_db_cursor.close()
+    dst_db_conn.commit()
+    return applied_lsn
+
+# Apply the changes streamed from a cutover's replication slot to the destination
+# database until it has caught up with the source. Up to 'batch_size' changes, in whole
+# transactions, are read from the slot at a time and applied in one destination
+# transaction, together with the LSN they end at in psgres_replication_state; the slot
+# is then advanced past them. Transactions that end at or before the logged LSN were
+# already applied and are skipped, so no change is applied twice. Once no changes have
+# arrived for 'cutover_idle_secs' seconds the lag is zero and the slot, publication and
+# log are dropped: freeze writes on the source once the lag is small, and switch over
+# when the run finishes.
+def apply_replication_changes(schema_jobs,slot_name):
+    migration_info,src_db_info,dst_db_info = schema_jobs[0]
+    batch_size = int(migration_info.get('batch_size',STREAM_BATCH_AMT))
+    idle_secs = int(migration_info.get('cutover_idle_secs',CUTOVER_IDLE_SECS))
+    dst_schemas = {job_src_db_info['schema']:job_dst_db_info['schema'] for job_migration_info,job_src_db_info,job_dst_db_info in schema_jobs}
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    dst_db_conn = get_db_pool(dst_db_info).checkout()
+    applied_lsn = get_replication_state_lsn(dst_db_info,dst_db_conn,slot_name)
+    if applied_lsn is None:
+        print(f"Replication slot '{slot_name}' has no applied changes log in the destination database; "
+              "drop the slot with pg_drop_replication_slot to start a new cutover.")
+        get_db_pool(src_db_info).checkin(src_db_conn)
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+        return
+    src_db_cursor = src_db_conn.cursor()
+    dst_db_cursor = dst_db_conn.cursor()
+    src_db_cursor.execute("SHOW server_encoding")
+    server_encoding = src_db_cursor.fetchone()[0]
+    encoding = 'utf_8' if server_encoding == 'SQL_ASCII' else psycopg2.extensions.encodings[server_encoding]
+    text_type_oids = get_types_without_equality(src_db_conn)
+    relations = {}
+    total_changes = 0
+    total_transactions = 0
+    caught_up = False
+    start_time = timer()
+    idle_start = start_time
+    print("\n*** Change Apply Processing Begin ***")
+    try:
+        while True:
+            src_db_cursor.execute("SELECT data FROM pg_catalog.pg_logical_slot_peek_binary_changes(%s,NULL,%s,"
+                                  "'proto_version','1','publication_names',%s)",(slot_name,batch_size,slot_name))
+            messages = [bytes(message[0]) for message in src_db_cursor.fetchall()]
+            src_db_conn.commit()
+            batch_start = timer()
+            sqlqrys,end_lsn,changes,transactions = get_change_statements(dst_db_cursor,messages,relations,dst_schemas,applied_lsn,
+                                                                         encoding,text_type_oids)
+            for idx in range(0,len(sqlqrys),APPLY_STATEMENT_BATCH):
+                dst_db_cursor.execute(b";".join(sqlqrys[idx:idx + APPLY_STATEMENT_BATCH]))
+            if end_lsn > applied_lsn:
+                applied_lsn = end_lsn
+                sqlqry = f"UPDATE {dst_db_info['schema']}.psgres_replication_state SET appliedlsn = %s, applytime = now() WHERE slotname = %s"
+                dst_db_cursor.execute(sqlqry,(get_lsn_text(applied_lsn),slot_name))
+                dst_db_conn.commit()
+            if messages:
+                src_db_cursor.execute("SELECT pg_catalog.pg_replication_slot_advance(%s,%s)",(slot_name,get_lsn_text(applied_lsn)))
+            src_db_cursor.execute("SELECT pg_catalog.pg_wal_lsn_diff(pg_catalog.pg_current_wal_lsn(),confirmed_flush_lsn) "
+                                  "FROM pg_catalog.pg_replication_slots WHERE slot_name = %s",(slot_name,))
+            lag_bytes = int(src_db_cursor.fetchone()[0])
+            src_db_conn.commit()
+            if changes:
+                batch_end = timer()
+                total_changes = total_changes + changes
+                total_transactions = total_transactions + transactions
+                print(f"Apply statistics >>> Transactions: {transactions} | Changes Applied: {changes} | "
+                      f"Applied LSN: {get_lsn_text(applied_lsn)} | Lag: {get_size_text(lag_bytes)} | "
+                      f"Apply Time: {timedelta(seconds = batch_end - batch_start)}")
+                MIGRATION_METRICS.record('replicate',rows=changes,secs=batch_end - batch_start)
+                caught_up = False
+                idle_start = batch_end
+                continue
+            if not caught_up:
+                print(f"Changes caught up at LSN {get_lsn_text(applied_lsn)}; the apply finishes when no changes arrive "
+                      f"for {idle_secs} seconds.")
+                caught_up = True
+            if timer() - idle_start >= idle_secs:
+                break
+            time.sleep(1)
+    except (psycopg2.Error,UnicodeDecodeError) as errmsg:
+        dst_db_conn.rollback()
+        print(f"Changes failed to apply. ERRMSG: {errmsg}".strip())
+        print(f"Replication slot '{slot_name}' kept; run the cutover again to continue applying its changes.")
+        return
+    finally:
+        src_db_cursor.close()
+        dst_db_cursor.close()
+        get_db_pool(src_db_info).checkin(src_db_conn)
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+    print("\n*** Change Apply Processing End ***")
+    drop_replication_slot(src_db_info,slot_name)
+    manage_replication_state_table_in_dst_db(dst_db_info,DROP_TABLE,slot_name)
+    print(f"Cutover statistics >>> Transactions: {total_transactions} | Changes Applied: {total_changes} | "
+          f"Apply Time: {timedelta(seconds = timer() - start_time)}")
+    print(f"Replication slot '{slot_name}' dropped; the destination database is caught up with the source.")
+
+# Turn a batch of pgoutput (protocol version 1) messages into the SQL statements that
+# apply their changes to the destination tables. Relation messages describe a table's
+# columns and replica identity key and are kept in relations across batches. Inserts,
+# updates, deletes and truncates are applied to the table in the destination schema of
+# its source schema; updates and deletes find their row by the replica identity key, or
+# by all the old values for tables with FULL replica identity. Values come in their text
+# form and are passed as untyped literals, so the server converts them to the column
+# types; columns whose source type is in text_type_oids, types with no equality
+# operator, are matched on their text form. Transactions that end at or before
+# applied_lsn are skipped. Returns the statements, the end LSN of the last transaction
+# and the changes and transactions applied.
+def get_change_statements(dst_db_cursor,messages,relations,dst_schemas,applied_lsn,encoding,text_type_oids=frozenset()):
+    sqlqrys = []
+    transaction_sqlqrys = []
+    end_lsn = applied_lsn
+    changes = 0
+    transactions = 0
+    for message in messages:
+        message_type = message[:1]
+        if message_type == b'B':
+            transaction_sqlqrys = []
+        elif message_type == b'C':
+            end_lsn = struct.unpack_from('>Q',message,10)[0]
+            if end_lsn > applied_lsn and transaction_sqlqrys:
+                sqlqrys += transaction_sqlqrys
+                changes = changes + len(transaction_sqlqrys)
+                transactions = transactions + 1
+        elif message_type == b'R':
+            relation_id = struct.unpack_from('>I',message,1)[0]
+            schema,pos = read_pgoutput_string(message,5,encoding)
+            table,pos = read_pgoutput_string(message,pos,encoding)
+            column_count = struct.unpack_from('>h',message,pos + 1)[0]
+            pos = pos + 3
+            columns = []
+            key_columns = []
+            text_columns = []
+            for idx in range(column_count):
+                column,next_pos = read_pgoutput_string(message,pos + 1,encoding)
+                columns.append(column)
+                if message[pos] & 1:
+                    key_columns.append(column)
+                if struct.unpack_from('>I',message,next_pos)[0] in text_type_oids:
+                    text_columns.append(column)
+                pos = next_pos + 8
+            relations[relation_id] = {'table':f"{dst_schemas.get(schema,schema)}.{table}",'columns':columns,'key_columns':key_columns,
+                                      'text_columns':text_columns}
+        elif message_type in [b'I',b'U',b'D']:
+            relation = relations[struct.unpack_from('>I',message,1)[0]]
+            old_type = message[5:6]
+            old_values = new_values = None
+            pos = 5
+            if old_type in [b'K',b'O']:
+                old_values,pos = read_pgoutput_tuple(message,pos + 1,encoding)
+            if message_type != b'D':
+                new_values,pos = read_pgoutput_tuple(message,pos + 1,encoding)
+            transaction_sqlqrys.append(get_change_statement(dst_db_cursor,relation,message_type,old_type,old_values,new_values))
+        elif message_type == b'T':
+            relation_count,truncate_options = struct.unpack_from('>iB',message,1)
+            tables = [relations[relation_id]['table'] for relation_id in struct.unpack_from(f'>{relation_count}I',message,6)]
+            transaction_sqlqrys.append(f"TRUNCATE {', '.join(tables)}{' CASCADE' if truncate_options & 1 else ''}".encode())
+    return sqlqrys,end_lsn,changes,transactions
+
+# Get the SQL statement of an insert ('I'), update ('U') or delete ('D') change message.
+# With FULL replica identity ('O' old values) a table may hold identical rows, so the
+# change is applied to one row only, picked by its ctid from the rows that match.
+def get_change_statement(dst_db_cursor,relation,message_type,old_type,old_values,new_values):
+    columns = relation['columns']
+    if message_type == b'I':
+        return dst_db_cursor.mogrify(f"INSERT INTO {relation['table']} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                                     new_values)
+    if old_type == b'O':
+        key_values = [(column,value) for column,value in zip(columns,old_values) if value is not UNCHANGED_TOAST]
+    else:
+        key_values = [(column,value) for column,value in zip(columns,old_values or new_values) if column in relation['key_columns']]
+    where_clause = " AND ".join(f"{column} IS NULL" if value is None else
+                                f"{column}::text = %s" if column in relation.get('text_columns',[]) else f"{column} = %s"
+                                for column,value in key_values)
+    if old_type == b'O':
+        where_clause = f"ctid = (SELECT ctid FROM {relation['table']} WHERE {where_clause} LIMIT 1)"
+    key_params = [value for column,value in key_values if value is not None]
+    if message_type == b'D':
+        return dst_db_cursor.mogrify(f"DELETE FROM {relation['table']} WHERE {where_clause}",key_params)
+    set_values = [(column,value) for column,value in zip(columns,new_values) if value is not UNCHANGED_TOAST]
+    return dst_db_cursor.mogrify(f"UPDATE {relation['table']} SET {', '.join(f'{column} = %s' for column,value in set_values)} WHERE {where_clause}",
+                                 [value for column,value in set_values] + key_params)
+
+# Get the OIDs of the source database's types that have no default btree operator class,
+# such as json, xml and point, so their values can't be matched with '='. Domains are
+# checked on their base type and arrays on their element type; enums and ranges use
+# their shared operator classes and types implicitly binary coercible to a type with
+# one, such as varchar, use its class. Composite types are left on the list, as their fields may
+# have no equality.
+def get_types_without_equality(src_db_conn):
+    src_db_cursor = src_db_conn.cursor()
+    sqlqry = "SELECT typ.oid FROM pg_catalog.pg_type typ " \
+             "INNER JOIN pg_catalog.pg_type basetyp ON basetyp.oid = CASE WHEN typ.typtype = 'd' THEN typ.typbasetype ELSE typ.oid END " \
+             "INNER JOIN pg_catalog.pg_type eqtyp ON eqtyp.oid = " \
+             "CASE WHEN basetyp.typcategory = 'A' AND basetyp.typelem <> 0 THEN basetyp.typelem ELSE basetyp.oid END " \
+             "WHERE NOT EXISTS (SELECT 1 FROM pg_catalog.pg_opclass opc INNER JOIN pg_catalog.pg_am am ON am.oid = opc.opcmethod " \
+             "WHERE am.amname = 'btree' AND opc.opcdefault AND (opc.opcintype = CASE eqtyp.typtype WHEN 'e' THEN to_regtype('anyenum') " \
+             "WHEN 'r' THEN to_regtype('anyrange') WHEN 'm' THEN to_regtype('anymultirange') ELSE eqtyp.oid END " \
+             "OR EXISTS (SELECT 1 FROM pg_catalog.pg_cast cst WHERE cst.castsource = eqtyp.oid AND cst.casttarget = opc.opcintype " \
+             "AND cst.castmethod = 'b' AND cst.castcontext = 'i')))"
     src_db_cursor.execute(sqlqry)
-    tables_in_src_db = [table[0] for table in src_db_cursor.fetchall()]
-    table_list = ", ".join("'{x}'".format(x=table) for table in tables_in_src_db)
+    type_oids = {type_oid[0] for type_oid in src_db_cursor.fetchall()}
+    src_db_cursor.close()
+    src_db_conn.commit()
+    return type_oids
+
+# Read a null-terminated string of a pgoutput message; returns it and the position after it.
+def read_pgoutput_string(message,pos,encoding):
+    end_pos = message.index(b'\x00',pos)
+    return message[pos:end_pos].decode(encoding),end_pos + 1
+
+# Read the TupleData of a pgoutput message; returns the column values, None for nulls
+# and UNCHANGED_TOAST for TOASTed values the change didn't touch, and the position after it.
+def read_pgoutput_tuple(message,pos,encoding):
+    column_count = struct.unpack_from('>h',message,pos)[0]
+    pos = pos + 2
+    values = []
+    for idx in range(column_count):
+        value_type = message[pos:pos + 1]
+        pos = pos + 1
+        if value_type == b't':
+            value_len = struct.unpack_from('>i',message,pos)[0]
+            values.append(message[pos + 4:pos + 4 + value_len].decode(encoding))
+            pos = pos + 4 + value_len
+        else:
+            values.append(None if value_type == b'n' else UNCHANGED_TOAST)
+    return values,pos
+
+# Get the numeric value of an LSN such as '16/B374D848'.
+def get_lsn_value(lsn):
+    high,low = lsn.split('/')
+    return (int(high,16) << 32) + int(low,16)
+
+# Get the text form of a numeric LSN value.
+def get_lsn_text(lsn_value):
+    return f"{lsn_value >> 32:X}/{lsn_value & 0xFFFFFFFF:X}"
+
+# Print the execution plan of a migration without migrating anything. The sizes, row
+# estimates, row widths, integer primary keys and FK references of the source tables
+# are read in one catalog query. The plan lists the load levels, whose tables are
+# copied in parallel largest first, how each table is copied, the destination disk
+# space needed and, from the 'load' phase summaries in 'metrics_file', an estimate of
+# the load time. Row estimates come from the planner statistics (reltuples), so the
+# source tables should have been analyzed.
+def plan_migration(migration_info,src_db_info,dst_db_info):
+    max_workers = int(migration_info.get('max_workers',1))
+    load_engine = migration_info.get('load_engine',COPY_ENGINE)
+    chunk_threshold_mb = int(migration_info.get('chunk_threshold_mb',CHUNK_THRESHOLD_MB))
+    checkpoint_mb = int(migration_info.get('checkpoint_mb',CHECKPOINT_MB))
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    table_stats = get_table_plan_stats(src_db_conn,src_db_info)
+    table_stats = {table:table_stats[table] for table in get_migration_tables(migration_info,table_stats)}
+    get_db_pool(src_db_info).checkin(src_db_conn)
+    tables_in_dst_db = []
+    if all(val.strip() for val in dst_db_info.values()):
+        dst_db_conn = get_db_pool(dst_db_info).checkout()
+        dst_db_cursor = dst_db_conn.cursor()
+        dst_db_cursor.execute("SELECT tablename FROM pg_catalog.pg_tables WHERE schemaname = %s",(dst_db_info['schema'],))
+        tables_in_dst_db = [table[0] for table in dst_db_cursor.fetchall()]
+        dst_db_cursor.close()
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+    tables_to_load = [table for table in table_stats if table not in tables_in_dst_db]
+    load_levels = get_load_levels(tables_to_load,{table:set(table_stats[table]['reftables']) & set(tables_to_load) - {table}
+                                                  for table in tables_to_load})
+    print(f"\n*** Migration Plan: Schema '{src_db_info['schema']}' ***")
+    for table in [table for table in table_stats if table in tables_in_dst_db]:
+        print(f"Table '{table}' already exists; table creation and load skipped.")
+    for level,load_level in enumerate(load_levels,start=1):
+        print(f"\nLevel {level}: {len(load_level)} table(s) copied in parallel by up to {max_workers} worker(s)")
+        for table in load_level:
+            stats = table_stats[table]
+            if load_engine == COPY_ENGINE and stats['heap_bytes'] // (1024 * 1024) >= chunk_threshold_mb:
+                copy_plan = f"{max_workers * CHUNKS_PER_WORKER} chunks on '{stats['chunkcolumn'] or 'ctid'}'"
+            elif checkpoint_mb and stats['heap_bytes'] // (1024 * 1024) >= checkpoint_mb:
+                copy_plan = f"{stats['heap_bytes'] // (1024 * 1024) // checkpoint_mb + 1} {load_engine} chunks in turn " \
+                            f"on '{stats['chunkcolumn'] or 'ctid'}'"
+            else:
+                copy_plan = f"one {load_engine} stream"
+            if get_row_filter(migration_info,table):
+                copy_plan += f" WHERE {get_row_filter(migration_info,table)}"
+            print(f"Table '{table}' >>> Size: {get_size_text(stats['total_bytes'])} | "
+                  f"Rows: {stats['reltuples'] if stats['reltuples'] >= 0 else 'not analyzed'} | "
+                  f"Row Width: {stats['row_width'] or 'n/a'} bytes | Copy: {copy_plan}")
+    total_bytes = sum(table_stats[table]['total_bytes'] for table in tables_to_load)
+    total_rows = sum(max(table_stats[table]['reltuples'],0) for table in tables_to_load)
+    unanalyzed_tables = [table for table in tables_to_load if table_stats[table]['reltuples'] < 0]
+    load_rates = get_past_load_rates(migration_info.get('metrics_file',''))
+    if load_rates:
+        load_rate = sorted(load_rates)[len(load_rates) // 2]
+        load_estimate = f"{timedelta(seconds=round(total_rows / load_rate))} at {load_rate} rows/s (median of {len(load_rates)} past load(s))"
+    else:
+        load_estimate = "n/a (no 'load' phase summaries in 'metrics_file')"
+    print(f"\nPlan statistics >>> Tables: {len(tables_to_load)} | Rows: {total_rows} | "
+          f"Destination Disk Needed: {get_size_text(total_bytes)} | Estimated Load Time: {load_estimate}")
+    if migration_info['extract_csv_dir']:
+        print(f"Extract files need up to {get_size_text(sum(table_stats[table]['heap_bytes'] for table in table_stats))} "
+              f"in '{migration_info['extract_csv_dir']}' before compression.")
+    if unanalyzed_tables:
+        print(f"Tables {', '.join(unanalyzed_tables)} have no row estimates; ANALYZE them in the source database.")
+
+# Get the planning statistics of the tables in the source schema in one catalog query,
+# ordered largest first: total and heap sizes in bytes, reltuples (-1 when the table
+# was never analyzed), the average row width from pg_stats, the single-column integer
+# primary key used to chunk the table and the tables it references.
+def get_table_plan_stats(src_db_conn,src_db_info):
+    src_db_cursor = src_db_conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    sqlqry = "SELECT rel.relname,pg_total_relation_size(rel.oid) AS total_bytes,pg_relation_size(rel.oid) AS heap_bytes," \
+             "rel.reltuples::bigint AS reltuples," \
+             "(SELECT sum(st.avg_width) FROM pg_catalog.pg_stats st WHERE st.schemaname = nsp.nspname AND st.tablename = rel.relname) AS row_width," \
+             "(SELECT att.attname FROM pg_catalog.pg_constraint con INNER JOIN pg_catalog.pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = con.conkey[1] " \
+             " WHERE con.conrelid = rel.oid AND con.contype = 'p' AND array_length(con.conkey,1) = 1 " \
+             " AND att.atttypid IN ('int2'::regtype,'int4'::regtype,'int8'::regtype)) AS chunkcolumn," \
+             "ARRAY(SELECT DISTINCT ref.relname::text FROM pg_catalog.pg_constraint con INNER JOIN pg_catalog.pg_class ref ON ref.oid = con.confrelid " \
+             " WHERE con.conrelid = rel.oid AND con.contype = 'f') AS reftables " \
+             "FROM pg_catalog.pg_class rel INNER JOIN pg_catalog.pg_namespace nsp ON nsp.oid = rel.relnamespace " \
+             "WHERE nsp.nspname = %s AND rel.relkind IN ('r','p') AND NOT rel.relispartition " \
+             "ORDER BY total_bytes DESC,rel.relname"
+    src_db_cursor.execute(sqlqry,(src_db_info['schema'],))
+    table_stats = {table['relname']:table for table in src_db_cursor.fetchall()}
     src_db_cursor.close()
+    src_db_conn.commit()
+    return table_stats
+
+# Get the rows per second of the 'load' phase summaries recorded in a metrics file.
+def get_past_load_rates(metrics_file):
+    if not metrics_file or not os.path.isfile(metrics_file):
+        return []
+    load_rates = []
+    with open(metrics_file,encoding='utf-8') as file_object:
+        for line in file_object:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('summary') and entry.get('phase') == 'load' and entry.get('rows_per_sec'):
+                load_rates.append(entry['rows_per_sec'])
+    return load_rates
+
+# Format a size in bytes in the largest unit that keeps it at or above 1.
+def get_size_text(size_bytes):
+    for unit in ['bytes','KB','MB','GB']:
+        if size_bytes < 1024:
+            return f"{round(size_bytes,1)} {unit}"
+        size_bytes /= 1024
+    return f"{round(size_bytes,1)} TB"
+
+# Get list of tables to migrate in source and destination databases.
+def get_list_of_tables_in_src_and_dst_db(migration_info,src_db_info,src_db_conn,dst_db_info,dst_db_conn):
+    tables_in_src_db = get_migration_tables(migration_info,get_schema_metadata(src_db_conn,src_db_info)['tables'])
+    table_list = ", ".join("'{x}'".format(x=table) for table in tables_in_src_db)
     dst_db_cursor = dst_db_conn.cursor()
     sqlqry = f"SELECT tablename FROM pg_catalog.pg_tables WHERE schemaname = '{dst_db_info['schema']}' AND tablename IN ({table_list})"
     dst_db_cursor.execute(sqlqry)
@@ -226,14 +1265,13 @@ def get_list_of_tables_in_src_and_dst_db(src_db_info,src_db_conn,dst_db_info,dst
 
 # Generate table DDL for creating tables in destination database.
 def generate_table_ddl(src_db_conn,src_db_info,dst_db_info,table):
-    src_db_cursor = src_db_conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    sqlqry = "SELECT column_name,ordinal_position,column_default,is_nullable,data_type,udt_name,typcategory,typlen,character_maximum_length,numeric_precision,numeric_scale,datetime_precision " \
-             "FROM information_schema.columns LEFT JOIN pg_catalog.pg_type ON information_schema.columns.udt_name = pg_catalog.pg_type.typname " \
-            f"WHERE table_schema = '{src_db_info['schema']}' AND table_name = '{table}' ORDER BY ordinal_position"
-    src_db_cursor.execute(sqlqry)
-    columns = src_db_cursor.fetchall()
+    columns = get_schema_metadata(src_db_conn,src_db_info)['columns'][table]
     ddlqry = f"CREATE TABLE {dst_db_info['schema']}.{table} ("
     for column in columns:
+        if column['data_type'] in ['ARRAY','USER-DEFINED']: # Arrays and user-defined types.
+            ddlqry += f"{column['column_name']} {column['column_type']}" + "{x}".format(x=" NOT NULL" if column['is_nullable'] == "NO" else "")
+            ddlqry += ", " if column != columns[-1] else ")"
+            continue
         ddlqry += f"{column['column_name']} {column['data_type']}"
         if column['typcategory'] == "S": # Strings.
           if column['typlen'] == -1 and column['character_maximum_length']:
@@ -254,51 +1292,131 @@ def generate_table_ddl(src_db_conn,src_db_info,dst_db_info,table):
             ddlqry += ", "
         else:
             ddlqry += ")"
-    src_db_cursor.close()
     return ddlqry
 
-# Create table constraints in destination database.
-def create_table_constraints(src_db_info,src_db_conn,dst_db_info,dst_db_conn,table_list):
-    table_list = ", ".join("'{x}'".format(x=table) for table in table_list)
-    src_db_cursor = src_db_conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    sqlqry = "SELECT con.conname,con.contype,rel.relname AS tablename,pg_get_constraintdef(con.oid) AS condef " \
-             "FROM pg_catalog.pg_constraint con INNER JOIN pg_catalog.pg_class rel ON rel.oid = con.conrelid INNER JOIN pg_catalog.pg_namespace nsp ON nsp.oid = con.connamespace " \
-            f"WHERE nsp.nspname = '{src_db_info['schema']}' AND rel.relname IN ({table_list}) ORDER BY con.contype DESC"
-    src_db_cursor.execute(sqlqry)
-    constraints = src_db_cursor.fetchall()
-    dst_db_cursor = dst_db_conn.cursor()
+# Create table constraints and indexes in destination database. This runs after the
+# data load in four steps: primary key, unique, check and exclusion constraints with one
+# worker per table; indexes that don't back a constraint, all built concurrently; foreign
+# keys added as NOT VALID; and the foreign keys validated with one worker per table.
+# Up to 'max_workers' workers run at a time, each on its own connection with
+# 'maintenance_work_mem' raised for the index builds. Foreign keys that are NOT VALID in
+# the source database are left unvalidated.
+def create_table_constraints(migration_info,src_db_info,src_db_conn,dst_db_info,table_list):
+    schema_metadata = get_schema_metadata(src_db_conn,src_db_info)
+    constraint_ddl = {}
+    index_ddl = []
+    fk_ddl = []
+    validate_ddl = {}
+    for table in table_list:
+        constraints = sorted(schema_metadata['constraints'].get(table,[]),key=lambda constraint: constraint['contype'],reverse=True)
+        for constraint in constraints:
+            ddlqry = f"ALTER TABLE {dst_db_info['schema']}.{table} ADD CONSTRAINT {constraint['conname']} {constraint['condef']}"
+            if constraint['contype'] == "f":
+                ddlqry = ddlqry.replace(f"{src_db_info['schema']}.",f"{dst_db_info['schema']}.")
+                if not ddlqry.endswith(" NOT VALID"):
+                    ddlqry += " NOT VALID"
+                    validate_ddl.setdefault(table,[]).append((table,'constraint validated',
+                        f"ALTER TABLE {dst_db_info['schema']}.{table} VALIDATE CONSTRAINT {constraint['conname']}"))
+                fk_ddl.append((table,'constraint created',ddlqry))
+            else:
+                constraint_ddl.setdefault(table,[]).append((table,'constraint created',ddlqry))
+        for index in schema_metadata['indexes'].get(table,[]):
+            if not index['isconstraint']:
+                ddlqry = index['indexdef'].replace(f" ON {src_db_info['schema']}.",f" ON {dst_db_info['schema']}.",1)
+                index_ddl.append([(table,'index created',ddlqry)])
     print("\n*** Constraint Creation Processing Begin ***")
-    for constraint in constraints:
-        ddlqry = f"ALTER TABLE {dst_db_info['schema']}.{constraint['tablename']} ADD CONSTRAINT {constraint['conname']} {constraint['condef']}"
-        if constraint['contype'] == "f":
-            ddlqry = ddlqry.replace(f"{src_db_info['schema']}.",f"{dst_db_info['schema']}.")
-        try:
-            dst_db_cursor.execute(ddlqry)
-            dst_db_conn.commit()
-            print(f"\nTable {constraint['tablename']} constraint created: '{ddlqry}'")
-        except psycopg2.Error as errmsg:
-            print(f"\nTable {constraint['tablename']} constraint failed: '{ddlqry}' ERRMSG: {errmsg}".strip())
+    execute_ddl_in_parallel(migration_info,dst_db_info,list(constraint_ddl.values()))
+    execute_ddl_in_parallel(migration_info,dst_db_info,index_ddl)
+    execute_ddl_in_parallel(migration_info,dst_db_info,[fk_ddl])
+    execute_ddl_in_parallel(migration_info,dst_db_info,list(validate_ddl.values()))
     print("\n*** Constraint Creation Processing End ***")
-    src_db_cursor.close()
+
+# Execute groups of DDL statements in the destination database with up to 'max_workers'
+# groups at a time. The statements of a group run in order on one connection, so DDL
+# that locks the same table goes in the same group.
+def execute_ddl_in_parallel(migration_info,dst_db_info,ddl_groups):
+    maintenance_work_mem = migration_info.get('maintenance_work_mem',MAINTENANCE_WORK_MEM)
+    def execute_ddl_group(ddl_group):
+        dst_db_conn = get_db_pool(dst_db_info).checkout()
+        dst_db_cursor = dst_db_conn.cursor()
+        dst_db_cursor.execute("SELECT set_config('maintenance_work_mem',%s,false)",(maintenance_work_mem,))
+        dst_db_conn.commit()
+        for table,action,ddlqry in ddl_group:
+            start_time = timer()
+            try:
+                dst_db_cursor.execute(ddlqry)
+                dst_db_conn.commit()
+                print(f"\nTable {table} {action}: '{ddlqry}'")
+                MIGRATION_METRICS.record('constraints',table,secs=timer() - start_time)
+            except psycopg2.Error as errmsg:
+                dst_db_conn.rollback()
+                print(f"\nTable {table} {action.split()[0]} failed: '{ddlqry}' ERRMSG: {errmsg}".strip())
+        dst_db_cursor.close()
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+    with ThreadPoolExecutor(max_workers=int(migration_info.get('max_workers',1))) as executor:
+        list(executor.map(execute_ddl_group,[ddl_group for ddl_group in ddl_groups if ddl_group]))
+
+# Switch the tables of a fast load from UNLOGGED to LOGGED, up to 'max_workers' tables at
+# a time. This runs before the constraints are created, as a logged table can't have a
+# foreign key to an unlogged one. Each table is rewritten once and, unless the server
+# runs with wal_level 'minimal', written to the WAL in one pass.
+def set_tables_logged(migration_info,dst_db_info,table_list):
+    print("\n*** Table Logging Processing Begin ***")
+    execute_ddl_in_parallel(migration_info,dst_db_info,[[(table,'logging enabled',f"ALTER TABLE {dst_db_info['schema']}.{table} SET LOGGED")]
+                                                        for table in table_list])
+    print("\n*** Table Logging Processing End ***")
+
+# Tune a destination session for loading when 'fast_load' is set: commits don't wait for
+# the WAL flush, and sorts and maintenance get 'load_work_mem' and 'maintenance_work_mem'.
+def set_load_session(migration_info,dst_db_conn):
+    if migration_info.get('fast_load',NO) == NO:
+        return
+    dst_db_cursor = dst_db_conn.cursor()
+    dst_db_cursor.execute("SELECT set_config('synchronous_commit','off',false),set_config('work_mem',%s,false),"
+                          "set_config('maintenance_work_mem',%s,false)",
+                          (migration_info.get('load_work_mem',LOAD_WORK_MEM),migration_info.get('maintenance_work_mem',MAINTENANCE_WORK_MEM)))
+    dst_db_conn.commit()
     dst_db_cursor.close()
 
-# Manage the table in the destination database that's used by the load data process to load the tables being migrated. 
+# Analyze a table once its load finishes when 'fast_load' is set, so the destination has
+# planner statistics straight away. Tables are analyzed by the workers that loaded them.
+def analyze_loaded_table(migration_info,dst_db_info,dst_db_conn,table):
+    if migration_info.get('fast_load',NO) == NO:
+        return
+    dst_db_cursor = dst_db_conn.cursor()
+    start_time = timer()
+    try:
+        dst_db_cursor.execute(f"ANALYZE {dst_db_info['schema']}.{table}")
+        dst_db_conn.commit()
+        MIGRATION_METRICS.record('analyze',table,secs=timer() - start_time)
+    except psycopg2.Error as errmsg:
+        dst_db_conn.rollback()
+        print(f"Table '{table}' failed to analyze. ERRMSG: {errmsg}".strip())
+    finally:
+        dst_db_cursor.close()
+
+# Manage the table in the destination database that's used by the load data process to load the tables being migrated.
+# The table is also the checkpoint log of the load; it has a row for every table, or for
+# every key range chunk of a chunked table, with the rows copied, status and timestamps.
+# CREATE_TABLE starts a new log, RESUME_TABLE keeps the existing log and adds any tables
+# missing from it, and DROP_TABLE removes the log once every table has been loaded.
 def manage_load_tracker_table_in_dst_db(dst_db_info,dst_db_conn,action,tables):
     dst_db_cursor = dst_db_conn.cursor()
-    if action == CREATE_TABLE:
+    if action in [CREATE_TABLE,RESUME_TABLE]:
         sqlqry = f"SELECT COUNT(*) FROM pg_catalog.pg_tables WHERE schemaname = '{dst_db_info['schema']}' AND tablename = 'psgres_load_tables'"
         dst_db_cursor.execute(sqlqry)
         the_count = dst_db_cursor.fetchone()
-        if the_count[0] == 0:
-            sqlqry = f"CREATE TABLE {dst_db_info['schema']}.psgres_load_tables (tablename VARCHAR (50))"
+        if the_count[0] == 1 and action == CREATE_TABLE:
+            sqlqry = f"DROP TABLE {dst_db_info['schema']}.psgres_load_tables"
             dst_db_cursor.execute(sqlqry)
-            dst_db_conn.commit()
-        else:
-            sqlqry = f"DELETE FROM {dst_db_info['schema']}.psgres_load_tables"
+        if the_count[0] == 0 or action == CREATE_TABLE:
+            sqlqry = f"CREATE TABLE {dst_db_info['schema']}.psgres_load_tables (tablename VARCHAR (63), chunkid INTEGER, " \
+                      "chunkcolumn VARCHAR (63), lowerkey BIGINT, upperkey BIGINT, rowscopied BIGINT, status VARCHAR (10), " \
+                      "starttime TIMESTAMP, endtime TIMESTAMP, PRIMARY KEY (tablename, chunkid))"
             dst_db_cursor.execute(sqlqry)
-            dst_db_conn.commit()
-        sqlqry = f"INSERT INTO {dst_db_info['schema']}.psgres_load_tables (tablename) VALUES (%s)"
-        tables = tuple([table] for table in tables)
+        sqlqry = f"INSERT INTO {dst_db_info['schema']}.psgres_load_tables (tablename,chunkid,rowscopied,status) " \
+                  "VALUES (%s,0,0,%s) ON CONFLICT DO NOTHING"
+        tables = tuple([table,LOAD_PENDING] for table in tables)
         dst_db_cursor.executemany(sqlqry,tables)
         dst_db_conn.commit()
     if action == DROP_TABLE:
@@ -307,66 +1425,1341 @@ def manage_load_tracker_table_in_dst_db(dst_db_info,dst_db_conn,action,tables):
         dst_db_conn.commit()
     dst_db_cursor.close()
 
-# Migrate table data.
-def migrate_table_data(src_db_info,dst_db_info):
-    src_db_conn = psycopg2.connect(user=src_db_info['user'],
-                                   password=src_db_info['pwd'],
-                                   host=src_db_info['host'],
-                                   port=src_db_info['port'],
-                                   database=src_db_info['database'])
-    src_db_cursor = src_db_conn.cursor()
-    dst_db_url = f"postgresql://{dst_db_info['user']}:{dst_db_info['pwd']}@{dst_db_info['host']}:{dst_db_info['port']}/{dst_db_info['database']}"
-    dst_db_engine = create_engine(dst_db_url)
-    dst_db_conn = dst_db_engine.connect()
-    sqlqry = f"SELECT tablename FROM {dst_db_info['schema']}.psgres_load_tables"
-    tables_to_load = dst_db_conn.execute(sqlqry)
+# Get the tables in the load tracker table, or only those with chunks not yet loaded.
+# Returns an empty list when there is no load tracker table.
+def get_load_tracker_tables(dst_db_info,dst_db_conn,incomplete_only=False):
+    dst_db_cursor = dst_db_conn.cursor()
+    sqlqry = f"SELECT COUNT(*) FROM pg_catalog.pg_tables WHERE schemaname = '{dst_db_info['schema']}' AND tablename = 'psgres_load_tables'"
+    dst_db_cursor.execute(sqlqry)
+    if dst_db_cursor.fetchone()[0] == 0:
+        dst_db_cursor.close()
+        return []
+    sqlqry = f"SELECT DISTINCT tablename FROM {dst_db_info['schema']}.psgres_load_tables" + \
+             (f" WHERE status <> '{LOAD_COMPLETE}'" if incomplete_only else "")
+    dst_db_cursor.execute(sqlqry)
+    tables = [table[0] for table in dst_db_cursor.fetchall()]
+    dst_db_cursor.close()
+    dst_db_conn.commit()
+    return tables
+
+# Get the checkpoint rows of a table from the load tracker table, ordered by chunk.
+def get_load_tracker_chunks(dst_db_info,dst_db_conn,table):
+    dst_db_cursor = dst_db_conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+    sqlqry = "SELECT chunkid,chunkcolumn,lowerkey,upperkey,status " \
+            f"FROM {dst_db_info['schema']}.psgres_load_tables WHERE tablename = %s ORDER BY chunkid"
+    dst_db_cursor.execute(sqlqry,(table,))
+    chunks = dst_db_cursor.fetchall()
+    dst_db_cursor.close()
+    dst_db_conn.commit()
+    return chunks
+
+# Record the status of a table chunk in the load tracker table. The caller commits, so a
+# LOAD_COMPLETE checkpoint is committed in the same transaction as the chunk's data.
+def update_load_tracker_chunk(dst_db_info,dst_db_conn,table,chunk_id,status,rowcnt=0):
+    dst_db_cursor = dst_db_conn.cursor()
+    if status == LOAD_RUNNING:
+        sqlqry = f"UPDATE {dst_db_info['schema']}.psgres_load_tables SET status = %s, starttime = now(), endtime = NULL " \
+                  "WHERE tablename = %s AND chunkid = %s"
+        dst_db_cursor.execute(sqlqry,(status,table,chunk_id))
+    else:
+        sqlqry = f"UPDATE {dst_db_info['schema']}.psgres_load_tables SET status = %s, rowscopied = %s, endtime = now() " \
+                  "WHERE tablename = %s AND chunkid = %s"
+        dst_db_cursor.execute(sqlqry,(status,rowcnt,table,chunk_id))
+    dst_db_cursor.close()
+
+# Mark a chunk as failed after its transaction has been rolled back. A failure to
+# record it is ignored; the chunk is not complete either way and is loaded on resume.
+def record_failed_chunk(dst_db_info,dst_db_conn,table,chunk_id):
+    if chunk_id is None:
+        return
+    try:
+        update_load_tracker_chunk(dst_db_info,dst_db_conn,table,chunk_id,LOAD_FAILED)
+        dst_db_conn.commit()
+    except psycopg2.Error:
+        pass
+
+# Put the loaded chunks of UNLOGGED tables that are now empty back to pending. A server
+# crash truncates unlogged tables, so the checkpoints of a fast load can outlive its data.
+def reset_truncated_unlogged_tables(dst_db_info,dst_db_conn,tables):
+    dst_db_cursor = dst_db_conn.cursor()
+    sqlqry = "SELECT rel.relname FROM pg_catalog.pg_class rel INNER JOIN pg_catalog.pg_namespace nsp ON nsp.oid = rel.relnamespace " \
+             "WHERE nsp.nspname = %s AND rel.relname = ANY (%s) AND rel.relpersistence = 'u'"
+    dst_db_cursor.execute(sqlqry,(dst_db_info['schema'],list(tables)))
+    for table in [table[0] for table in dst_db_cursor.fetchall()]:
+        dst_db_cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {dst_db_info['schema']}.{table})")
+        if dst_db_cursor.fetchone()[0]:
+            continue
+        sqlqry = f"UPDATE {dst_db_info['schema']}.psgres_load_tables SET status = %s, rowscopied = 0 " \
+                  "WHERE tablename = %s AND status = %s AND rowscopied > 0"
+        dst_db_cursor.execute(sqlqry,(LOAD_PENDING,table,LOAD_COMPLETE))
+        if dst_db_cursor.rowcount:
+            print(f"Table '{table}' was emptied by a server restart; its loaded chunks will be loaded again.")
+    dst_db_conn.commit()
+    dst_db_cursor.close()
+
+# Replace the single checkpoint row of a table with one row per key range chunk.
+def add_load_tracker_chunks(dst_db_info,dst_db_conn,table,chunk_column,chunk_bounds):
+    dst_db_cursor = dst_db_conn.cursor()
+    sqlqry = f"DELETE FROM {dst_db_info['schema']}.psgres_load_tables WHERE tablename = %s"
+    dst_db_cursor.execute(sqlqry,(table,))
+    sqlqry = f"INSERT INTO {dst_db_info['schema']}.psgres_load_tables (tablename,chunkid,chunkcolumn,lowerkey,upperkey,rowscopied,status) " \
+              "VALUES (%s,%s,%s,%s,%s,0,%s)"
+    dst_db_cursor.executemany(sqlqry,[(table,chunk_id,chunk_column,lower_key,upper_key,LOAD_PENDING)
+                                      for chunk_id,(lower_key,upper_key) in enumerate(chunk_bounds,start=1)])
+    dst_db_conn.commit()
+    dst_db_cursor.close()
+
+# Migrate table data of the schema jobs. Tables are loaded in FK dependency order, one
+# level of the FK graph at a time; the tables of a level, from all the jobs, are loaded
+# largest first by up to 'max_workers' parallel workers.
+def migrate_table_data(migration_info,schema_jobs):
+    max_workers = int(migration_info.get('max_workers',1))
+    load_levels = []
+    schema_metadata = {}
+    for job_migration_info,src_db_info,dst_db_info in schema_jobs:
+        src_db_conn = get_db_pool(src_db_info).checkout()
+        dst_db_conn = get_db_pool(dst_db_info).checkout()
+        dst_db_cursor = dst_db_conn.cursor()
+        sqlqry = f"SELECT DISTINCT tablename FROM {dst_db_info['schema']}.psgres_load_tables"
+        dst_db_cursor.execute(sqlqry)
+        tables_to_load = [table[0] for table in dst_db_cursor.fetchall()]
+        dst_db_cursor.close()
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+        for idx,load_level in enumerate(get_table_load_order(src_db_info,src_db_conn,tables_to_load)):
+            if idx == len(load_levels):
+                load_levels.append([])
+            load_levels[idx] += [(job_migration_info,src_db_info,dst_db_info,table) for table in load_level]
+        schema_metadata[src_db_info['schema']] = get_schema_metadata(src_db_conn,src_db_info)
+        get_db_pool(src_db_info).checkin(src_db_conn)
+    for load_level in load_levels:
+        load_level.sort(key=lambda load_task: -schema_metadata[load_task[1]['schema']]['table_bytes'].get(load_task[3],0))
+    if migration_info.get('load_engine',COPY_ENGINE) == ASYNC_ENGINE:
+        print("\n*** Table Loading Processing Begin ***")
+        import asyncio
+        asyncio.run(migrate_table_data_async(migration_info,schema_jobs[0][1],schema_jobs[0][2],schema_metadata,load_levels))
+        print("\n*** Table Loading Processing End ***")
+        return
     print("\n*** Table Loading Processing Begin ***")
-    for table in tables_to_load:
-        print(f"\nLoading '{table[0]}' table...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for load_level in load_levels:
+            list(executor.map(lambda load_task: load_table_data(*load_task),load_level))
+    print("\n*** Table Loading Processing End ***")
+
+# Load the data of one table. Each call checks out its own source and destination
+# connections so tables can be loaded by parallel workers. In a cutover the source
+# rows are read from the replication slot's snapshot, 'snapshot_id'.
+def load_table_data(migration_info,src_db_info,dst_db_info,table):
+    insert_engine = migration_info.get('load_engine',COPY_ENGINE) == INSERT_ENGINE
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    dst_db_conn = get_db_pool(dst_db_info).checkout()
+    chunks = get_load_tracker_chunks(dst_db_info,dst_db_conn,table)
+    if all(chunk['status'] == LOAD_COMPLETE for chunk in chunks):
+        print(f"\nTable '{table}' already loaded; table load skipped.")
+        get_db_pool(src_db_info).checkin(src_db_conn)
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+        return
+    print(f"\nLoading '{table}' table...")
+    start_time = timer()
+    try:
+        set_load_session(migration_info,dst_db_conn)
+        chunk_count,chunk_workers = get_table_chunk_plan(migration_info,src_db_conn,src_db_info,table,chunks)
+        if chunk_count:
+            rowcnt = copy_table_data_in_chunks(migration_info,src_db_conn,src_db_info,dst_db_info,dst_db_conn,table,chunks,
+                                               chunk_count,chunk_workers)
+        else:
+            update_load_tracker_chunk(dst_db_info,dst_db_conn,table,0,LOAD_RUNNING)
+            dst_db_conn.commit()
+            if migration_info.get('snapshot_id'):
+                set_src_snapshot(src_db_conn,migration_info['snapshot_id'])
+            if insert_engine:
+                rowcnt = insert_table_data(src_db_conn,src_db_info,dst_db_conn,dst_db_info,table,
+                                           int(migration_info.get('batch_size',BULK_INSERT_AMT)),0,get_row_filter(migration_info,table))
+            else:
+                rowcnt = copy_table_data(src_db_conn,src_db_info,dst_db_conn,dst_db_info,table,
+                                         migration_info.get('copy_format',COPY_FORMAT_BINARY),get_row_filter(migration_info,table),0)
+    except (psycopg2.Error,IOError) as errmsg:
+        print(f"Table '{table}' failed to load. ERRMSG: {errmsg}".strip())
+    else:
+        end_time = timer()
+        elapsed_time = timedelta(seconds = end_time - start_time)
+        print(f"Load statistics for '{table}' table >>> Records Loaded: {rowcnt} | Load Time: {elapsed_time}")
+        MIGRATION_METRICS.record('load',table,rows=rowcnt,secs=end_time - start_time)
+        analyze_loaded_table(migration_info,dst_db_info,dst_db_conn,table)
+    finally:
+        get_db_pool(src_db_info).checkin(src_db_conn)
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+
+# Get the number of chunks a table is loaded in and the number of workers that load
+# them; (0,0) when the table is loaded in a single stream. Tables of
+# 'chunk_threshold_mb' megabytes or more are copied in chunks by up to 'max_workers'
+# parallel workers. Smaller tables of 'checkpoint_mb' megabytes or more, with any load
+# engine, are loaded in chunks of about 'checkpoint_mb' one after another, each
+# committed with its checkpoint, so a resumed load continues after the last chunk
+# loaded instead of starting the table over. A resumed table keeps its saved chunks.
+def get_table_chunk_plan(migration_info,src_db_conn,src_db_info,table,chunks):
+    max_workers = int(migration_info.get('max_workers',1))
+    if len(chunks) > 1:
+        return len(chunks),max_workers
+    size_mb = get_table_size_mb(src_db_conn,src_db_info,table)
+    checkpoint_mb = int(migration_info.get('checkpoint_mb',CHECKPOINT_MB))
+    if migration_info.get('load_engine',COPY_ENGINE) != INSERT_ENGINE and \
+       size_mb >= int(migration_info.get('chunk_threshold_mb',CHUNK_THRESHOLD_MB)):
+        return max_workers * CHUNKS_PER_WORKER,max_workers
+    if checkpoint_mb and size_mb >= checkpoint_mb:
+        return size_mb // checkpoint_mb + 1,1
+    return 0,0
+
+# Migrate table data with the asyncio engine. The FK graph levels are loaded in order,
+# with up to 'max_workers' tables of a level loaded concurrently on the event loop over
+# asyncpg pools of 'max_workers' connections per database. Each level is a list of
+# (migration_info,src_db_info,dst_db_info,table) load tasks and schema_metadata maps
+# source schemas to their catalog metadata.
+async def migrate_table_data_async(migration_info,src_db_info,dst_db_info,schema_metadata,load_levels):
+    import asyncio
+    import asyncpg
+    max_workers = int(migration_info.get('max_workers',1))
+    server_settings = {'statement_timeout':migration_info.get('statement_timeout',STATEMENT_TIMEOUT)}
+    dst_server_settings = dict(server_settings)
+    if migration_info.get('fast_load',NO) == YES:
+        dst_server_settings.update({'synchronous_commit':'off',
+                                    'work_mem':migration_info.get('load_work_mem',LOAD_WORK_MEM),
+                                    'maintenance_work_mem':migration_info.get('maintenance_work_mem',MAINTENANCE_WORK_MEM)})
+    src_db_pool = await asyncpg.create_pool(user=src_db_info['user'],
+                                            password=src_db_info['pwd'],
+                                            host=src_db_info['host'],
+                                            port=int(src_db_info['port']),
+                                            database=src_db_info['database'],
+                                            min_size=0,max_size=max_workers,server_settings=server_settings)
+    dst_db_pool = await asyncpg.create_pool(user=dst_db_info['user'],
+                                            password=dst_db_info['pwd'],
+                                            host=dst_db_info['host'],
+                                            port=int(dst_db_info['port']),
+                                            database=dst_db_info['database'],
+                                            min_size=0,max_size=max_workers,server_settings=dst_server_settings)
+    try:
+        for load_level in load_levels:
+            await asyncio.gather(*[load_table_data_async(job_migration_info,job_src_db_info,src_db_pool,job_dst_db_info,dst_db_pool,
+                                                         schema_metadata[job_src_db_info['schema']],table)
+                                   for job_migration_info,job_src_db_info,job_dst_db_info,table in load_level])
+    finally:
+        await src_db_pool.close()
+        await dst_db_pool.close()
+
+# Load the data of one table with the asyncio engine over connections from the pools.
+# The chunks left to load are read in one REPEATABLE READ source transaction, so a
+# table resumed from a chunked load is still copied from a single snapshot; in a
+# cutover, the transaction imports the replication slot's snapshot.
+async def load_table_data_async(migration_info,src_db_info,src_db_pool,dst_db_info,dst_db_pool,schema_metadata,table):
+    import asyncpg
+    async with src_db_pool.acquire() as src_db_conn, dst_db_pool.acquire() as dst_db_conn:
+        try:
+            sqlqry = f"SELECT chunkid,chunkcolumn,lowerkey,upperkey,status FROM {dst_db_info['schema']}.psgres_load_tables " \
+                      "WHERE tablename = $1 ORDER BY chunkid"
+            chunks = await dst_db_conn.fetch(sqlqry,table)
+            if all(chunk['status'] == LOAD_COMPLETE for chunk in chunks):
+                print(f"\nTable '{table}' already loaded; table load skipped.")
+                return
+            print(f"\nLoading '{table}' table...")
+            start_time = timer()
+            rowcnt = 0
+            async with src_db_conn.transaction(isolation='repeatable_read',readonly=True):
+                if migration_info.get('snapshot_id'):
+                    await src_db_conn.execute(f"SET TRANSACTION SNAPSHOT '{migration_info['snapshot_id']}'")
+                if len(chunks) == 1:
+                    chunks = await add_table_chunks_async(migration_info,src_db_conn,src_db_info,dst_db_conn,dst_db_info,
+                                                          schema_metadata,table,chunks)
+                for chunk in chunks:
+                    if chunk['status'] == LOAD_COMPLETE:
+                        continue
+                    chunk_filter = get_chunk_filter(chunk['chunkcolumn'],chunk['lowerkey'],chunk['upperkey']) if chunk['chunkcolumn'] else ''
+                    chunk_filter = get_row_filter(migration_info,table,chunk_filter)
+                    rowcnt = rowcnt + await copy_table_data_async(migration_info,src_db_conn,src_db_info,dst_db_conn,dst_db_info,
+                                                                  schema_metadata,table,chunk_filter,chunk['chunkid'])
+        except (asyncpg.PostgresError,asyncpg.InterfaceError,OSError) as errmsg:
+            print(f"Table '{table}' failed to load. ERRMSG: {errmsg}".strip())
+        else:
+            end_time = timer()
+            elapsed_time = timedelta(seconds = end_time - start_time)
+            print(f"Load statistics for '{table}' table >>> Records Loaded: {rowcnt} | Load Time: {elapsed_time}")
+            MIGRATION_METRICS.record('load',table,rows=rowcnt,secs=end_time - start_time)
+            if migration_info.get('fast_load',NO) == YES:
+                analyze_start = timer()
+                try:
+                    await dst_db_conn.execute(f"ANALYZE {dst_db_info['schema']}.{table}")
+                    MIGRATION_METRICS.record('analyze',table,secs=timer() - analyze_start)
+                except asyncpg.PostgresError as errmsg:
+                    print(f"Table '{table}' failed to analyze. ERRMSG: {errmsg}".strip())
+
+# Split a table of 'checkpoint_mb' megabytes or more into chunks of about 'checkpoint_mb'
+# for the asyncio engine, which loads them one after another, and replace the table's
+# checkpoint row with one row per chunk. The key ranges are read in the source
+# transaction's snapshot. Returns the chunks to load.
+async def add_table_chunks_async(migration_info,src_db_conn,src_db_info,dst_db_conn,dst_db_info,schema_metadata,table,chunks):
+    checkpoint_mb = int(migration_info.get('checkpoint_mb',CHECKPOINT_MB))
+    size_mb = await src_db_conn.fetchval(f"SELECT pg_relation_size('{src_db_info['schema']}.{table}') / (1024 * 1024)")
+    if not checkpoint_mb or size_mb < checkpoint_mb:
+        return chunks
+    chunk_count = size_mb // checkpoint_mb + 1
+    chunk_column = get_table_integer_pk(schema_metadata,table)
+    key_bounds = None
+    if chunk_column:
+        key_bounds = await src_db_conn.fetchrow(f"SELECT MIN({chunk_column}),MAX({chunk_column}) FROM {src_db_info['schema']}.{table}")
+    if key_bounds and key_bounds[0] is not None:
+        chunk_bounds = get_chunk_bounds(key_bounds[0],key_bounds[1] + 1,chunk_count)
+    else:
+        page_count = await src_db_conn.fetchval(f"SELECT pg_relation_size('{src_db_info['schema']}.{table}') / current_setting('block_size')::int")
+        chunk_column,chunk_bounds = 'ctid',get_chunk_bounds(0,max(page_count,1),chunk_count)
+    async with dst_db_conn.transaction():
+        await dst_db_conn.execute(f"DELETE FROM {dst_db_info['schema']}.psgres_load_tables WHERE tablename = $1",table)
+        sqlqry = f"INSERT INTO {dst_db_info['schema']}.psgres_load_tables (tablename,chunkid,chunkcolumn,lowerkey,upperkey,rowscopied,status) " \
+                  "VALUES ($1,$2,$3,$4,$5,0,$6)"
+        await dst_db_conn.executemany(sqlqry,[(table,chunk_id,chunk_column,lower_key,upper_key,LOAD_PENDING)
+                                              for chunk_id,(lower_key,upper_key) in enumerate(chunk_bounds,start=1)])
+    print(f"Table '{table}' split into {len(chunk_bounds)} chunks.")
+    sqlqry = f"SELECT chunkid,chunkcolumn,lowerkey,upperkey,status FROM {dst_db_info['schema']}.psgres_load_tables " \
+              "WHERE tablename = $1 ORDER BY chunkid"
+    return await dst_db_conn.fetch(sqlqry,table)
+
+# Copy the rows of a table, or of one chunk of it, with overlapped I/O: a producer task
+# streams the source COPY TO STDOUT data into a bounded queue while the consumer feeds
+# the data already read to the destination COPY FROM STDIN. The data is passed through
+# untouched in the table's COPY format, so no values are decoded in Python. The queue
+# holds at most COPY_BUFFER_CHUNKS chunks, so a slow destination holds back the source
+# reads. The chunk's data and its LOAD_COMPLETE checkpoint are committed in one transaction.
+async def copy_table_data_async(migration_info,src_db_conn,src_db_info,dst_db_conn,dst_db_info,schema_metadata,table,chunk_filter,chunk_id):
+    import asyncio
+    import asyncpg
+    copy_format = get_table_copy_format(schema_metadata,table,migration_info.get('copy_format',COPY_FORMAT_BINARY)).lower()
+    sqlqry = f"SELECT * FROM {src_db_info['schema']}.{table}" + (f" WHERE {chunk_filter}" if chunk_filter else "")
+    data_queue = asyncio.Queue(maxsize=COPY_BUFFER_CHUNKS)
+    copy_stats = {'bytes':0,'src_wait':0.0,'dst_wait':0.0,'batch_latencies':[]}
+    async def put_data(data):
+        put_start = timer()
+        await data_queue.put(bytes(data))
+        copy_stats['dst_wait'] += timer() - put_start
+    async def produce_data():
+        try:
+            await src_db_conn.copy_from_query(sqlqry,output=put_data,format=copy_format)
+        finally:
+            await data_queue.put(None)
+    async def consume_data():
+        while True:
+            get_start = timer()
+            data = await data_queue.get()
+            copy_stats['src_wait'] += timer() - get_start
+            if data is None:
+                return
+            copy_stats['bytes'] += len(data)
+            write_start = timer()
+            yield data
+            copy_stats['batch_latencies'].append(timer() - write_start)
+    await update_load_tracker_chunk_async(dst_db_info,dst_db_conn,table,chunk_id,LOAD_RUNNING)
+    start_time = timer()
+    producer = asyncio.create_task(produce_data())
+    dst_transaction = dst_db_conn.transaction()
+    await dst_transaction.start()
+    try:
+        copy_status = await dst_db_conn.copy_to_table(table,source=consume_data(),schema_name=dst_db_info['schema'],format=copy_format)
+        await producer
+        rowcnt = int(copy_status.split()[-1])
+        await update_load_tracker_chunk_async(dst_db_info,dst_db_conn,table,chunk_id,LOAD_COMPLETE,rowcnt)
+    except BaseException:
+        producer.cancel()
+        await dst_transaction.rollback()
+        try:
+            await update_load_tracker_chunk_async(dst_db_info,dst_db_conn,table,chunk_id,LOAD_FAILED)
+        except asyncpg.PostgresError:
+            pass
+        raise
+    await dst_transaction.commit()
+    MIGRATION_METRICS.record('transfer',table,chunk_id,rows=rowcnt,bytes_copied=copy_stats['bytes'],secs=timer() - start_time,
+                             batch_latencies=copy_stats['batch_latencies'],src_wait_secs=copy_stats['src_wait'],
+                             dst_wait_secs=copy_stats['dst_wait'])
+    return rowcnt
+
+# Record the status of a table chunk in the load tracker table over an asyncpg connection.
+async def update_load_tracker_chunk_async(dst_db_info,dst_db_conn,table,chunk_id,status,rowcnt=0):
+    if status == LOAD_RUNNING:
+        sqlqry = f"UPDATE {dst_db_info['schema']}.psgres_load_tables SET status = $1, starttime = now(), endtime = NULL " \
+                  "WHERE tablename = $2 AND chunkid = $3"
+        await dst_db_conn.execute(sqlqry,status,table,chunk_id)
+    else:
+        sqlqry = f"UPDATE {dst_db_info['schema']}.psgres_load_tables SET status = $1, rowscopied = $2, endtime = now() " \
+                  "WHERE tablename = $3 AND chunkid = $4"
+        await dst_db_conn.execute(sqlqry,status,rowcnt,table,chunk_id)
+
+# Sync the data of tables that exist in both databases by copying only the rows that
+# changed since the last sync. Tables are synced in FK dependency order, with up to
+# 'max_workers' tables of a level synced in parallel.
+def sync_table_data(migration_info,src_db_info,dst_db_info,tables):
+    max_workers = int(migration_info.get('max_workers',1))
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    sync_levels = get_table_load_order(src_db_info,src_db_conn,tables)
+    get_db_pool(src_db_info).checkin(src_db_conn)
+    print("\n*** Table Sync Processing Begin ***")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for sync_level in sync_levels:
+            list(executor.map(lambda table: sync_table_delta(migration_info,src_db_info,dst_db_info,table),sync_level))
+    print("\n*** Table Sync Processing End ***")
+
+# Sync the changed rows of one table. The rows at or past the destination's watermark
+# are copied into a staging table and merged into the destination table: upserted with
+# INSERT ... ON CONFLICT when it has a primary key, otherwise the rows past the watermark
+# are replaced. The watermark column is set per table in 'sync_watermarks' (for example
+# an updated_at column); without one, a single-column primary key is used and only rows
+# with a higher key are copied. Rows deleted in the source are not synced.
+def sync_table_delta(migration_info,src_db_info,dst_db_info,table):
+    src_db_conn = get_db_pool(src_db_info).checkout()
+    dst_db_conn = get_db_pool(dst_db_info).checkout()
+    dst_db_cursor = dst_db_conn.cursor()
+    stage_table = f"pg_temp.psgres_stage_{table}"
+    try:
+        sqlqry = "SELECT att.attname FROM pg_catalog.pg_constraint con INNER JOIN pg_catalog.pg_class rel ON rel.oid = con.conrelid " \
+                 "INNER JOIN pg_catalog.pg_namespace nsp ON nsp.oid = rel.relnamespace " \
+                 "INNER JOIN pg_catalog.pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = ANY (con.conkey) " \
+                f"WHERE nsp.nspname = '{dst_db_info['schema']}' AND rel.relname = '{table}' AND con.contype = 'p' ORDER BY att.attnum"
+        dst_db_cursor.execute(sqlqry)
+        pk_columns = [column[0] for column in dst_db_cursor.fetchall()]
+        watermark_column = migration_info.get('sync_watermarks',{}).get(table)
+        if not watermark_column and len(pk_columns) != 1:
+            print(f"\nTable '{table}' has no watermark column or single-column primary key; table sync skipped.")
+            return
+        sqlqry = f"SELECT MAX({watermark_column or pk_columns[0]}) FROM {dst_db_info['schema']}.{table}"
+        dst_db_cursor.execute(sqlqry)
+        watermark = dst_db_cursor.fetchone()[0]
+        sqlqry = "SELECT column_name FROM information_schema.columns " \
+                f"WHERE table_schema = '{dst_db_info['schema']}' AND table_name = '{table}' ORDER BY ordinal_position"
+        dst_db_cursor.execute(sqlqry)
+        columnnames = [column[0] for column in dst_db_cursor.fetchall()]
+        print(f"\nSyncing '{table}' table from watermark '{watermark}'...")
         start_time = timer()
-        sqlqry = f"SELECT * FROM {src_db_info['schema']}.{table[0]}"
-        src_db_cursor.execute(sqlqry)
-        tabledata = src_db_cursor.fetchall()
-        dmlqry = generate_table_dml(src_db_conn,src_db_info,dst_db_info,table[0])
-        rowcnt = 0
-        bulk_insert_list = []
-        for row in tabledata:
-            rowcnt = rowcnt + 1
-            recordvalue = "(" + ",".join("'{x}'".format(x=str(column).replace("'","''")) for column in row) + ")"
-            bulk_insert_list.append(recordvalue)
-            if row == tabledata[-1]:
-                dst_db_conn.execute(dmlqry.format(",".join(bulk_insert_list)).replace("'None'","Null"))
-            elif rowcnt == BULK_INSERT_AMT:
-                dst_db_conn.execute(dmlqry.format(",".join(bulk_insert_list)).replace("'None'","Null"))
-                rowcnt = 0
-                bulk_insert_list = []
+        if watermark is None:
+            sync_filter = ''
+        elif watermark_column:
+            sync_filter = dst_db_cursor.mogrify(f"{watermark_column} >= %s",(watermark,)).decode()
+        else:
+            sync_filter = dst_db_cursor.mogrify(f"{pk_columns[0]} > %s",(watermark,)).decode()
+        dst_db_cursor.execute(f"CREATE TEMP TABLE psgres_stage_{table} (LIKE {dst_db_info['schema']}.{table} INCLUDING DEFAULTS)")
+        dst_db_conn.commit()
+        copy_table_data(src_db_conn,src_db_info,dst_db_conn,dst_db_info,table,
+                        migration_info.get('copy_format',COPY_FORMAT_BINARY),get_row_filter(migration_info,table,sync_filter),None,stage_table)
+        column_list = ", ".join(columnnames)
+        if pk_columns:
+            update_list = ", ".join(f"{column} = EXCLUDED.{column}" for column in columnnames if column not in pk_columns)
+            dmlqry = f"INSERT INTO {dst_db_info['schema']}.{table} ({column_list}) SELECT {column_list} FROM {stage_table} " \
+                     f"ON CONFLICT ({', '.join(pk_columns)}) DO " + (f"UPDATE SET {update_list}" if update_list else "NOTHING")
+        else:
+            if sync_filter:
+                dst_db_cursor.execute(f"DELETE FROM {dst_db_info['schema']}.{table} WHERE {sync_filter}")
+            dmlqry = f"INSERT INTO {dst_db_info['schema']}.{table} ({column_list}) SELECT {column_list} FROM {stage_table}"
+        dst_db_cursor.execute(dmlqry)
+        rowcnt = dst_db_cursor.rowcount
+        dst_db_cursor.execute(f"DROP TABLE {stage_table}")
+        dst_db_conn.commit()
         end_time = timer()
         elapsed_time = timedelta(seconds = end_time - start_time)
-        print(f"Load statistics for '{table[0]}' table >>> Records Loaded: {len(tabledata)} | Load Time: {elapsed_time}")
-    print("\n*** Table Loading Processing End ***")
+        print(f"Sync statistics for '{table}' table >>> Records Merged: {rowcnt} | Sync Time: {elapsed_time}")
+        MIGRATION_METRICS.record('sync',table,rows=rowcnt,secs=end_time - start_time)
+    except (psycopg2.Error,IOError) as errmsg:
+        print(f"Table '{table}' failed to sync. ERRMSG: {errmsg}".strip())
+    finally:
+        dst_db_cursor.close()
+        get_db_pool(src_db_info).checkin(src_db_conn)
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+
+# Get the load order of tables from the FK graph of the source schema. Returns a list
+# of levels; every table in a level only references tables in earlier levels, so the
+# tables of a level can be loaded in parallel. Self references are ignored and any
+# tables left in an FK cycle are put in a final level. Tables are ordered largest first
+# within a level, so the workers start on the longest loads.
+def get_table_load_order(src_db_info,src_db_conn,tables):
+    schema_metadata = get_schema_metadata(src_db_conn,src_db_info)
+    table_order = {table:idx for idx,table in enumerate(schema_metadata['tables'])}
+    tables = sorted(tables,key=lambda table: table_order.get(table,len(table_order)))
+    table_refs = {table:set() for table in tables}
+    for table in tables:
+        for constraint in schema_metadata['constraints'].get(table,[]):
+            if constraint['contype'] == 'f' and constraint['reftablename'] in table_refs and constraint['reftablename'] != table:
+                table_refs[table].add(constraint['reftablename'])
+    return get_load_levels(tables,table_refs)
+
+# Split tables into load levels given the tables each one references. The tables keep
+# their order within a level.
+def get_load_levels(tables,table_refs):
+    load_levels = []
+    while table_refs:
+        load_level = [table for table in tables if table in table_refs and not table_refs[table]]
+        if not load_level:
+            load_level = [table for table in tables if table in table_refs]
+        for table in load_level:
+            del table_refs[table]
+        for refs in table_refs.values():
+            refs.difference_update(load_level)
+        load_levels.append(load_level)
+    return load_levels
+
+# Load table data by streaming it from a COPY TO STDOUT on the source database into a
+# COPY FROM STDIN on the destination database. The rows never become Python objects;
+# the raw COPY data passes through a bounded buffer between the two connections.
+# A chunk_filter WHERE predicate limits the copy to one key range of the table. When a
+# chunk_id is given, the chunk's checkpoint is committed together with its data. The
+# rows are copied into dst_table instead of the destination table when it is set.
+def copy_table_data(src_db_conn,src_db_info,dst_db_conn,dst_db_info,table,copy_format,chunk_filter='',chunk_id=None,dst_table=''):
+    copy_format = get_table_copy_format(get_schema_metadata(src_db_conn,src_db_info),table,copy_format)
+    src_db_cursor = src_db_conn.cursor()
+    dst_db_cursor = dst_db_conn.cursor()
+    copy_pipe = CopyDataPipe(COPY_BUFFER_CHUNKS)
+    copy_errors = []
+    if chunk_filter:
+        copyqry = f"COPY (SELECT * FROM {src_db_info['schema']}.{table} WHERE {chunk_filter}) TO STDOUT WITH (FORMAT {copy_format})"
+    else:
+        copyqry = f"COPY {src_db_info['schema']}.{table} TO STDOUT WITH (FORMAT {copy_format})"
+    def copy_out():
+        try:
+            src_db_cursor.copy_expert(copyqry,copy_pipe)
+            src_db_conn.commit()
+        except Exception as errmsg:
+            src_db_conn.rollback()
+            copy_errors.append(errmsg)
+        finally:
+            copy_pipe.close()
+    start_time = timer()
+    copy_out_thread = threading.Thread(target=copy_out)
+    copy_out_thread.start()
+    try:
+        dst_db_cursor.copy_expert(f"COPY {dst_table or dst_db_info['schema'] + '.' + table} FROM STDIN WITH (FORMAT {copy_format})",copy_pipe,COPY_CHUNK_SIZE)
+    except Exception:
+        copy_pipe.abort()
+        copy_out_thread.join()
+        dst_db_conn.rollback()
+        record_failed_chunk(dst_db_info,dst_db_conn,table,chunk_id)
+        if copy_errors:
+            raise copy_errors[0]
+        raise
+    copy_out_thread.join()
+    if copy_errors:
+        dst_db_conn.rollback()
+        record_failed_chunk(dst_db_info,dst_db_conn,table,chunk_id)
+        raise copy_errors[0]
+    rowcnt = dst_db_cursor.rowcount
+    if chunk_id is not None:
+        update_load_tracker_chunk(dst_db_info,dst_db_conn,table,chunk_id,LOAD_COMPLETE,rowcnt)
+    dst_db_conn.commit()
+    src_db_cursor.close()
+    dst_db_cursor.close()
+    MIGRATION_METRICS.record('transfer',table,chunk_id,rows=rowcnt,bytes_copied=copy_pipe.bytes_copied,secs=timer() - start_time,
+                             batch_latencies=copy_pipe.batch_latencies,src_wait_secs=copy_pipe.src_wait_secs,
+                             dst_wait_secs=copy_pipe.dst_wait_secs)
+    return rowcnt
+
+# Get the COPY format of a table. Binary COPY data holds the type OIDs of array elements
+# and composite fields, which only match across databases for built-in types, and
+# extension types may have no portable binary format. Tables with a column of such a
+# type are copied in text format, which round-trips every type through its text I/O.
+def get_table_copy_format(schema_metadata,table,copy_format):
+    if copy_format == COPY_FORMAT_BINARY:
+        for column in schema_metadata['columns'].get(table,[]):
+            if (column['typoid'] >= FIRST_NORMAL_OID and column['typtype'] != 'e') or column['typelemoid'] >= FIRST_NORMAL_OID:
+                return COPY_FORMAT_TEXT
+    return copy_format
+
+# Load a large table by splitting it into chunk_count key ranges and copying up to
+# max_workers ranges concurrently, with the INSERT engine when it's the load engine and
+# with COPY otherwise. All workers import the same snapshot, exported on the table
+# worker's source connection snapshot_conn (in a cutover, the replication slot's
+# snapshot), so together they copy exactly the rows of one consistent view of the
+# table. The ranges are saved in the load tracker table; when
+# a load is resumed the saved ranges are reused and only the chunks that are not
+# complete are copied.
+def copy_table_data_in_chunks(migration_info,snapshot_conn,src_db_info,dst_db_info,dst_db_conn,table,chunks,chunk_count,max_workers):
+    if migration_info.get('snapshot_id'):
+        snapshot_id = migration_info['snapshot_id']
+        set_src_snapshot(snapshot_conn,snapshot_id)
+        snapshot_cursor = snapshot_conn.cursor()
+    else:
+        snapshot_conn.set_session(isolation_level='REPEATABLE READ',readonly=True)
+        snapshot_cursor = snapshot_conn.cursor()
+        snapshot_cursor.execute("SELECT pg_export_snapshot()")
+        snapshot_id = snapshot_cursor.fetchone()[0]
+    if len(chunks) > 1:
+        chunk_column = chunks[0]['chunkcolumn']
+        chunk_list = [(chunk['chunkid'],chunk['lowerkey'],chunk['upperkey']) for chunk in chunks if chunk['status'] != LOAD_COMPLETE]
+        print(f"Table '{table}' resumed with {len(chunk_list)} of {len(chunks)} chunks left to load.")
+    else:
+        chunk_column,chunk_bounds = get_table_chunks(snapshot_conn,src_db_info,table,chunk_count)
+        add_load_tracker_chunks(dst_db_info,dst_db_conn,table,chunk_column,chunk_bounds)
+        chunk_list = [(chunk_id,lower_key,upper_key) for chunk_id,(lower_key,upper_key) in enumerate(chunk_bounds,start=1)]
+        print(f"Table '{table}' split into {len(chunk_list)} chunks.")
+    def copy_chunk(chunk):
+        chunk_id,lower_key,upper_key = chunk
+        src_db_conn = get_db_pool(src_db_info).checkout()
+        chunk_dst_db_conn = get_db_pool(dst_db_info).checkout()
+        try:
+            set_src_snapshot(src_db_conn,snapshot_id)
+            set_load_session(migration_info,chunk_dst_db_conn)
+            update_load_tracker_chunk(dst_db_info,chunk_dst_db_conn,table,chunk_id,LOAD_RUNNING)
+            chunk_dst_db_conn.commit()
+            row_filter = get_row_filter(migration_info,table,get_chunk_filter(chunk_column,lower_key,upper_key))
+            if migration_info.get('load_engine',COPY_ENGINE) == INSERT_ENGINE:
+                return insert_table_data(src_db_conn,src_db_info,chunk_dst_db_conn,dst_db_info,table,
+                                         int(migration_info.get('batch_size',BULK_INSERT_AMT)),chunk_id,row_filter)
+            return copy_table_data(src_db_conn,src_db_info,chunk_dst_db_conn,dst_db_info,table,
+                                   migration_info.get('copy_format',COPY_FORMAT_BINARY),row_filter,chunk_id)
+        finally:
+            get_db_pool(src_db_info).checkin(src_db_conn)
+            get_db_pool(dst_db_info).checkin(chunk_dst_db_conn)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            chunk_futures = [executor.submit(copy_chunk,chunk) for chunk in chunk_list]
+            rowcnt = sum(chunk_future.result() for chunk_future in chunk_futures)
+    finally:
+        snapshot_cursor.close()
+    return rowcnt
+
+# Start a REPEATABLE READ, read-only transaction on a source connection that reads
+# from an exported snapshot.
+def set_src_snapshot(src_db_conn,snapshot_id):
+    src_db_conn.rollback()
+    src_db_conn.set_session(isolation_level='REPEATABLE READ',readonly=True)
+    src_db_cursor = src_db_conn.cursor()
+    src_db_cursor.execute("SET TRANSACTION SNAPSHOT %s",(snapshot_id,))
     src_db_cursor.close()
-    src_db_conn.close()
-    dst_db_conn.close()
+
+# Get the column and key ranges that split a table into chunk_count chunks. Tables with
+# a single-column integer primary key are split on the key; all other tables are split
+# on ctid page ranges. The last range is left open so rows past the estimate are kept.
+def get_table_chunks(src_db_conn,src_db_info,table,chunk_count):
+    pk_column = get_table_integer_pk(get_schema_metadata(src_db_conn,src_db_info),table)
+    src_db_cursor = src_db_conn.cursor()
+    if pk_column:
+        src_db_cursor.execute(f"SELECT MIN({pk_column}),MAX({pk_column}) FROM {src_db_info['schema']}.{table}")
+        min_key,max_key = src_db_cursor.fetchone()
+        if min_key is not None:
+            src_db_cursor.close()
+            return pk_column,get_chunk_bounds(min_key,max_key + 1,chunk_count)
+    src_db_cursor.execute(f"SELECT pg_relation_size('{src_db_info['schema']}.{table}') / current_setting('block_size')::int")
+    page_count = src_db_cursor.fetchone()[0]
+    src_db_cursor.close()
+    return 'ctid',get_chunk_bounds(0,max(page_count,1),chunk_count)
+
+# Get the name of a table's primary key column when the key is a single integer column.
+def get_table_integer_pk(schema_metadata,table):
+    column_types = {column['column_name']:column['udt_name'] for column in schema_metadata['columns'].get(table,[])}
+    for constraint in schema_metadata['constraints'].get(table,[]):
+        if constraint['contype'] == 'p' and len(constraint['conkeys']) == 1 and \
+           column_types.get(constraint['conkeys'][0]) in ['int2','int4','int8']:
+            return constraint['conkeys'][0]
+    return None
+
+# Get the WHERE predicate that selects the rows of one chunk. A key range with a lower
+# bound of None is open at the bottom.
+def get_chunk_filter(chunk_column,lower_key,upper_key):
+    if chunk_column == 'ctid':
+        return f"ctid >= '({lower_key},0)'::tid" + (f" AND ctid < '({upper_key},0)'::tid" if upper_key is not None else "")
+    if lower_key is None:
+        return f"{chunk_column} < {upper_key}" if upper_key is not None else "TRUE"
+    return f"{chunk_column} >= {lower_key}" + (f" AND {chunk_column} < {upper_key}" if upper_key is not None else "")
+
+# Split the range [lower,upper) into at most chunk_count contiguous ranges. The upper
+# bound of the last range is None.
+def get_chunk_bounds(lower,upper,chunk_count):
+    chunk_len = max(-(-(upper - lower) // chunk_count),1)
+    chunk_bounds = []
+    for chunk_lower in range(lower,upper,chunk_len):
+        chunk_bounds.append((chunk_lower,chunk_lower + chunk_len))
+    chunk_bounds[-1] = (chunk_bounds[-1][0],None)
+    return chunk_bounds
+
+# Get the size of a table's main relation in the source database in megabytes.
+def get_table_size_mb(src_db_conn,src_db_info,table):
+    src_db_cursor = src_db_conn.cursor()
+    src_db_cursor.execute(f"SELECT pg_relation_size('{src_db_info['schema']}.{table}') / (1024 * 1024)")
+    size_mb = src_db_cursor.fetchone()[0]
+    src_db_cursor.close()
+    src_db_conn.commit()
+    return size_mb
+
+# Verify the data of the tables in both databases without pulling it over the network.
+# The row count and an order-independent hash of each chunk of a table (the sums of the
+# two halves of md5(row::text)) are computed by each server. The source and destination
+# queries of every chunk of every schema job run on up to 'max_workers' shared workers
+# and only the chunks whose counts or hashes differ are reported. The source rows are
+# limited by the job's 'row_filters'.
+def verify_table_data(schema_jobs):
+    max_workers = int(schema_jobs[0][0].get('max_workers',1))
+    table_count = 0
+    chunk_list = []
+    for migration_info,src_db_info,dst_db_info in schema_jobs:
+        src_db_conn = get_db_pool(src_db_info).checkout()
+        dst_db_conn = get_db_pool(dst_db_info).checkout()
+        tables_in_src_db,tables_in_dst_db = get_list_of_tables_in_src_and_dst_db(migration_info,src_db_info,src_db_conn,dst_db_info,dst_db_conn)
+        table_count += len(tables_in_dst_db)
+        for table in tables_in_dst_db:
+            chunk_filters = get_verify_chunk_filters(migration_info,src_db_info,src_db_conn,dst_db_info,dst_db_conn,table)
+            chunk_list += [(migration_info,src_db_info,dst_db_info,table,chunk_id,chunk_filter)
+                           for chunk_id,chunk_filter in enumerate(chunk_filters,start=1)]
+        get_db_pool(src_db_info).checkin(src_db_conn)
+        get_db_pool(dst_db_info).checkin(dst_db_conn)
+    print("\n*** Data Verification Processing Begin ***")
+    start_time = timer()
+    mismatches = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        chunk_futures = [(executor.submit(get_chunk_checksum,src_db_info,table,get_row_filter(migration_info,table,chunk_filter)),
+                          executor.submit(get_chunk_checksum,dst_db_info,table,chunk_filter))
+                         for migration_info,src_db_info,dst_db_info,table,chunk_id,chunk_filter in chunk_list]
+        for (migration_info,src_db_info,dst_db_info,table,chunk_id,chunk_filter),(src_future,dst_future) in zip(chunk_list,chunk_futures):
+            src_checksum,src_secs = src_future.result()
+            dst_checksum,dst_secs = dst_future.result()
+            if src_checksum is None or dst_checksum is None or src_checksum != dst_checksum:
+                mismatches += 1
+                print(f"Table '{dst_db_info['schema']}.{table}' chunk {chunk_id} ({chunk_filter or 'all rows'}) failed verification >>> "
+                      f"Source Records: {src_checksum[0] if src_checksum else 'n/a'} | "
+                      f"Destination Records: {dst_checksum[0] if dst_checksum else 'n/a'}")
+            MIGRATION_METRICS.record('verify',table,chunk_id,rows=src_checksum[0] if src_checksum else 0,
+                                     secs=max(src_secs,dst_secs),src_wait_secs=src_secs,dst_wait_secs=dst_secs)
+    elapsed_time = timedelta(seconds = timer() - start_time)
+    print(f"Verification statistics >>> Tables Verified: {table_count} | Chunks Verified: {len(chunk_list)} | "
+          f"Chunks Mismatched: {mismatches} | Verification Time: {elapsed_time}")
+    print("\n*** Data Verification Processing End ***")
+
+# Get the WHERE predicates that split a table into verification chunks. Tables of at
+# least 'chunk_threshold_mb' with a single-column integer primary key are split on key
+# ranges that cover the keys of both databases; ctid ranges differ between databases, so
+# all other tables are verified as one chunk.
+def get_verify_chunk_filters(migration_info,src_db_info,src_db_conn,dst_db_info,dst_db_conn,table):
+    pk_column = get_table_integer_pk(get_schema_metadata(src_db_conn,src_db_info),table)
+    if not pk_column or \
+       get_table_size_mb(src_db_conn,src_db_info,table) < int(migration_info.get('chunk_threshold_mb',CHUNK_THRESHOLD_MB)):
+        return ['']
+    key_bounds = []
+    for db_info,db_conn in [(src_db_info,src_db_conn),(dst_db_info,dst_db_conn)]:
+        db_cursor = db_conn.cursor()
+        db_cursor.execute(f"SELECT MIN({pk_column}),MAX({pk_column}) FROM {db_info['schema']}.{table}")
+        key_bounds += [key for key in db_cursor.fetchone() if key is not None]
+        db_cursor.close()
+        db_conn.commit()
+    if not key_bounds:
+        return ['']
+    chunk_bounds = get_chunk_bounds(min(key_bounds),max(key_bounds) + 1,int(migration_info.get('max_workers',1)) * CHUNKS_PER_WORKER)
+    chunk_bounds[0] = (None,chunk_bounds[0][1])
+    return [get_chunk_filter(pk_column,lower_key,upper_key) for lower_key,upper_key in chunk_bounds]
+
+# Get the row count and row hash sums of one chunk of a table, and the seconds the query
+# took. The checksum is None when the query fails. The text form of a row depends on
+# session settings such as TimeZone and IntervalStyle, which may differ between the two
+# servers, so the settings in VERIFY_SESSION_SETTINGS are set for the query's
+# transaction in both databases.
+def get_chunk_checksum(db_info,table,chunk_filter):
+    db_conn = get_db_pool(db_info).checkout()
+    db_cursor = db_conn.cursor()
+    start_time = timer()
+    settingqry = "".join(f"SET LOCAL {setting} = '{value}';" for setting,value in VERIFY_SESSION_SETTINGS.items())
+    sqlqry = f"SELECT count(*),coalesce(sum(('x' || left(rowhash,16))::bit(64)::bigint),0)," \
+             f"coalesce(sum(('x' || right(rowhash,16))::bit(64)::bigint),0) " \
+             f"FROM (SELECT md5(tbl::text) AS rowhash FROM {db_info['schema']}.{table} tbl" + \
+             (f" WHERE {chunk_filter}" if chunk_filter else "") + ") rowhashes"
+    try:
+        db_cursor.execute(settingqry)
+        db_cursor.execute(sqlqry)
+        checksum = db_cursor.fetchone()
+        db_conn.commit()
+    except psycopg2.Error as errmsg:
+        db_conn.rollback()
+        checksum = None
+        print(f"Table '{table}' failed to verify in database '{db_info['database']}'. ERRMSG: {errmsg}".strip())
+    finally:
+        db_cursor.close()
+        get_db_pool(db_info).checkin(db_conn)
+    return checksum,timer() - start_time
+
+# Bounded in-memory pipe between a COPY TO STDOUT writer and a COPY FROM STDIN reader.
+# Writes are gathered into COPY_CHUNK_SIZE byte chunks and the writer blocks once
+# COPY_BUFFER_CHUNKS chunks are waiting, so memory use stays fixed no matter how fast
+# the source produces data.
+class CopyDataPipe:
+    def __init__(self,max_chunks):
+        self.chunks = queue.Queue(maxsize=max_chunks)
+        self.outgoing = bytearray()
+        self.pending = bytearray()
+        self.at_eof = False
+        self.aborted = False
+        self.bytes_copied = 0
+        self.src_wait_secs = 0.0
+        self.dst_wait_secs = 0.0
+        self.batch_latencies = []
+        self.last_read = None
+
+    # Called by psycopg2 with each row of COPY TO STDOUT data.
+    def write(self,data):
+        self.outgoing += data
+        if len(self.outgoing) >= COPY_CHUNK_SIZE:
+            self.put_chunk(bytes(self.outgoing))
+            self.outgoing = bytearray()
+        return len(data)
+
+    # Called by psycopg2 to fetch COPY FROM STDIN data; returns b'' at end of data.
+    def read(self,size=-1):
+        read_start = timer()
+        if self.last_read is not None:
+            self.batch_latencies.append(read_start - self.last_read)
+        while not self.at_eof and (size < 0 or len(self.pending) < size):
+            get_start = timer()
+            chunk = self.chunks.get()
+            self.src_wait_secs += timer() - get_start
+            if chunk is None:
+                self.at_eof = True
+            else:
+                self.pending += chunk
+        if size < 0:
+            size = len(self.pending)
+        data = bytes(self.pending[:size])
+        del self.pending[:size]
+        self.bytes_copied += len(data)
+        self.last_read = timer()
+        return data
+
+    # Signal the reader that no more data will be written.
+    def close(self):
+        if not self.aborted:
+            if self.outgoing:
+                self.put_chunk(bytes(self.outgoing))
+                self.outgoing = bytearray()
+            self.put_chunk(None)
+
+    # Stop the writer when the reader has failed.
+    def abort(self):
+        self.aborted = True
+
+    def put_chunk(self,chunk):
+        put_start = timer()
+        while True:
+            if self.aborted:
+                raise IOError("COPY data pipe was aborted by the destination database.")
+            try:
+                self.chunks.put(chunk,timeout=1)
+                self.dst_wait_secs += timer() - put_start
+                return
+            except queue.Full:
+                continue
+
+# Load table data by streaming the rows from the source database and executing bulk
+# INSERT statements against the destination database. The table is loaded in a single
+# transaction that also commits the table's checkpoint. Values are read in their text
+# form and cast back to the column types in the INSERT, so every type round-trips
+# through its own text I/O and NULLs stay NULL, with no formatting of values in Python.
+# A row_filter WHERE predicate limits the rows loaded.
+def insert_table_data(src_db_conn,src_db_info,dst_db_conn,dst_db_info,table,batch_size,chunk_id=None,row_filter=''):
+    columns = get_schema_metadata(src_db_conn,src_db_info)['columns'][table]
+    select_list = ",".join(f"{column['column_name']}::text" for column in columns)
+    template = "(" + ",".join(f"%s::{column['column_type']}" for column in columns) + ")"
+    dmlqry = generate_table_dml(src_db_conn,src_db_info,dst_db_info,table)
+    dst_db_cursor = dst_db_conn.cursor()
+    rowcnt = 0
+    bytes_copied = 0
+    src_wait_secs = 0.0
+    batch_latencies = []
+    start_time = timer()
+    fetch_start = start_time
+    try:
+        for tabledata in stream_table_rows(src_db_conn,src_db_info,table,batch_size,select_list,row_filter):
+            src_wait_secs += timer() - fetch_start
+            write_start = timer()
+            psycopg2.extras.execute_values(dst_db_cursor,dmlqry,tabledata,template=template,page_size=len(tabledata))
+            batch_latencies.append(timer() - write_start)
+            bytes_copied = bytes_copied + len(dst_db_cursor.query)
+            rowcnt = rowcnt + len(tabledata)
+            fetch_start = timer()
+    except Exception:
+        dst_db_conn.rollback()
+        record_failed_chunk(dst_db_info,dst_db_conn,table,chunk_id)
+        raise
+    if chunk_id is not None:
+        update_load_tracker_chunk(dst_db_info,dst_db_conn,table,chunk_id,LOAD_COMPLETE,rowcnt)
+    dst_db_conn.commit()
+    dst_db_cursor.close()
+    MIGRATION_METRICS.record('transfer',table,chunk_id,rows=rowcnt,bytes_copied=bytes_copied,secs=timer() - start_time,
+                             batch_latencies=batch_latencies,src_wait_secs=src_wait_secs,dst_wait_secs=sum(batch_latencies))
+    return rowcnt
 
 # Generate table DML for loading tables in destination database.
 def generate_table_dml(src_db_conn,src_db_info,dst_db_info,table):
-    src_db_cursor = src_db_conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    sqlqry = f"SELECT column_name FROM information_schema.columns WHERE " \
-             f"table_schema = '{src_db_info['schema']}' AND table_name = '{table}' ORDER BY ordinal_position"
-    src_db_cursor.execute(sqlqry)
-    columndata = src_db_cursor.fetchall()
+    columndata = get_schema_metadata(src_db_conn,src_db_info)['columns'][table]
     dmlqry = f"INSERT INTO {dst_db_info['schema']}.{table} (" + \
-              ", ".join("{x}".format(x=column[0]) for column in columndata) + ") VALUES {}"
+              ", ".join("{x}".format(x=column['column_name']) for column in columndata) + ") VALUES %s"
     return dmlqry
 
+# Metrics of a migration run. Each phase (validation, ddl, extract, transfer, load, sync
+# and constraints) records one entry per unit of work, such as a table, a chunk or a
+# DDL statement, with its rows, bytes, elapsed time, batch latency percentiles, the time
+# spent waiting on the source and on the destination, and the peak memory of the process.
+# 'transfer' entries cover the data stream of a table or chunk and 'load' entries the
+# whole load of a table. Entries are appended to the 'metrics_file' JSON-lines file as
+# they're recorded, a summary entry per phase is added at the end of the run, and the
+# running totals are served in Prometheus text format on 'metrics_port'.
+class MigrationMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics_file = None
+        self.metrics_server = None
+        self.phases = {}
+        self.table_rows = {}
+
+    def start(self,migration_info):
+        with self.lock:
+            self.phases = {}
+            self.table_rows = {}
+            if migration_info.get('metrics_file',''):
+                self.metrics_file = open(migration_info['metrics_file'],'a',encoding='utf-8')
+        if int(migration_info.get('metrics_port',0)):
+            import http.server
+            self.metrics_server = http.server.ThreadingHTTPServer((METRICS_HOST,int(migration_info['metrics_port'])),
+                                                                  get_metrics_request_handler())
+            threading.Thread(target=self.metrics_server.serve_forever,daemon=True).start()
+
+    def stop(self):
+        if self.metrics_server:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+        with self.lock:
+            if self.phases:
+                print("\n*** Phase Metrics ***")
+            for phase,totals in self.phases.items():
+                summary = self.get_phase_summary(phase,totals)
+                print(f"Phase '{phase}' >>> Rows: {summary['rows']} | Rows/s: {summary['rows_per_sec']} | "
+                      f"Bytes/s: {summary['bytes_per_sec']} | Wall Time: {timedelta(seconds=summary['wall_secs'])} | "
+                      f"Source Wait: {summary['src_wait_secs']}s | Destination Wait: {summary['dst_wait_secs']}s")
+                self.write_entry(summary)
+            if self.metrics_file:
+                self.metrics_file.close()
+                self.metrics_file = None
+
+    def record(self,phase,table=None,chunk_id=None,rows=0,bytes_copied=None,secs=0.0,batch_latencies=None,
+               src_wait_secs=None,dst_wait_secs=None):
+        end_time = timer()
+        entry = {'time':datetime.datetime.now().isoformat(timespec='milliseconds'),
+                 'phase':phase,'table':table,'chunk':chunk_id,'rows':rows,'bytes':bytes_copied,'secs':round(secs,6),
+                 'rows_per_sec':round(rows / secs,1) if secs else None,
+                 'bytes_per_sec':round(bytes_copied / secs,1) if secs and bytes_copied is not None else None,
+                 'latency_ms':get_latency_percentiles(batch_latencies or []),
+                 'src_wait_secs':None if src_wait_secs is None else round(src_wait_secs,6),
+                 'dst_wait_secs':None if dst_wait_secs is None else round(dst_wait_secs,6),
+                 'peak_rss_mb':get_peak_rss_mb()}
+        with self.lock:
+            totals = self.phases.setdefault(phase,{'entries':0,'rows':0,'bytes':0,'busy_secs':0.0,
+                                                   'start':end_time - secs,'end':end_time,'batch_latencies':[],
+                                                   'src_wait_secs':0.0,'dst_wait_secs':0.0})
+            totals['entries'] += 1
+            totals['rows'] += rows
+            totals['bytes'] += bytes_copied or 0
+            totals['busy_secs'] += secs
+            totals['start'] = min(totals['start'],end_time - secs)
+            totals['end'] = max(totals['end'],end_time)
+            totals['batch_latencies'] += batch_latencies or []
+            totals['src_wait_secs'] += src_wait_secs or 0.0
+            totals['dst_wait_secs'] += dst_wait_secs or 0.0
+            if table:
+                self.table_rows[(phase,table)] = self.table_rows.get((phase,table),0) + rows
+            self.write_entry(entry)
+
+    # Sum up the entries of a phase. Rates are over the phase's wall time, from the start
+    # of its first entry to the end of its last, so parallel work is counted once.
+    def get_phase_summary(self,phase,totals):
+        wall_secs = totals['end'] - totals['start']
+        return {'time':datetime.datetime.now().isoformat(timespec='milliseconds'),
+                'phase':phase,'summary':True,'entries':totals['entries'],'rows':totals['rows'],'bytes':totals['bytes'],
+                'wall_secs':round(wall_secs,6),'busy_secs':round(totals['busy_secs'],6),
+                'rows_per_sec':round(totals['rows'] / wall_secs,1) if wall_secs else None,
+                'bytes_per_sec':round(totals['bytes'] / wall_secs,1) if wall_secs else None,
+                'latency_ms':get_latency_percentiles(totals['batch_latencies']),
+                'src_wait_secs':round(totals['src_wait_secs'],6),'dst_wait_secs':round(totals['dst_wait_secs'],6),
+                'peak_rss_mb':get_peak_rss_mb()}
+
+    def write_entry(self,entry):
+        if self.metrics_file:
+            self.metrics_file.write(json.dumps(entry) + "\n")
+            self.metrics_file.flush()
+
+    # Render the running totals in the Prometheus text exposition format.
+    def get_prometheus_text(self):
+        with self.lock:
+            lines = ["# TYPE psgres_rows_total counter"]
+            lines += [f'psgres_rows_total{{phase="{phase}"}} {totals["rows"]}' for phase,totals in self.phases.items()]
+            lines.append("# TYPE psgres_bytes_total counter")
+            lines += [f'psgres_bytes_total{{phase="{phase}"}} {totals["bytes"]}' for phase,totals in self.phases.items()]
+            lines.append("# TYPE psgres_busy_seconds_total counter")
+            lines += [f'psgres_busy_seconds_total{{phase="{phase}"}} {totals["busy_secs"]:.6f}' for phase,totals in self.phases.items()]
+            lines.append("# TYPE psgres_wait_seconds_total counter")
+            for phase,totals in self.phases.items():
+                lines.append(f'psgres_wait_seconds_total{{phase="{phase}",side="source"}} {totals["src_wait_secs"]:.6f}')
+                lines.append(f'psgres_wait_seconds_total{{phase="{phase}",side="destination"}} {totals["dst_wait_secs"]:.6f}')
+            lines.append("# TYPE psgres_batch_latency_seconds summary")
+            for phase,totals in self.phases.items():
+                for quantile,latency in get_latency_percentiles(totals['batch_latencies'],1).items():
+                    if quantile != 'max':
+                        lines.append(f'psgres_batch_latency_seconds{{phase="{phase}",quantile="0.{quantile[1:]}"}} {latency}')
+                lines.append(f'psgres_batch_latency_seconds_count{{phase="{phase}"}} {len(totals["batch_latencies"])}')
+            lines.append("# TYPE psgres_table_rows_total counter")
+            lines += [f'psgres_table_rows_total{{phase="{phase}",table="{table}"}} {rows}' for (phase,table),rows in self.table_rows.items()]
+        peak_rss_mb = get_peak_rss_mb()
+        if peak_rss_mb is not None:
+            lines.append("# TYPE psgres_peak_rss_bytes gauge")
+            lines.append(f"psgres_peak_rss_bytes {int(peak_rss_mb * 1024 * 1024)}")
+        return "\n".join(lines) + "\n"
+
+# Get the request handler that serves the migration metrics at /metrics. The class is
+# defined on first use, so http.server is only imported when metrics are served.
+def get_metrics_request_handler():
+    import http.server
+    class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = MIGRATION_METRICS.get_prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type','text/plain; version=0.0.4')
+            self.send_header('Content-Length',str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self,format,*args):
+            pass
+    return MetricsRequestHandler
+
+MIGRATION_METRICS = MigrationMetrics()
+
+# Get the p50, p95, p99 and max of batch latencies, in milliseconds by default.
+def get_latency_percentiles(latencies,scale=1000):
+    if not latencies:
+        return {}
+    latencies = sorted(latencies)
+    percentiles = {f"p{pct}":round(latencies[min(len(latencies) - 1,int(len(latencies) * pct / 100))] * scale,6) for pct in [50,95,99]}
+    percentiles['max'] = round(latencies[-1] * scale,6)
+    return percentiles
+
+# Get the peak resident memory of the process in megabytes, where the platform reports it.
+def get_peak_rss_mb():
+    if sys.platform == 'win32':
+        return None
+    import resource
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024),1)
+
+# Open the shared connection pools of a run's databases with the limits of
+# get_pool_limits. 'statement_timeout' is set on every pooled session.
+def open_db_pools(migration_info,*db_infos):
+    pool_size,max_connections = get_pool_limits(migration_info)
+    statement_timeout = migration_info.get('statement_timeout',STATEMENT_TIMEOUT)
+    with DB_POOL_LOCK:
+        for db_info in db_infos:
+            cache_key = (db_info['user'],db_info['host'],db_info['port'],db_info['database'])
+            if all(db_info.values()) and cache_key not in DB_POOL_CACHE:
+                DB_POOL_CACHE[cache_key] = DbConnectionPool(db_info,pool_size,statement_timeout,max_connections)
+
+# Get the number of threads of a run that can hold a connection of the same pool at
+# once: the 'max_workers' table workers, the 'max_workers' chunk workers of each of
+# them and the main thread.
+def get_pool_workers(migration_info):
+    max_workers = int(migration_info.get('max_workers',1))
+    return max_workers * (max_workers + 1) + 1
+
+# Get the 'pool_size' and 'max_connections' limits of the connection pools. 'pool_size'
+# (0 for 'max_workers' x ('max_workers' + 2)) is the number of connections that threads
+# holding no other connection of the pool can check out and the number of idle
+# connections kept for reuse. 'max_connections' (0 for twice 'pool_size') is the hard
+# cap on the connections each pool opens; the connections above 'pool_size' are the
+# allowance for nested checkouts by threads that already hold one.
+def get_pool_limits(migration_info):
+    max_workers = int(migration_info.get('max_workers',1))
+    pool_size = int(migration_info.get('pool_size',0)) or max_workers * (max_workers + 2)
+    return pool_size,int(migration_info.get('max_connections',0)) or 2 * pool_size
+
+# Get the shared connection pool of a database, opening one with default settings and
+# no connection cap when the pools weren't opened for a run.
+def get_db_pool(db_info):
+    cache_key = (db_info['user'],db_info['host'],db_info['port'],db_info['database'])
+    with DB_POOL_LOCK:
+        if cache_key not in DB_POOL_CACHE:
+            DB_POOL_CACHE[cache_key] = DbConnectionPool(db_info,1,STATEMENT_TIMEOUT)
+        return DB_POOL_CACHE[cache_key]
+
+# Close the shared connection pools and their idle connections.
+def close_db_pools():
+    with DB_POOL_LOCK:
+        db_pools = list(DB_POOL_CACHE.values())
+        DB_POOL_CACHE.clear()
+    for db_pool in db_pools:
+        db_pool.close()
+
+# Pool of reusable connections to one database, shared by every stage of a run. Workers
+# check a connection out and back in; a checked-in connection is reset with DISCARD ALL
+# and kept for reuse, up to pool_size idle connections. A connection that sat idle for
+# POOL_HEALTH_CHECK_SECS seconds or more is checked with SELECT 1 before it's handed out.
+# When no idle connection is left a new one is opened, up to max_connections (0 for no
+# cap): a thread's first connection from the pool takes one of pool_size slots and each
+# further connection it holds at the same time takes one of the max_connections -
+# pool_size nested slots, and checkouts wait for a free slot. Sized by get_pool_limits,
+# the slots cover every worker's connections, so nested checkouts by table and chunk
+# workers can't deadlock on the pool. Connections use TCP keepalives so a dropped link
+# to the server is detected during long loads.
+class DbConnectionPool:
+    def __init__(self,db_info,pool_size,statement_timeout,max_connections=0):
+        self.db_info = db_info
+        self.pool_size = pool_size
+        self.statement_timeout = statement_timeout
+        self.max_connections = max_connections
+        self.idle_conns = []
+        self.lock = threading.Lock()
+        if max_connections:
+            self.base_slots = threading.BoundedSemaphore(pool_size)
+            self.nested_slots = threading.BoundedSemaphore(max_connections - pool_size)
+        self.thread_conns = {}
+        self.conn_slots = {}
+
+    def connect(self):
+        return psycopg2.connect(user=self.db_info['user'],
+                                password=self.db_info['pwd'],
+                                host=self.db_info['host'],
+                                port=self.db_info['port'],
+                                database=self.db_info['database'],
+                                client_encoding='UTF8',
+                                keepalives=1,
+                                keepalives_idle=POOL_KEEPALIVES_IDLE,
+                                keepalives_interval=POOL_KEEPALIVES_INTERVAL,
+                                keepalives_count=POOL_KEEPALIVES_COUNT,
+                                options=f"-c statement_timeout={self.statement_timeout}")
+
+    def checkout(self):
+        thread_id = threading.get_ident()
+        slots = None
+        if self.max_connections:
+            with self.lock:
+                slots = self.nested_slots if self.thread_conns.get(thread_id) else self.base_slots
+            slots.acquire()
+        try:
+            db_conn = self.get_conn()
+        except BaseException:
+            if slots:
+                slots.release()
+            raise
+        with self.lock:
+            self.thread_conns[thread_id] = self.thread_conns.get(thread_id,0) + 1
+            self.conn_slots[id(db_conn)] = (thread_id,slots)
+        return db_conn
+
+    def get_conn(self):
+        while True:
+            with self.lock:
+                if not self.idle_conns:
+                    break
+                db_conn,idle_since = self.idle_conns.pop()
+            if db_conn.closed:
+                continue
+            if timer() - idle_since < POOL_HEALTH_CHECK_SECS:
+                return db_conn
+            try:
+                db_cursor = db_conn.cursor()
+                db_cursor.execute("SELECT 1")
+                db_cursor.close()
+                db_conn.rollback()
+                return db_conn
+            except psycopg2.Error:
+                db_conn.close()
+        return self.connect()
+
+    def checkin(self,db_conn):
+        if not db_conn.closed:
+            try:
+                db_conn.rollback()
+                db_conn.autocommit = True
+                db_cursor = db_conn.cursor()
+                db_cursor.execute("DISCARD ALL")
+                db_cursor.close()
+                db_conn.set_session(isolation_level='DEFAULT',readonly='DEFAULT',deferrable='DEFAULT',autocommit=False)
+            except psycopg2.Error:
+                db_conn.close()
+        with self.lock:
+            thread_id,slots = self.conn_slots.pop(id(db_conn),(None,None))
+            if thread_id in self.thread_conns:
+                self.thread_conns[thread_id] -= 1
+                if not self.thread_conns[thread_id]:
+                    del self.thread_conns[thread_id]
+            keep_conn = not db_conn.closed and len(self.idle_conns) < self.pool_size
+            if keep_conn:
+                self.idle_conns.append((db_conn,timer()))
+        if not keep_conn:
+            db_conn.close()
+        if slots:
+            slots.release()
+
+    def close(self):
+        with self.lock:
+            idle_conns = self.idle_conns
+            self.idle_conns = []
+        for db_conn,idle_since in idle_conns:
+            db_conn.close()
+
+# Get the catalog metadata of a schema: its tables and, per table, the columns with their
+# types, constraints and indexes. The metadata is read in one batched query per object
+# kind for the whole schema and cached for the run, so the DDL and DML generators don't
+# query the catalog table by table.
+def get_schema_metadata(db_conn,db_info):
+    cache_key = (db_info['host'],db_info['port'],db_info['database'],db_info['schema'])
+    with SCHEMA_METADATA_LOCK:
+        if cache_key not in SCHEMA_METADATA_CACHE:
+            SCHEMA_METADATA_CACHE[cache_key] = load_schema_metadata(db_conn,db_info['schema'])
+        return SCHEMA_METADATA_CACHE[cache_key]
+
+# Drop the cached catalog metadata of a schema, so it's read again on next use.
+def clear_schema_metadata(db_info):
+    with SCHEMA_METADATA_LOCK:
+        SCHEMA_METADATA_CACHE.pop((db_info['host'],db_info['port'],db_info['database'],db_info['schema']),None)
+
+# Read the catalog metadata of a schema in batched catalog queries.
+def load_schema_metadata(db_conn,schema):
+    db_cursor = db_conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    sqlqry = f"SELECT tablename,pg_total_relation_size(format('%I.%I',schemaname,tablename)) AS total_bytes " \
+             f"FROM pg_catalog.pg_tables WHERE schemaname = '{schema}' ORDER BY total_bytes DESC,tablename"
+    db_cursor.execute(sqlqry)
+    table_sizes = db_cursor.fetchall()
+    tables = [table['tablename'] for table in table_sizes]
+    schema_metadata = {'tables':tables,
+                       'table_bytes':{table['tablename']:table['total_bytes'] for table in table_sizes},
+                       'columns':{table:[] for table in tables},
+                       'constraints':{table:[] for table in tables},
+                       'indexes':{table:[] for table in tables}}
+    sqlqry = "SELECT col.table_name AS tablename,col.column_name,col.ordinal_position,col.is_nullable,col.data_type,col.udt_name," \
+             "typ.oid AS typoid,typ.typtype,typ.typelem AS typelemoid,typ.typcategory,typ.typlen,col.character_maximum_length,col.numeric_precision,col.numeric_scale," \
+             "format_type(att.atttypid,att.atttypmod) AS column_type " \
+             "FROM information_schema.columns col " \
+             "INNER JOIN pg_catalog.pg_namespace typnsp ON typnsp.nspname = col.udt_schema " \
+             "LEFT JOIN pg_catalog.pg_type typ ON typ.typname = col.udt_name AND typ.typnamespace = typnsp.oid " \
+             "INNER JOIN pg_catalog.pg_namespace nsp ON nsp.nspname = col.table_schema " \
+             "INNER JOIN pg_catalog.pg_class rel ON rel.relname = col.table_name AND rel.relnamespace = nsp.oid " \
+             "INNER JOIN pg_catalog.pg_attribute att ON att.attrelid = rel.oid AND att.attname = col.column_name " \
+            f"WHERE col.table_schema = '{schema}' ORDER BY col.table_name,col.ordinal_position"
+    db_cursor.execute(sqlqry)
+    for column in db_cursor.fetchall():
+        if column['tablename'] in schema_metadata['columns']:
+            schema_metadata['columns'][column['tablename']].append(column)
+    sqlqry = "SELECT con.conname,con.contype,rel.relname AS tablename,frel.relname AS reftablename,pg_get_constraintdef(con.oid) AS condef," \
+             "ARRAY(SELECT att.attname FROM unnest(con.conkey) WITH ORDINALITY AS conkey(attnum,keyorder) " \
+             "INNER JOIN pg_catalog.pg_attribute att ON att.attrelid = con.conrelid AND att.attnum = conkey.attnum ORDER BY conkey.keyorder)::text[] AS conkeys " \
+             "FROM pg_catalog.pg_constraint con INNER JOIN pg_catalog.pg_class rel ON rel.oid = con.conrelid INNER JOIN pg_catalog.pg_namespace nsp ON nsp.oid = con.connamespace " \
+             "LEFT JOIN pg_catalog.pg_class frel ON frel.oid = con.confrelid " \
+            f"WHERE nsp.nspname = '{schema}' ORDER BY con.contype DESC"
+    db_cursor.execute(sqlqry)
+    for constraint in db_cursor.fetchall():
+        if constraint['tablename'] in schema_metadata['constraints']:
+            schema_metadata['constraints'][constraint['tablename']].append(constraint)
+    sqlqry = "SELECT rel.relname AS tablename,idx.relname AS indexname,pg_get_indexdef(ind.indexrelid) AS indexdef," \
+             "EXISTS (SELECT 1 FROM pg_catalog.pg_constraint con WHERE con.conindid = ind.indexrelid AND con.contype IN ('p','u','x')) AS isconstraint " \
+             "FROM pg_catalog.pg_index ind INNER JOIN pg_catalog.pg_class idx ON idx.oid = ind.indexrelid " \
+             "INNER JOIN pg_catalog.pg_class rel ON rel.oid = ind.indrelid INNER JOIN pg_catalog.pg_namespace nsp ON nsp.oid = rel.relnamespace " \
+            f"WHERE nsp.nspname = '{schema}' ORDER BY rel.relname,idx.relname"
+    db_cursor.execute(sqlqry)
+    for index in db_cursor.fetchall():
+        if index['tablename'] in schema_metadata['indexes']:
+            schema_metadata['indexes'][index['tablename']].append(index)
+    db_cursor.close()
+    db_conn.commit()
+    return schema_metadata
+
 # Migration settings dictionary. 
 # Note: Set 'extract_csv_dir' to '' if you don't want to extract table data to
 # CSV files. Also, the create_tables_only' and 'create_tables_insert_data'
 # parameters are mutually exclusive and one must be set to 'Y' and the
-# other to 'N' or both must be set to 'N'.
+# other to 'N' or both must be set to 'N'. Set 'load_engine' to 'COPY' to stream
+# table data with COPY (default) or to 'INSERT' to use bulk INSERT statements, and
+# set 'copy_format' to 'BINARY' (default) or 'TEXT' for the COPY data format; tables
+# with array, composite or extension type columns that aren't portable in binary
+# format are always copied as text. Set 'load_engine' to 'ASYNC' to COPY with
+# asyncpg, reading the next data from the source while the data already read is
+# written to the destination.
+# 'batch_size' is the number of rows fetched per round trip from the server-side
+# cursors that stream table data for CSV extracts and INSERT loads. 'max_workers' is
+# the number of tables loaded in parallel, each over its own connections. Tables of
+# 'chunk_threshold_mb' megabytes or more are split into key ranges that are also
+# copied by 'max_workers' parallel workers; smaller tables of 'checkpoint_mb'
+# megabytes or more (0 for none) are loaded in key ranges of about 'checkpoint_mb'
+# one after another, each committed with its checkpoint. Set 'run_mode' to 'RESUME'
+# to continue a failed load from the checkpoints in the psgres_load_tables table;
+# tables and chunks that finished loading are skipped. Set 'run_mode' to 'SYNC' to
+# also copy only the changed rows of tables that already exist in the destination
+# database. 'sync_watermarks' maps table names to the column (for example
+# 'updated_at') that marks changed rows; tables without one are synced on their
+# primary key. Set 'run_mode' to 'PLAN' to print the execution plan (load levels,
+# chunking, disk space needed and a load time estimate from the summaries in
+# 'metrics_file') without migrating anything. Set 'run_mode' to 'CUTOVER' for a
+# near-zero-downtime migration: the tables are loaded from the snapshot of a logical
+# replication slot named 'replication_slot' (the source database needs wal_level
+# 'logical' and every table a primary key or replica identity), and then the changes
+# made since are applied in batches of 'batch_size' until none have arrived for
+# 'cutover_idle_secs' seconds. Freeze writes on the source once the reported lag is
+# small; when the run finishes the destination is caught up and applications can be
+# switched over. If the run stops while changes are applied, run it again to continue
+# from the slot. 'maintenance_work_mem' is set for the sessions that build indexes
+# and constraints after the load. Set 'fast_load' to 'Y' to create the tables
+# UNLOGGED for the load and switch them to LOGGED before the constraints are built,
+# to load with synchronous_commit off and 'load_work_mem'/'maintenance_work_mem', and
+# to ANALYZE each table once it's loaded. Set 'verify_data' to 'Y' to compare the row
+# counts and row hashes of the tables in both databases after the migration; only
+# mismatched chunks are reported.
+# 'include_tables' and 'exclude_tables' are lists of fnmatch patterns (for example
+# 'sales_*') that select the tables to migrate, and 'row_filters' maps table names to
+# WHERE predicates that select the rows to migrate. To move several schemas in one
+# run, set 'schema_mappings' to a list of dictionaries such as
+# {'src_schema':'hr','dst_schema':'hr_archive','exclude_tables':['tmp_*']}, each with
+# optional 'include_tables', 'exclude_tables' and 'row_filters' of its own; the
+# 'schema' database settings are then not used. The schemas share the connection
+# pools and the 'max_workers' load and verification workers. Set 'extract_format' to
+# 'CSV' (default), 'PARQUET' or 'ARROW' for the files written to 'extract_csv_dir';
+# Parquet and Arrow files are compressed with 'extract_compression' and Parquet files
+# are written in row groups of 'row_group_size' rows. CSV files are written with COPY
+# ('csv_engine' 'COPY', the default) or pandas ('PANDAS'); set 'csv_compression' to
+# '', 'GZIP' or 'ZSTD', and 'csv_split_rows' or 'csv_split_bytes' to split each
+# table's CSV data into part files of that many rows or bytes (0 for no split). Every
+# stage shares one connection pool per database that keeps up to 'pool_size' idle
+# connections for reuse and never opens more than 'max_connections' connections; 0
+# sizes them from 'max_workers'. 'statement_timeout' (for example '30min', '0' for
+# none) is set on every pooled session. Set 'metrics_file' to a file path to append
+# per-phase, per-table and per-chunk metrics to it as JSON lines, and 'metrics_port'
+# to a port number to serve the running totals at http://127.0.0.1:port/metrics in
+# Prometheus text format.
 migration_settings = {'extract_csv_dir':'',
                       'create_tables_only':'N',
-                      'create_tables_insert_data':'Y'}
+                      'create_tables_insert_data':'Y',
+                      'load_engine':'COPY',
+                      'copy_format':'BINARY',
+                      'batch_size':'10000',
+                      'max_workers':'4',
+                      'chunk_threshold_mb':'1024',
+                      'checkpoint_mb':'256',
+                      'run_mode':'FULL',
+                      'sync_watermarks':{},
+                      'maintenance_work_mem':'1GB',
+                      'fast_load':'N',
+                      'verify_data':'N',
+                      'include_tables':[],
+                      'exclude_tables':[],
+                      'row_filters':{},
+                      'schema_mappings':[],
+                      'replication_slot':'psgres_cutover',
+                      'cutover_idle_secs':'10',
+                      'load_work_mem':'256MB',
+                      'extract_format':'CSV',
+                      'extract_compression':'zstd',
+                      'row_group_size':'1000000',
+                      'csv_engine':'COPY',
+                      'csv_compression':'',
+                      'csv_split_rows':'0',
+                      'csv_split_bytes':'0',
+                      'pool_size':'0',
+                      'max_connections':'0',
+                      'statement_timeout':'0',
+                      'metrics_file':'',
+                      'metrics_port':'0'}
 
 # Source database settings dictionary.
 # Note: All key values must be set.
@@ -389,101 +2782,102 @@ dst_db_settings = {'user':'postgres',
                    'schema':'human_resources'}
 
 # Execute psgres_to_psgres function.
-psgres_to_psgres(migration_settings,src_db_settings,dst_db_settings)
-
---- EXECUTION RESULTS ---
-
-*** Table Creation Processing Begin ***
-
-Table 'countries' created.
-
-Table 'locations' created.
-
-Table 'regions' created.
-
-Table 'departments' created.
-
-Table 'jobs' created.
-
-Table 'job_history' created.
-
-Table 'employees' created.
-
-Table 'sales_data' created.
-
-*** Table Creation Processing End ***
-
-*** Table Loading Processing Begin ***
-
-Loading 'countries' table...
-Load statistics for 'countries' table >>> Records Loaded: 25 | Load Time: 0:00:00.133472
-
-Loading 'locations' table...
-Load statistics for 'locations' table >>> Records Loaded: 23 | Load Time: 0:00:00.152871
-
-Loading 'regions' table...
-Load statistics for 'regions' table >>> Records Loaded: 4 | Load Time: 0:00:00.146267
-
-Loading 'departments' table...
-Load statistics for 'departments' table >>> Records Loaded: 27 | Load Time: 0:00:00.148110
-
-Loading 'jobs' table...
-Load statistics for 'jobs' table >>> Records Loaded: 19 | Load Time: 0:00:00.149591
-
-Loading 'job_history' table...
-Load statistics for 'job_history' table >>> Records Loaded: 11 | Load Time: 0:00:00.145235
-
-Loading 'employees' table...
-Load statistics for 'employees' table >>> Records Loaded: 50 | Load Time: 0:00:00.151338
-
-Loading 'sales_data' table...
-Load statistics for 'sales_data' table >>> Records Loaded: 2000000 | Load Time: 0:10:19.261824
-
-*** Table Loading Processing End ***
-
-*** Constraint Creation Processing Begin ***
-
-Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_email_uk UNIQUE (email)'
-
-Table regions constraint created: 'ALTER TABLE human_resources.regions ADD CONSTRAINT reg_id_pk PRIMARY KEY (region_id)'
-
-Table locations constraint created: 'ALTER TABLE human_resources.locations ADD CONSTRAINT loc_id_pk PRIMARY KEY (location_id)'
-
-Table departments constraint created: 'ALTER TABLE human_resources.departments ADD CONSTRAINT dept_id_pk PRIMARY KEY (department_id)'
-
-Table countries constraint created: 'ALTER TABLE human_resources.countries ADD CONSTRAINT country_c_id_pk PRIMARY KEY (country_id)'
-
-Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_emp_id_st_date_pk PRIMARY KEY (employee_id, start_date)'
-
-Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_id_pk PRIMARY KEY (employee_id)'
-
-Table jobs constraint created: 'ALTER TABLE human_resources.jobs ADD CONSTRAINT job_id_pk PRIMARY KEY (job_id)'
-
-Table locations constraint created: 'ALTER TABLE human_resources.locations ADD CONSTRAINT loc_c_id_fk FOREIGN KEY (country_id) REFERENCES human_resources.countries(country_id)'
-
-Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_job_fk FOREIGN KEY (job_id) REFERENCES human_resources.jobs(job_id)'
-
-Table sales_data constraint created: 'ALTER TABLE human_resources.sales_data ADD CONSTRAINT emp_id_emp_fk FOREIGN KEY (employee_id) REFERENCES human_resources.employees(employee_id) NOT VALID'
-
-Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_emp_fk FOREIGN KEY (employee_id) REFERENCES human_resources.employees(employee_id) NOT VALID'
-
-Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_job_fk FOREIGN KEY (job_id) REFERENCES human_resources.jobs(job_id)'
-
-Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_dept_fk FOREIGN KEY (department_id) REFERENCES human_resources.departments(department_id)'
-
-Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_manager_fk FOREIGN KEY (manager_id) REFERENCES human_resources.employees(employee_id)'
-
-Table countries constraint created: 'ALTER TABLE human_resources.countries ADD CONSTRAINT countr_reg_fk FOREIGN KEY (region_id) REFERENCES human_resources.regions(region_id)'
-
-Table departments constraint created: 'ALTER TABLE human_resources.departments ADD CONSTRAINT dept_loc_fk FOREIGN KEY (location_id) REFERENCES human_resources.locations(location_id)'
-
-Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_dept_fk FOREIGN KEY (department_id) REFERENCES human_resources.departments(department_id)'
-
-Table departments constraint created: 'ALTER TABLE human_resources.departments ADD CONSTRAINT dept_mgr_fk FOREIGN KEY (manager_id) REFERENCES human_resources.employees(employee_id) NOT VALID'
-
-Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_date_interval CHECK ((end_date > start_date))'
-
-Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_salary_min CHECK ((salary > (0)::numeric))'
-
-*** Constraint Creation Processing End ***
-[Finished in 629.8s]
+if __name__ == '__main__':
+    main()
+
+# --- EXECUTION RESULTS ---
+#
+# *** Table Creation Processing Begin ***
+#
+# Table 'countries' created.
+#
+# Table 'locations' created.
+#
+# Table 'regions' created.
+#
+# Table 'departments' created.
+#
+# Table 'jobs' created.
+#
+# Table 'job_history' created.
+#
+# Table 'employees' created.
+#
+# Table 'sales_data' created.
+#
+# *** Table Creation Processing End ***
+#
+# *** Table Loading Processing Begin ***
+#
+# Loading 'countries' table...
+# Load statistics for 'countries' table >>> Records Loaded: 25 | Load Time: 0:00:00.133472
+#
+# Loading 'locations' table...
+# Load statistics for 'locations' table >>> Records Loaded: 23 | Load Time: 0:00:00.152871
+#
+# Loading 'regions' table...
+# Load statistics for 'regions' table >>> Records Loaded: 4 | Load Time: 0:00:00.146267
+#
+# Loading 'departments' table...
+# Load statistics for 'departments' table >>> Records Loaded: 27 | Load Time: 0:00:00.148110
+#
+# Loading 'jobs' table...
+# Load statistics for 'jobs' table >>> Records Loaded: 19 | Load Time: 0:00:00.149591
+#
+# Loading 'job_history' table...
+# Load statistics for 'job_history' table >>> Records Loaded: 11 | Load Time: 0:00:00.145235
+#
+# Loading 'employees' table...
+# Load statistics for 'employees' table >>> Records Loaded: 50 | Load Time: 0:00:00.151338
+#
+# Loading 'sales_data' table...
+# Load statistics for 'sales_data' table >>> Records Loaded: 2000000 | Load Time: 0:10:19.261824
+#
+# *** Table Loading Processing End ***
+#
+# *** Constraint Creation Processing Begin ***
+#
+# Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_email_uk UNIQUE (email)'
+#
+# Table regions constraint created: 'ALTER TABLE human_resources.regions ADD CONSTRAINT reg_id_pk PRIMARY KEY (region_id)'
+#
+# Table locations constraint created: 'ALTER TABLE human_resources.locations ADD CONSTRAINT loc_id_pk PRIMARY KEY (location_id)'
+#
+# Table departments constraint created: 'ALTER TABLE human_resources.departments ADD CONSTRAINT dept_id_pk PRIMARY KEY (department_id)'
+#
+# Table countries constraint created: 'ALTER TABLE human_resources.countries ADD CONSTRAINT country_c_id_pk PRIMARY KEY (country_id)'
+#
+# Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_emp_id_st_date_pk PRIMARY KEY (employee_id, start_date)'
+#
+# Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_id_pk PRIMARY KEY (employee_id)'
+#
+# Table jobs constraint created: 'ALTER TABLE human_resources.jobs ADD CONSTRAINT job_id_pk PRIMARY KEY (job_id)'
+#
+# Table locations constraint created: 'ALTER TABLE human_resources.locations ADD CONSTRAINT loc_c_id_fk FOREIGN KEY (country_id) REFERENCES human_resources.countries(country_id)'
+#
+# Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_job_fk FOREIGN KEY (job_id) REFERENCES human_resources.jobs(job_id)'
+#
+# Table sales_data constraint created: 'ALTER TABLE human_resources.sales_data ADD CONSTRAINT emp_id_emp_fk FOREIGN KEY (employee_id) REFERENCES human_resources.employees(employee_id) NOT VALID'
+#
+# Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_emp_fk FOREIGN KEY (employee_id) REFERENCES human_resources.employees(employee_id) NOT VALID'
+#
+# Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_job_fk FOREIGN KEY (job_id) REFERENCES human_resources.jobs(job_id)'
+#
+# Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_dept_fk FOREIGN KEY (department_id) REFERENCES human_resources.departments(department_id)'
+#
+# Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_manager_fk FOREIGN KEY (manager_id) REFERENCES human_resources.employees(employee_id)'
+#
+# Table countries constraint created: 'ALTER TABLE human_resources.countries ADD CONSTRAINT countr_reg_fk FOREIGN KEY (region_id) REFERENCES human_resources.regions(region_id)'
+#
+# Table departments constraint created: 'ALTER TABLE human_resources.departments ADD CONSTRAINT dept_loc_fk FOREIGN KEY (location_id) REFERENCES human_resources.locations(location_id)'
+#
+# Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_dept_fk FOREIGN KEY (department_id) REFERENCES human_resources.departments(department_id)'
+#
+# Table departments constraint created: 'ALTER TABLE human_resources.departments ADD CONSTRAINT dept_mgr_fk FOREIGN KEY (manager_id) REFERENCES human_resources.employees(employee_id) NOT VALID'
+#
+# Table job_history constraint created: 'ALTER TABLE human_resources.job_history ADD CONSTRAINT jhist_date_interval CHECK ((end_date > start_date))'
+#
+# Table employees constraint created: 'ALTER TABLE human_resources.employees ADD CONSTRAINT emp_salary_min CHECK ((salary > (0)::numeric))'
+#
+# *** Constraint Creation Processing End ***
+# [Finished in 629.8s]
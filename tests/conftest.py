@@ -0,0 +1,64 @@
+# Shared fixtures of the tests. The tests that need a database run against a disposable
+# PostgreSQL cluster created with the benchmark's start_local_cluster in a temporary
+# directory. Set PSGRES_TEST_PG_BIN to the directory of initdb and pg_ctl, or put them
+# on the PATH; those tests are skipped when neither is found, or when psycopg2 isn't
+# installed. The tests that don't need a database run either way.
+
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import benchmark_pg_to_pg
+except ImportError:
+    benchmark_pg_to_pg = None
+import pg_to_pg_automate
+
+SRC_DATABASE = 'psgres_src'
+DST_DATABASE = 'psgres_dst'
+
+# Start a local cluster for the test session with a source and a destination database.
+# The cluster runs with wal_level 'logical' for the cutover tests. Yields the settings
+# of the cluster's 'postgres' database.
+@pytest.fixture(scope='session')
+def pg_cluster():
+    pytest.importorskip('psycopg2')
+    pg_bin = os.environ.get('PSGRES_TEST_PG_BIN') or os.path.dirname(shutil.which('initdb') or '')
+    if not pg_bin:
+        pytest.skip("initdb and pg_ctl not found; set PSGRES_TEST_PG_BIN.")
+    work_dir = tempfile.mkdtemp(prefix='psgres_test_')
+    port = benchmark_pg_to_pg.get_free_port()
+    db_info = {'user':'postgres','pwd':'postgres','host':work_dir,'port':str(port),'database':'postgres','schema':'public'}
+    try:
+        benchmark_pg_to_pg.start_local_cluster(pg_bin,work_dir,port,{'wal_level':'logical'})
+        benchmark_pg_to_pg.create_databases(db_info,[SRC_DATABASE,DST_DATABASE])
+        yield db_info
+    finally:
+        benchmark_pg_to_pg.stop_local_cluster(pg_bin,work_dir)
+        shutil.rmtree(work_dir,ignore_errors=True)
+
+# Get a function that creates a schema, empty, in both test databases and returns the
+# (src_db_info,dst_db_info) settings for it.
+@pytest.fixture
+def make_schemas(pg_cluster):
+    def make(schema):
+        src_db_info = dict(pg_cluster,database=SRC_DATABASE,schema=schema)
+        dst_db_info = dict(pg_cluster,database=DST_DATABASE,schema=schema)
+        benchmark_pg_to_pg.reset_schema(src_db_info)
+        benchmark_pg_to_pg.reset_schema(dst_db_info)
+        return src_db_info,dst_db_info
+    return make
+
+# Get a function that runs psgres_to_psgres with the default migration settings
+# overridden by the given ones.
+@pytest.fixture
+def migrate():
+    def run(src_db_info,dst_db_info,**settings):
+        migration_info = dict(pg_to_pg_automate.migration_settings,max_workers='2')
+        migration_info.update(settings)
+        pg_to_pg_automate.psgres_to_psgres(migration_info,dict(src_db_info),dict(dst_db_info))
+    return run
@@ -0,0 +1,27 @@
+# Database helpers shared by the tests. Importable without psycopg2, for test modules
+# that mix database tests with ones that don't need a database.
+
+try:
+    import benchmark_pg_to_pg
+except ImportError:
+    benchmark_pg_to_pg = None
+
+# Execute SQL statements in a database.
+def execute_sql(db_info,*sqlqrys):
+    db_conn = benchmark_pg_to_pg.connect(db_info)
+    db_cursor = db_conn.cursor()
+    for sqlqry in sqlqrys:
+        db_cursor.execute(sqlqry)
+    db_conn.commit()
+    db_cursor.close()
+    db_conn.close()
+
+# Get the rows of a table as text, ordered, for comparing tables across databases.
+def get_table_rows(db_info,table):
+    db_conn = benchmark_pg_to_pg.connect(db_info)
+    db_cursor = db_conn.cursor()
+    db_cursor.execute(f"SELECT tbl::text FROM {db_info['schema']}.{table} tbl ORDER BY 1")
+    rows = [row[0] for row in db_cursor.fetchall()]
+    db_cursor.close()
+    db_conn.close()
+    return rows
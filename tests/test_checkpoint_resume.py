@@ -0,0 +1,52 @@
+# Resume tests of tables below 'chunk_threshold_mb': a table of 'checkpoint_mb' or more
+# is loaded in chunks committed one after another, so after a load fails part way
+# through, a RESUME run loads only the chunks that weren't committed.
+
+import importlib.util
+import pytest
+import pg_to_pg_automate
+from pg_test_utils import execute_sql,get_table_rows
+
+SCHEMA = 'checkpoint_resume'
+CHUNK_LOADERS = {'COPY':('copy_table_data',7),'INSERT':('insert_table_data',6),'ASYNC':('copy_table_data_async',8)}
+
+# Wrap the chunk loader of a load engine to record the chunk id of each call and, when
+# fail_call is given, fail that call. CHUNK_LOADERS maps each engine to its loader and
+# the position of the loader's chunk id argument. Returns the list of recorded chunk ids.
+def record_chunks(monkeypatch,load_engine,fail_call=None):
+    loader_name,chunk_id_arg = CHUNK_LOADERS[load_engine]
+    loader = getattr(pg_to_pg_automate,loader_name)
+    chunk_ids = []
+    def record_chunk(chunk_id):
+        chunk_ids.append(chunk_id)
+        if len(chunk_ids) == fail_call:
+            raise OSError("Injected chunk failure.")
+    if load_engine == 'ASYNC':
+        async def load_chunk(*args):
+            record_chunk(args[chunk_id_arg])
+            return await loader(*args)
+    else:
+        def load_chunk(*args):
+            record_chunk(args[chunk_id_arg])
+            return loader(*args)
+    monkeypatch.setattr(pg_to_pg_automate,loader_name,load_chunk)
+    return chunk_ids
+
+@pytest.mark.parametrize('load_engine',['COPY','INSERT','ASYNC'])
+def test_resume_skips_committed_chunks(make_schemas,migrate,monkeypatch,capsys,load_engine):
+    if load_engine == 'ASYNC' and importlib.util.find_spec('asyncpg') is None:
+        pytest.skip("The ASYNC load engine requires the asyncpg package.")
+    src_db_info,dst_db_info = make_schemas(SCHEMA)
+    execute_sql(src_db_info,
+                f"CREATE TABLE {SCHEMA}.orders (id bigint PRIMARY KEY, note text)",
+                f"INSERT INTO {SCHEMA}.orders SELECT n, repeat(md5(n::text),4) FROM generate_series(1,30000) n")
+    with monkeypatch.context() as patch:
+        chunk_ids = record_chunks(patch,load_engine,fail_call=2)
+        migrate(src_db_info,dst_db_info,load_engine=load_engine,checkpoint_mb='1',batch_size='1000')
+    assert "Table 'orders' failed to load" in capsys.readouterr().out
+    assert chunk_ids[:2] == [1,2]
+    with monkeypatch.context() as patch:
+        resumed_chunk_ids = record_chunks(patch,load_engine)
+        migrate(src_db_info,dst_db_info,load_engine=load_engine,checkpoint_mb='1',batch_size='1000',run_mode='RESUME')
+    assert resumed_chunk_ids and 1 not in resumed_chunk_ids
+    assert get_table_rows(dst_db_info,'orders') == get_table_rows(src_db_info,'orders')
@@ -0,0 +1,31 @@
+# Tests of load_migration_config: the JSON config file's values are typed as the
+# settings dictionaries hold them, and a config that can't be used stops the run
+# with "Migration settings failed to load".
+
+import json
+import pytest
+import pg_to_pg_automate
+
+# Write a JSON config file and get the command line arguments that load it.
+def write_config(tmp_path,config):
+    config_path = tmp_path / 'migration.json'
+    config_path.write_text(json.dumps(config),encoding='utf-8')
+    return ['--config',str(config_path)]
+
+def test_config_numbers_load_as_text(tmp_path):
+    argv = write_config(tmp_path,{'migration_settings':{'max_workers':8,'include_tables':['orders']},
+                                  'src_db_settings':{'port':5432},'dst_db_settings':{'port':6432}})
+    migration_info,src_db_info,dst_db_info = pg_to_pg_automate.load_migration_config(pg_to_pg_automate.parse_args(argv),{})
+    assert migration_info['max_workers'] == '8' and migration_info['include_tables'] == ['orders']
+    assert src_db_info['port'] == '5432' and dst_db_info['port'] == '6432'
+    assert pg_to_pg_automate.confirm_src_db_params_set(src_db_info) == pg_to_pg_automate.YES
+
+@pytest.mark.parametrize('config',[{'src_db_settings':{'port':None}},
+                                   {'dst_db_settings':{'pwd':True}},
+                                   {'migration_settings':{'include_tables':'orders'}},
+                                   {'src_db_settings':['localhost']}])
+def test_bad_config_fails_to_load(tmp_path,capsys,config):
+    with pytest.raises(SystemExit) as exit_info:
+        pg_to_pg_automate.main(write_config(tmp_path,config))
+    assert exit_info.value.code == 1
+    assert "Migration settings failed to load" in capsys.readouterr().out
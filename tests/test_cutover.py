@@ -0,0 +1,76 @@
+# End-to-end test of the CUTOVER run mode: a writer keeps inserting, updating and
+# deleting rows in the source database while the tables are loaded from the
+# replication slot's snapshot and its changes are applied, and once the writer stops
+# and the apply finishes the destination tables must equal the source tables.
+
+import re
+import time
+import random
+import threading
+import pytest
+pytest.importorskip('psycopg2')
+import benchmark_pg_to_pg
+from pg_test_utils import execute_sql,get_table_rows
+
+SCHEMA = 'cutover'
+WRITE_SECS = 3
+
+# Write to the source tables for WRITE_SECS seconds, one transaction per change set.
+# Order updates leave the TOASTed doc column unchanged; events and tags have no primary
+# key and are replicated with FULL replica identity, NULLs included. Tags come in
+# identical pairs, with json and point columns that have no equality operator, and
+# each update or delete changes only one row of a pair.
+def write_changes(src_db_info,write_errors):
+    db_conn = benchmark_pg_to_pg.connect(src_db_info)
+    db_cursor = db_conn.cursor()
+    next_id = 1001
+    try:
+        end_time = time.monotonic() + WRITE_SECS
+        while time.monotonic() < end_time:
+            order_id = random.randint(1,next_id - 1)
+            db_cursor.execute(f"INSERT INTO {SCHEMA}.orders VALUES (%s,'new',repeat(md5(%s::text),400))",(next_id,next_id))
+            db_cursor.execute(f"UPDATE {SCHEMA}.orders SET status = 'paid' WHERE id = %s",(order_id,))
+            db_cursor.execute(f"DELETE FROM {SCHEMA}.orders WHERE id = %s",(order_id - 1,))
+            db_cursor.execute(f"INSERT INTO {SCHEMA}.events VALUES (%s,%s,NULL)",(next_id,f"order {next_id}"))
+            db_cursor.execute(f"UPDATE {SCHEMA}.events SET note = 'seen' WHERE order_id = %s",(order_id,))
+            db_cursor.execute(f"DELETE FROM {SCHEMA}.events WHERE order_id = %s",(order_id - 2,))
+            db_cursor.execute(f"INSERT INTO {SCHEMA}.tags SELECT %s, json_build_object('order',%s), point(%s,0) FROM generate_series(1,2)",
+                              (str(next_id),next_id,next_id))
+            db_cursor.execute(f"UPDATE {SCHEMA}.tags SET label = 'seen' WHERE ctid = "
+                              f"(SELECT ctid FROM {SCHEMA}.tags WHERE label = %s LIMIT 1)",(str(order_id),))
+            db_cursor.execute(f"DELETE FROM {SCHEMA}.tags WHERE ctid = (SELECT ctid FROM {SCHEMA}.tags WHERE label = %s LIMIT 1)",
+                              (str(order_id - 1),))
+            db_conn.commit()
+            next_id = next_id + 1
+            time.sleep(0.01)
+    except Exception as errmsg:
+        write_errors.append(errmsg)
+    finally:
+        db_cursor.close()
+        db_conn.close()
+
+def test_cutover_applies_concurrent_changes(make_schemas,migrate,capsys):
+    src_db_info,dst_db_info = make_schemas(SCHEMA)
+    execute_sql(src_db_info,
+                f"CREATE TABLE {SCHEMA}.orders (id integer PRIMARY KEY, status text, doc text)",
+                f"INSERT INTO {SCHEMA}.orders SELECT n, 'new', repeat(md5(n::text),400) FROM generate_series(1,1000) n",
+                f"CREATE TABLE {SCHEMA}.events (order_id integer, label text, note text)",
+                f"ALTER TABLE {SCHEMA}.events REPLICA IDENTITY FULL",
+                f"INSERT INTO {SCHEMA}.events SELECT n, 'order ' || n, NULL FROM generate_series(1,1000) n",
+                f"CREATE TABLE {SCHEMA}.tags (label text, doc json, spot point)",
+                f"ALTER TABLE {SCHEMA}.tags REPLICA IDENTITY FULL",
+                f"INSERT INTO {SCHEMA}.tags SELECT n::text, json_build_object('order',n), point(n,0) "
+                "FROM generate_series(1,1000) n, generate_series(1,2)")
+    write_errors = []
+    writer_thread = threading.Thread(target=write_changes,args=(src_db_info,write_errors))
+    writer_thread.start()
+    try:
+        migrate(src_db_info,dst_db_info,run_mode='CUTOVER',cutover_idle_secs='2',batch_size='500')
+    finally:
+        writer_thread.join()
+    output = capsys.readouterr().out
+    assert not write_errors
+    assert int(re.search(r"Cutover statistics >>> Transactions: \d+ \| Changes Applied: (\d+)",output).group(1)) > 0
+    for table in ['orders','events','tags']:
+        assert get_table_rows(dst_db_info,table) == get_table_rows(src_db_info,table)
+    execute_sql(src_db_info,"DO $$ BEGIN ASSERT NOT EXISTS (SELECT 1 FROM pg_catalog.pg_replication_slots); END $$")
@@ -0,0 +1,56 @@
+# Tests of the NDJSON export: a failed export raises, leaves no partly written file
+# behind and makes the command line exit with a non-zero status.
+
+import os
+import sys
+import json
+import subprocess
+import pytest
+pytest.importorskip('psycopg2')
+import extract_data_from_postgresql
+from pg_test_utils import execute_sql
+
+SCHEMA = 'extract_ndjson'
+
+@pytest.fixture
+def students(make_schemas):
+    src_db_info,dst_db_info = make_schemas(SCHEMA)
+    execute_sql(src_db_info,
+                f"CREATE TABLE {SCHEMA}.students (student_id integer PRIMARY KEY, first_name text, last_name text)",
+                f"INSERT INTO {SCHEMA}.students SELECT n, 'first ' || n, CASE WHEN n = 2500 THEN '' ELSE 'last' END "
+                "FROM generate_series(1,3000) n")
+    return src_db_info
+
+# Title a name, failing on an empty one.
+def title_name(name):
+    if not name:
+        raise ValueError("Empty name.")
+    return name.title()
+
+@pytest.mark.parametrize('compression',['','GZIP'])
+def test_export_writes_every_row(students,tmp_path,compression):
+    filename = str(tmp_path / 'students.json')
+    rowcnt = extract_data_from_postgresql.export_table_to_ndjson(students,'students',filename,
+                                                                 transforms={'first_name':str.title},compression=compression)
+    assert rowcnt == 3000
+    if not compression:
+        with open(filename,encoding='utf-8') as file_object:
+            assert json.loads(file_object.readline()) == {'student_id':1,'first_name':'First 1','last_name':'last'}
+
+@pytest.mark.parametrize('compression',['','GZIP'])
+def test_failed_export_raises_and_removes_file(students,tmp_path,compression):
+    filename = str(tmp_path / 'students.json')
+    with pytest.raises(ValueError):
+        extract_data_from_postgresql.export_table_to_ndjson(students,'students',filename,transforms={'last_name':title_name},
+                                                             compression=compression,batch_size=1000)
+    assert not os.path.exists(filename)
+
+def test_failed_export_exits_non_zero(students,tmp_path):
+    filename = str(tmp_path / 'missing.json')
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db_args = [arg for key in ['user','pwd','host','port','database','schema'] for arg in [f'--{key}',students[key]]]
+    result = subprocess.run([sys.executable,os.path.join(repo_dir,'extract_data_from_postgresql.py'),'no_such_table',
+                             '--output',filename] + db_args,capture_output=True,text=True)
+    assert result.returncode == 1
+    assert "Error while exporting data from PostgreSQL" in result.stdout
+    assert not os.path.exists(filename)
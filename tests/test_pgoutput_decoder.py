@@ -0,0 +1,148 @@
+# Unit tests of the pgoutput decoder of the cutover: synthetic protocol version 1
+# messages are turned into change statements without a database. The cursor stub
+# returns each statement with its parameters instead of mogrifying them.
+
+import struct
+from pg_to_pg_automate import UNCHANGED_TOAST,get_change_statements,read_pgoutput_tuple,get_lsn_value,get_lsn_text
+
+ORDERS_ID = 16400
+NOTES_ID = 16401
+TAGS_ID = 16402
+TEXT_OID = 25
+JSON_OID = 114
+DST_SCHEMAS = {'sales':'sales_copy'}
+
+# Cursor stub whose mogrify returns the statement and its parameters.
+class StatementCursor:
+    def mogrify(self,sqlqry,params):
+        return sqlqry,list(params)
+
+# Build the TupleData of a message: None for a null and UNCHANGED_TOAST for an
+# unchanged TOASTed value.
+def tuple_data(values):
+    data = struct.pack('>h',len(values))
+    for value in values:
+        if value is None:
+            data += b'n'
+        elif value is UNCHANGED_TOAST:
+            data += b'u'
+        else:
+            value = value.encode('utf-8')
+            data += b't' + struct.pack('>i',len(value)) + value
+    return data
+
+# Build a Begin message.
+def begin_message(final_lsn,xid):
+    return b'B' + struct.pack('>QqI',final_lsn,0,xid)
+
+# Build a Commit message of a transaction that ends at end_lsn.
+def commit_message(end_lsn):
+    return b'C' + struct.pack('>BQQq',0,end_lsn - 8,end_lsn,0)
+
+# Build a Relation message; columns are (name,is_key,type_oid) tuples.
+def relation_message(relation_id,schema,table,columns):
+    message = b'R' + struct.pack('>I',relation_id) + schema.encode() + b'\x00' + table.encode() + b'\x00d' + struct.pack('>h',len(columns))
+    for column,is_key,type_oid in columns:
+        message += struct.pack('>B',1 if is_key else 0) + column.encode() + b'\x00' + struct.pack('>Ii',type_oid,-1)
+    return message
+
+# Build an Insert message.
+def insert_message(relation_id,new_values):
+    return b'I' + struct.pack('>I',relation_id) + b'N' + tuple_data(new_values)
+
+# Build an Update message, with the old key ('K') or old row ('O') values when old_type is set.
+def update_message(relation_id,new_values,old_type=b'',old_values=None):
+    return b'U' + struct.pack('>I',relation_id) + (old_type + tuple_data(old_values) if old_type else b'') + b'N' + tuple_data(new_values)
+
+# Build a Delete message with the old key ('K') or old row ('O') values.
+def delete_message(relation_id,old_type,old_values):
+    return b'D' + struct.pack('>I',relation_id) + old_type + tuple_data(old_values)
+
+# Build a Truncate message.
+def truncate_message(relation_ids,cascade=False):
+    return b'T' + struct.pack(f'>iB{len(relation_ids)}I',len(relation_ids),1 if cascade else 0,*relation_ids)
+
+RELATION_MESSAGES = [relation_message(ORDERS_ID,'sales','orders',[('id',True,TEXT_OID),('status',False,TEXT_OID),('note',False,TEXT_OID)]),
+                     relation_message(NOTES_ID,'sales','notes',[('id',False,TEXT_OID),('body',False,TEXT_OID)]),
+                     relation_message(TAGS_ID,'sales','tags',[('tag',False,TEXT_OID),('doc',False,JSON_OID)])]
+
+# Decode a batch of messages with the default relations and destination schemas, json
+# being the only type without equality.
+def decode(messages,applied_lsn=0,relations=None):
+    relations = {} if relations is None else relations
+    return get_change_statements(StatementCursor(),messages,relations,DST_SCHEMAS,applied_lsn,'utf_8',{JSON_OID})
+
+def test_insert_update_delete_truncate():
+    sqlqrys,end_lsn,changes,transactions = decode(RELATION_MESSAGES + [
+        begin_message(0x200,7),
+        insert_message(ORDERS_ID,['1','new','first order']),
+        update_message(ORDERS_ID,['1','paid','first order']),
+        update_message(ORDERS_ID,['2','paid','second order'],b'K',['1',None,None]),
+        delete_message(ORDERS_ID,b'K',['2',None,None]),
+        truncate_message([ORDERS_ID,NOTES_ID],cascade=True),
+        commit_message(0x200)])
+    assert sqlqrys == [("INSERT INTO sales_copy.orders (id, status, note) VALUES (%s, %s, %s)",['1','new','first order']),
+                       ("UPDATE sales_copy.orders SET id = %s, status = %s, note = %s WHERE id = %s",['1','paid','first order','1']),
+                       ("UPDATE sales_copy.orders SET id = %s, status = %s, note = %s WHERE id = %s",['2','paid','second order','1']),
+                       ("DELETE FROM sales_copy.orders WHERE id = %s",['2']),
+                       b"TRUNCATE sales_copy.orders, sales_copy.notes CASCADE"]
+    assert (end_lsn,changes,transactions) == (0x200,5,1)
+
+def test_unchanged_toast_values_are_left_alone():
+    sqlqrys,end_lsn,changes,transactions = decode(RELATION_MESSAGES + [
+        begin_message(0x300,8),
+        update_message(ORDERS_ID,['1','shipped',UNCHANGED_TOAST]),
+        update_message(NOTES_ID,['5','edited'],b'O',['5',UNCHANGED_TOAST]),
+        commit_message(0x300)])
+    assert sqlqrys == [("UPDATE sales_copy.orders SET id = %s, status = %s WHERE id = %s",['1','shipped','1']),
+                       ("UPDATE sales_copy.notes SET id = %s, body = %s "
+                        "WHERE ctid = (SELECT ctid FROM sales_copy.notes WHERE id = %s LIMIT 1)",['5','edited','5'])]
+
+def test_null_keys_match_with_is_null():
+    sqlqrys,end_lsn,changes,transactions = decode(RELATION_MESSAGES + [
+        begin_message(0x400,9),
+        delete_message(NOTES_ID,b'O',['6',None]),
+        update_message(NOTES_ID,[None,'text'],b'O',[None,None]),
+        commit_message(0x400)])
+    assert sqlqrys == [("DELETE FROM sales_copy.notes WHERE ctid = (SELECT ctid FROM sales_copy.notes WHERE id = %s AND body IS NULL LIMIT 1)",
+                        ['6']),
+                       ("UPDATE sales_copy.notes SET id = %s, body = %s "
+                        "WHERE ctid = (SELECT ctid FROM sales_copy.notes WHERE id IS NULL AND body IS NULL LIMIT 1)",[None,'text'])]
+
+def test_full_identity_changes_one_of_identical_rows():
+    sqlqrys,end_lsn,changes,transactions = decode(RELATION_MESSAGES + [
+        begin_message(0x480,14),
+        insert_message(TAGS_ID,['red','{"w": 1}']),
+        insert_message(TAGS_ID,['red','{"w": 1}']),
+        update_message(TAGS_ID,['blue','{"w": 1}'],b'O',['red','{"w": 1}']),
+        delete_message(TAGS_ID,b'O',['red','{"w": 1}']),
+        commit_message(0x480)])
+    assert sqlqrys[2:] == [("UPDATE sales_copy.tags SET tag = %s, doc = %s WHERE ctid = "
+                            "(SELECT ctid FROM sales_copy.tags WHERE tag = %s AND doc::text = %s LIMIT 1)",['blue','{"w": 1}','red','{"w": 1}']),
+                           ("DELETE FROM sales_copy.tags WHERE ctid = "
+                            "(SELECT ctid FROM sales_copy.tags WHERE tag = %s AND doc::text = %s LIMIT 1)",['red','{"w": 1}'])]
+    assert (end_lsn,changes,transactions) == (0x480,4,1)
+
+def test_applied_transactions_are_skipped():
+    messages = RELATION_MESSAGES + [begin_message(0x100,10),insert_message(ORDERS_ID,['1','new',None]),commit_message(0x100),
+                                    begin_message(0x180,11),insert_message(ORDERS_ID,['2','new',None]),commit_message(0x180),
+                                    begin_message(0x200,12),insert_message(ORDERS_ID,['3','new',None]),commit_message(0x200)]
+    sqlqrys,end_lsn,changes,transactions = decode(messages,applied_lsn=0x180)
+    assert sqlqrys == [("INSERT INTO sales_copy.orders (id, status, note) VALUES (%s, %s, %s)",['3','new',None])]
+    assert (end_lsn,changes,transactions) == (0x200,1,1)
+    assert decode(messages,applied_lsn=0x200)[1:] == (0x200,0,0)
+
+def test_relations_are_kept_across_batches():
+    relations = {}
+    decode(RELATION_MESSAGES,relations=relations)
+    sqlqrys = decode([begin_message(0x500,13),delete_message(ORDERS_ID,b'K',['9',None,None]),commit_message(0x500)],relations=relations)[0]
+    assert sqlqrys == [("DELETE FROM sales_copy.orders WHERE id = %s",['9'])]
+    assert relations[ORDERS_ID]['key_columns'] == ['id']
+
+def test_read_tuple_and_lsn_text():
+    message = b'xx' + tuple_data(['café',None,UNCHANGED_TOAST,'']) + b'rest'
+    values,pos = read_pgoutput_tuple(message,2,'utf_8')
+    assert values == ['café',None,UNCHANGED_TOAST,''] and message[pos:] == b'rest'
+    assert get_lsn_value('16/B374D848') == 0x16B374D848
+    assert get_lsn_text(0x16B374D848) == '16/B374D848'
+    assert get_lsn_text(get_lsn_value('0/0')) == '0/0'
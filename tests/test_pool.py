@@ -0,0 +1,67 @@
+# Tests of the connection pool cap: a pool never opens more than 'max_connections'
+# connections, nested checkouts by table and chunk workers don't deadlock at the
+# smallest limits the settings accept, and smaller limits are rejected.
+
+import time
+import threading
+import pytest
+import pg_to_pg_automate
+from pg_test_utils import execute_sql,get_table_rows
+
+SCHEMA = 'pool_cap'
+
+# Check connections out of a pool from thread_count threads, nested_count at a time
+# per thread, and get the largest number checked out at once.
+def get_peak_checkouts(db_pool,thread_count,nested_count):
+    checkouts = {'now':0,'peak':0}
+    lock = threading.Lock()
+    def hold_conns():
+        db_conns = []
+        for _ in range(nested_count):
+            db_conns.append(db_pool.checkout())
+            with lock:
+                checkouts['now'] += 1
+                checkouts['peak'] = max(checkouts['peak'],checkouts['now'])
+        time.sleep(0.05)
+        for db_conn in db_conns:
+            with lock:
+                checkouts['now'] -= 1
+            db_pool.checkin(db_conn)
+    threads = [threading.Thread(target=hold_conns) for _ in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+    assert not any(thread.is_alive() for thread in threads)
+    return checkouts['peak']
+
+@pytest.mark.parametrize('nested_count,max_peak',[(1,2),(2,3)])
+def test_pool_never_exceeds_cap(pg_cluster,nested_count,max_peak):
+    db_pool = pg_to_pg_automate.DbConnectionPool(pg_cluster,2,'0',3)
+    try:
+        assert get_peak_checkouts(db_pool,6,nested_count) <= max_peak
+        assert len(db_pool.idle_conns) <= 2 and not db_pool.conn_slots and not db_pool.thread_conns
+    finally:
+        db_pool.close()
+
+def test_chunked_load_at_smallest_limits(make_schemas,migrate):
+    src_db_info,dst_db_info = make_schemas(SCHEMA)
+    for table in ['orders','invoices','payments']:
+        execute_sql(src_db_info,
+                    f"CREATE TABLE {SCHEMA}.{table} (id integer PRIMARY KEY, note text)",
+                    f"INSERT INTO {SCHEMA}.{table} SELECT n, md5(n::text) FROM generate_series(1,2000) n")
+    migrate_thread = threading.Thread(target=migrate,args=(src_db_info,dst_db_info),daemon=True,
+                                      kwargs={'max_workers':'2','pool_size':'7','max_connections':'14','chunk_threshold_mb':'0'})
+    migrate_thread.start()
+    migrate_thread.join(timeout=120)
+    assert not migrate_thread.is_alive()
+    for table in ['orders','invoices','payments']:
+        assert get_table_rows(dst_db_info,table) == get_table_rows(src_db_info,table)
+
+@pytest.mark.parametrize('settings,message',[({'pool_size':'6'},"'pool_size' parameter to 0 or to at least 7"),
+                                             ({'pool_size':'7','max_connections':'13'},"'max_connections' parameter to 0 or to at least 14"),
+                                             ({'max_connections':'many'},"'max_connections' parameter to a whole number")])
+def test_small_pool_limits_rejected(capsys,settings,message):
+    migration_info = dict(pg_to_pg_automate.migration_settings,max_workers='2',**settings)
+    assert pg_to_pg_automate.confirm_migration_params_set(migration_info) == pg_to_pg_automate.NO
+    assert message in capsys.readouterr().out
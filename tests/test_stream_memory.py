@@ -0,0 +1,61 @@
+# Memory tests of the streamed table reads: the rows of a table are streamed through
+# stream_table_rows and extracted with create_csv_files in a fresh subprocess, once
+# for a table of N rows and once for one of 10 x N rows, and the peak RSS of the
+# subprocess must not grow with the row count.
+
+import os
+import sys
+import json
+import subprocess
+import importlib.util
+import pytest
+from pg_test_utils import execute_sql
+
+SCHEMA = 'stream_memory'
+ROW_COUNT = 20000
+MAX_RSS_GROWTH_MB = 12
+STREAM_SCRIPT = """
+import sys, json, resource
+sys.path.insert(0,sys.argv[1])
+import pg_to_pg_automate as pg
+mode,table,src_db_info,extract_dir = sys.argv[2],sys.argv[3],json.loads(sys.argv[4]),sys.argv[5]
+migration_info = dict(pg.migration_settings,extract_csv_dir=extract_dir,include_tables=[table],batch_size='1000',max_workers='1',
+                      csv_engine='PANDAS' if mode == 'pandas' else 'COPY')
+pg.open_db_pools(migration_info,src_db_info)
+if mode == 'stream':
+    src_db_conn = pg.get_db_pool(src_db_info).checkout()
+    rowcnt = sum(len(tabledata) for tabledata in pg.stream_table_rows(src_db_conn,src_db_info,table,1000))
+    pg.get_db_pool(src_db_info).checkin(src_db_conn)
+    assert rowcnt > 0
+else:
+    pg.create_csv_files(migration_info,src_db_info)
+pg.close_db_pools()
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+@pytest.fixture
+def stream_tables(make_schemas):
+    src_db_info,dst_db_info = make_schemas(SCHEMA)
+    for table,rowcnt in [('rows_n',ROW_COUNT),('rows_10n',ROW_COUNT * 10)]:
+        execute_sql(src_db_info,
+                    f"CREATE TABLE {SCHEMA}.{table} (id integer PRIMARY KEY, amount numeric(12,2), note text)",
+                    f"INSERT INTO {SCHEMA}.{table} SELECT n, n / 100.0, repeat(md5(n::text),6) FROM generate_series(1,{rowcnt}) n")
+    return src_db_info
+
+# Get the peak RSS in megabytes of a subprocess that streams or extracts a table.
+def get_peak_rss_mb(mode,table,src_db_info,extract_dir):
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable,'-c',STREAM_SCRIPT,repo_dir,mode,table,json.dumps(src_db_info),str(extract_dir)],
+                            check=True,capture_output=True,text=True)
+    return int(result.stdout.split()[-1]) / 1024
+
+@pytest.mark.parametrize('mode',['stream','csv','pandas'])
+def test_peak_rss_flat_as_row_count_grows(stream_tables,tmp_path,mode):
+    if mode == 'pandas' and importlib.util.find_spec('pandas') is None:
+        pytest.skip("The PANDAS CSV engine requires the pandas package.")
+    small_rss_mb = get_peak_rss_mb(mode,'rows_n',stream_tables,tmp_path)
+    large_rss_mb = get_peak_rss_mb(mode,'rows_10n',stream_tables,tmp_path)
+    assert large_rss_mb - small_rss_mb < MAX_RSS_GROWTH_MB
+    if mode != 'stream':
+        extract_files = sorted(file.name for file in tmp_path.iterdir())
+        assert len(extract_files) == 2 and all(file.startswith('pgres_extract_rows_') for file in extract_files)
@@ -0,0 +1,95 @@
+# Round-trip tests of the built-in types through every load path: a table with one
+# column per built-in type, with edge values and NULLs, is migrated with COPY BINARY,
+# COPY TEXT, INSERT and ASYNC, and its rows must come out equal in the destination.
+
+import importlib.util
+import pytest
+from pg_test_utils import execute_sql,get_table_rows
+
+SCHEMA = 'type_roundtrip'
+TYPE_COLUMNS = [('c_smallint','smallint',"32767","-32768"),
+                ('c_integer','integer',"2147483647","-2147483648"),
+                ('c_bigint','bigint',"9223372036854775807","-9223372036854775808"),
+                ('c_numeric','numeric',"12345678901234567890.123456789","'NaN'"),
+                ('c_numeric_scaled','numeric(12,4)',"-99999999.9999","0"),
+                ('c_real','real',"'3.4e38'","'-Infinity'"),
+                ('c_double','double precision',"'1.7976931348623157e308'","'NaN'"),
+                ('c_money','money',"'-92233720368547758.08'","'0.01'"),
+                ('c_boolean','boolean',"true","false"),
+                ('c_char','char(5)',"'ab'","'None'"),
+                ('c_varchar','varchar(20)',"'it''s \"quoted\"'","''"),
+                ('c_text','text',"'None'",r"E'tab\there\nnew line \\ back, comma'"),
+                ('c_bytea','bytea',r"'\x00ff10'","''::bytea"),
+                ('c_date','date',"'infinity'","'-infinity'"),
+                ('c_time','time',"'23:59:59.999999'","'00:00'"),
+                ('c_timetz','timetz',"'12:34:56+05:30'","'00:00-12'"),
+                ('c_timestamp','timestamp',"'infinity'","'4713-01-01 00:00 BC'"),
+                ('c_timestamptz','timestamptz',"'-infinity'","'2024-02-29 23:59:59.123456+14'"),
+                ('c_interval','interval',"'1 year 2 mons 3 days 04:05:06.789'","'-178000000 years'"),
+                ('c_uuid','uuid',"'a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11'","'00000000-0000-0000-0000-000000000000'"),
+                ('c_json','json',"'{\"b\": [1, 2.50, null], \"a\": \"\\u00e9\"}'","'\"None\"'"),
+                ('c_jsonb','jsonb',"'{\"b\": [1, 2.50, null], \"a\": \"x\"}'","'null'"),
+                ('c_inet','inet',"'192.168.0.1/24'","'::1'"),
+                ('c_cidr','cidr',"'10.0.0.0/8'","'2001:db8::/32'"),
+                ('c_macaddr','macaddr',"'08:00:2b:01:02:03'","'00:00:00:00:00:00'"),
+                ('c_macaddr8','macaddr8',"'08:00:2b:01:02:03:04:05'","'00:00:00:ff:fe:00:00:00'"),
+                ('c_bit','bit(4)',"B'1010'","B'0000'"),
+                ('c_varbit','varbit',"B'1'","B''"),
+                ('c_point','point',"'(1.5,-2)'","'(0,0)'"),
+                ('c_line','line',"'{1,-1,0}'","'{0,1,2}'"),
+                ('c_lseg','lseg',"'[(0,0),(1,1)]'","'[(1,2),(3,4)]'"),
+                ('c_box','box',"'(1,1),(0,0)'","'(2,2),(2,2)'"),
+                ('c_path','path',"'[(0,0),(1,1),(2,0)]'","'((0,0),(1,1))'"),
+                ('c_polygon','polygon',"'((0,0),(1,1),(1,0))'","'((0,0))'"),
+                ('c_circle','circle',"'<(0,0),1.5>'","'<(1,1),0>'"),
+                ('c_tsvector','tsvector',"'a fat:2 cat:3'","''"),
+                ('c_tsquery','tsquery',"'fat & (rat | cat)'","'none'"),
+                ('c_int4range','int4range',"'[1,10)'","'empty'"),
+                ('c_int8range','int8range',"'(,100]'","'[5,)'"),
+                ('c_numrange','numrange',"'[1.5,2.5]'","'(,)'"),
+                ('c_tstzrange','tstzrange',"'[2024-01-01 00:00+00,infinity)'","'empty'"),
+                ('c_daterange','daterange',"'[2024-01-01,2024-12-31]'","'(,)'"),
+                ('c_oid','oid',"4294967295","0"),
+                ('c_pg_lsn','pg_lsn',"'16/B374D848'","'0/0'"),
+                ('c_int_array','integer[]',"'{1,NULL,3}'","'{}'"),
+                ('c_int_matrix','integer[]',"'{{1,2},{3,4}}'","'[0:1]={5,6}'"),
+                ('c_text_array','text[]',"'{\"None\",NULL,\"a,b\",\"q\\\"uote\",\"\"}'","'{NULL}'"),
+                ('c_numeric_array','numeric[]',"'{1.10,NaN,-0.0001}'","'{}'"),
+                ('c_bytea_array','bytea[]',r"ARRAY['\x00'::bytea,NULL]","'{}'"),
+                ('c_jsonb_array','jsonb[]',"ARRAY['{\"a\": 1}'::jsonb,'[]']","'{}'"),
+                ('c_timestamptz_array','timestamptz[]',"'{infinity,\"2024-01-01 00:00+00\"}'","'{-infinity}'"),
+                ('c_interval_array','interval[]',"'{\"1 mon\",\"-1 day\"}'","'{}'"),
+                ('c_uuid_array','uuid[]',"'{a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11}'","'{}'")]
+LOAD_PATHS = [('COPY','BINARY'),('COPY','TEXT'),('INSERT','BINARY'),('ASYNC','BINARY'),('ASYNC','TEXT')]
+
+# Create the table of built-in types in the source schema, with a row of typical
+# values, a row of edge values and a row of NULLs.
+def create_type_table(src_db_info):
+    columns = ", ".join(f"{column} {column_type}" for column,column_type,typical_value,edge_value in TYPE_COLUMNS)
+    column_names = ", ".join(column for column,column_type,typical_value,edge_value in TYPE_COLUMNS)
+    typical_values = ", ".join(typical_value for column,column_type,typical_value,edge_value in TYPE_COLUMNS)
+    edge_values = ", ".join(edge_value for column,column_type,typical_value,edge_value in TYPE_COLUMNS)
+    execute_sql(src_db_info,
+                f"CREATE TABLE {SCHEMA}.builtin_types (id integer PRIMARY KEY, {columns})",
+                f"INSERT INTO {SCHEMA}.builtin_types (id, {column_names}) VALUES (1, {typical_values}), (2, {edge_values})",
+                f"INSERT INTO {SCHEMA}.builtin_types (id) VALUES (3)")
+
+@pytest.mark.parametrize('load_engine,copy_format',LOAD_PATHS)
+def test_builtin_types_round_trip(make_schemas,migrate,load_engine,copy_format):
+    if load_engine == 'ASYNC' and importlib.util.find_spec('asyncpg') is None:
+        pytest.skip("The ASYNC load engine requires the asyncpg package.")
+    src_db_info,dst_db_info = make_schemas(SCHEMA)
+    create_type_table(src_db_info)
+    migrate(src_db_info,dst_db_info,load_engine=load_engine,copy_format=copy_format)
+    src_rows = get_table_rows(src_db_info,'builtin_types')
+    assert len(src_rows) == 3
+    assert get_table_rows(dst_db_info,'builtin_types') == src_rows
+
+@pytest.mark.parametrize('load_engine,copy_format',LOAD_PATHS)
+def test_builtin_types_round_trip_in_chunks(make_schemas,migrate,load_engine,copy_format):
+    if load_engine == 'ASYNC' and importlib.util.find_spec('asyncpg') is None:
+        pytest.skip("The ASYNC load engine requires the asyncpg package.")
+    src_db_info,dst_db_info = make_schemas(SCHEMA)
+    create_type_table(src_db_info)
+    migrate(src_db_info,dst_db_info,load_engine=load_engine,copy_format=copy_format,chunk_threshold_mb='0')
+    assert get_table_rows(dst_db_info,'builtin_types') == get_table_rows(src_db_info,'builtin_types')
@@ -0,0 +1,36 @@
+# Tests of verify_data. The destination database runs with different TimeZone,
+# DateStyle, IntervalStyle, extra_float_digits and bytea_output defaults than the
+# source, as an RDS instance in UTC would, and identical data must still verify.
+
+import pytest
+from conftest import DST_DATABASE
+from pg_test_utils import execute_sql
+
+SCHEMA = 'verify_data'
+
+@pytest.fixture
+def dst_session_defaults(pg_cluster):
+    db_info = dict(pg_cluster,database='postgres')
+    execute_sql(db_info,f"ALTER DATABASE {DST_DATABASE} SET TimeZone = 'Asia/Kolkata'",
+                        f"ALTER DATABASE {DST_DATABASE} SET DateStyle = 'SQL, DMY'",
+                        f"ALTER DATABASE {DST_DATABASE} SET IntervalStyle = 'iso_8601'",
+                        f"ALTER DATABASE {DST_DATABASE} SET extra_float_digits = -3",
+                        f"ALTER DATABASE {DST_DATABASE} SET bytea_output = 'escape'")
+    yield
+    execute_sql(db_info,f"ALTER DATABASE {DST_DATABASE} RESET ALL")
+
+def test_verify_data_with_different_session_defaults(make_schemas,migrate,dst_session_defaults,capsys):
+    src_db_info,dst_db_info = make_schemas(SCHEMA)
+    execute_sql(src_db_info,
+                f"CREATE TABLE {SCHEMA}.events (id integer PRIMARY KEY, happened timestamptz, took interval, "
+                "score double precision, payload bytea, day date)",
+                f"INSERT INTO {SCHEMA}.events SELECT n, '2024-03-10 01:30+00'::timestamptz + n * interval '7 hours', "
+                "n * interval '1 mon 1 day 01:02:03.5', pi() * n, decode(md5(n::text),'hex'), DATE '2024-01-01' + n "
+                "FROM generate_series(1,500) n")
+    migrate(src_db_info,dst_db_info,verify_data='Y')
+    assert "Chunks Mismatched: 0" in capsys.readouterr().out
+    execute_sql(dst_db_info,f"UPDATE {SCHEMA}.events SET took = took + interval '1 second' WHERE id = 42")
+    migrate(src_db_info,dst_db_info,create_tables_insert_data='N',verify_data='Y')
+    output = capsys.readouterr().out
+    assert "Chunks Mismatched: 1" in output
+    assert "Table 'verify_data.events' chunk 1" in output